@@ -101,6 +101,15 @@ ConstanceAdmin.fieldsets = (
         ),
     }),
 
+    (_(u'User imports'), {
+        'classes': ('grp-collapse grp-closed', ),
+        'fields': (
+            'USER_IMPORT_POOL_SIZE',
+            'USER_IMPORT_POOL_PER_HOST',
+            'USER_IMPORT_CHECKPOINT_INTERVAL',
+        ),
+    }),
+
     (_(u'RSS feed refreshing'), {
         'classes': ('grp-collapse grp-closed', ),
         'fields': (
@@ -112,9 +121,14 @@ ConstanceAdmin.fieldsets = (
             'FEED_FETCH_MAX_INTERVAL',
             'FEED_FETCH_RAISE_THRESHOLD',
             'FEED_FETCH_PARALLEL_LIMIT',
+            'FEED_FETCH_POOL_BATCH_SIZE',
+            'FEED_FETCH_POOL_SIZE',
+            'FEED_FETCH_POOL_PER_HOST',
+            'FEED_FETCH_POOL_TIMEOUT',
             'FEED_ADMIN_LIST_PER_PAGE',
             'FEED_ADMIN_MEANINGFUL_DELTA',
             'FEED_CLOSED_WARN_LIMIT',
+            'FEED_EXPORT_BATCH_SIZE',
         ),
     }),
 
@@ -141,6 +155,11 @@ ConstanceAdmin.fieldsets = (
 
             'TWITTER_DEFAULT_CACHE_EXPIRY',
             'TWITTER_LISTS_CACHE_EXPIRY',
+
+            'TWITTER_STREAM_BATCH_SIZE',
+            'TWITTER_STREAM_BATCH_DELAY',
+            'TWITTER_STREAM_RELOAD_INTERVAL',
+            'TWITTER_STREAM_LOCK_EXPIRY',
         ),
     }),
     (_(u'e-Mail accounts & IMAP'), {
@@ -163,11 +182,20 @@ ConstanceAdmin.fieldsets = (
             'ARTICLE_FETCHING_DEBUG',
             'ARTICLE_REPROCESSING_DISABLED',
             'ARTICLE_ABSOLUTIZING_DISABLED',
+            'ARTICLE_REDIRECT_CACHE_TTL',
+            'ARTICLE_HANDOFF_TTL',
+            'ARTICLE_HANDOFF_MAX_SIZE',
             'ARTICLE_FETCHING_DISABLED',
             'ARTICLE_FETCHING_TEXT_DISABLED',
             'ARTICLE_FETCHING_VIDEO_DISABLED',
             'ARTICLE_FETCHING_IMAGE_DISABLED',
             'ARTICLE_MARKDOWN_DISABLED',
+            'ORIGINAL_DATA_PACK_BATCH_SIZE',
+            'SEARCH_INDEX_BATCH_SIZE',
+            'WEBSITE_CACHE_TTL',
+            'WEBSITE_CACHE_NEGATIVE_TTL',
+            'TAG_CACHE_TTL',
+            'AUTHOR_CACHE_TTL',
             'ARTICLE_ARCHIVE_BATCH_SIZE',
             'ARTICLE_ARCHIVE_OLDER_THAN',
             'EXCERPT_PARAGRAPH_MIN_LENGTH',
@@ -212,7 +240,9 @@ ConstanceAdmin.fieldsets = (
             'CHECK_SUBSCRIPTIONS_DISABLED',
             'CHECK_DUPLICATES_DISABLED',
             'CHECK_DUPLICATES_PURGE_AFTER_WEEKS',
+            'CHECK_DUPLICATES_CHUNK_SIZE',
             'CHECK_READS_DISABLED',
+            'CHECK_READS_CHUNK_SIZE',
             'CHECK_USERS_DISABLED',
         ),
     }),
@@ -23,11 +23,14 @@ import uuid
 import time
 import redis
 import logging
+import threading
+
+from contextlib import contextmanager
 
 from django.conf import settings
 
 from ..utils import (RedisExpiringLock, AlreadyLockedException,
-                     eventually_deferred)
+                     eventually_deferred, list_chunks)
 from ..utils.dateutils import ftstamp
 
 LOGGER = logging.getLogger(__name__)
@@ -36,6 +39,39 @@ REDIS = redis.StrictRedis(host=settings.REDIS_DESCRIPTORS_HOST,
                           port=settings.REDIS_DESCRIPTORS_PORT,
                           db=settings.REDIS_DESCRIPTORS_DB)
 
+# How many keys we ask REDIS for in one MGET call.
+PREFETCH_CHUNK_SIZE = 1000
+
+# Holds the write pipelines of redis_descriptors_pipeline(), one per
+# descriptor REDIS client. Our workers are gevent-patched, this makes
+# it greenlet-local too.
+_BUFFER = threading.local()
+
+# Per-class {attribute name: descriptor} maps, cf. redis_descriptors_of().
+_DESCRIPTORS = {}
+
+# Atomic INCRBY, clamped to optional min (ARGV[2]) and max (ARGV[3])
+# values. Returns nil without creating the key if it doesn't exist,
+# because the descriptor default value must be computed Python-side.
+INCR_CLAMPED_SCRIPT = REDIS.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+
+if ARGV[2] ~= '' and value < tonumber(ARGV[2]) then
+    value = tonumber(ARGV[2])
+    redis.call('SET', KEYS[1], value)
+
+elseif ARGV[3] ~= '' and value > tonumber(ARGV[3]) then
+    value = tonumber(ARGV[3])
+    redis.call('SET', KEYS[1], value)
+end
+
+return value
+""")
+
 
 class RedisCachedDescriptor(object):
 
@@ -250,6 +286,22 @@ class RedisCachedDescriptor(object):
                 raise AlreadyLockedException(
                     'Too much effort required to get the lock.')
 
+    def writer(self):
+        """ Return the buffering pipeline of our REDIS if any, else REDIS. """
+
+        pipelines = getattr(_BUFFER, 'pipelines', None)
+
+        if pipelines is None:
+            return self.REDIS
+
+        try:
+            return pipelines[self.REDIS]
+
+        except KeyError:
+            pipeline = pipelines[self.REDIS] = self.REDIS.pipeline(
+                transaction=False)
+            return pipeline
+
     def __set__(self, instance, value):
         """ set(me). """
 
@@ -264,8 +316,9 @@ class RedisCachedDescriptor(object):
             value = self.max_value
 
         # Always store into REDIS, whatever the cache. We need persistence.
-        self.REDIS.set(self.key_name % getattr(instance, self.field_name),
-                       self.to_redis(value))
+        self.writer().set(self.key_name % getattr(instance,
+                                                  self.field_name),
+                          self.to_redis(value))
 
         if self.cache:
             # LOGGER.warning('SET-cache: %s %s %s', instance,
@@ -280,7 +333,8 @@ class RedisCachedDescriptor(object):
         # LOGGER.warning('DELETE-redis: %s', self.key_name % getattr(instance,
         # self.field_name))
 
-        self.REDIS.delete(self.key_name % getattr(instance, self.field_name))
+        self.writer().delete(self.key_name % getattr(instance,
+                                                     self.field_name))
 
         if self.cache:
             # LOGGER.warning('DELETE-cache: %s %s', instance,
@@ -292,6 +346,213 @@ class RedisCachedDescriptor(object):
 RedisCachedDescriptor.REDIS = REDIS
 
 
+def redis_descriptors_of(klass):
+    """ Return a ``{name: descriptor}`` dict of :param:`klass`.
+
+    All classes of the MRO are inspected, because our descriptors are
+    often set on parent classes, or patched onto models after their
+    creation. Results are cached per class.
+    """
+
+    try:
+        return _DESCRIPTORS[klass]
+
+    except KeyError:
+        pass
+
+    descriptors = {}
+
+    for parent in reversed(klass.__mro__):
+        for name, value in vars(parent).items():
+            if isinstance(value, RedisCachedDescriptor):
+                descriptors[name] = value
+
+            elif name in descriptors:
+                # Overriden by a standard attribute in a subclass.
+                del descriptors[name]
+
+    _DESCRIPTORS[klass] = descriptors
+
+    return descriptors
+
+
+def prefetch_redis_descriptors(instances, names=None):
+    """ Fill the descriptors instance cache of many instances at once.
+
+    Rendering a list of subscriptions or folders reads 3 or 4 counters
+    on each of them, which costs one REDIS round-trip per counter. This
+    function gets all of them with a few ``MGET`` instead, and stores
+    the values into the instance cache, where :meth:`__get__` will find
+    them without any further I/O.
+
+    Keys which don't exist in REDIS are left untouched: the first
+    :meth:`__get__` will handle them as usual (eg. compute and
+    eventually store the default value).
+
+    :param instances: an iterable of objects. They don't need to be of
+        the same class.
+    :param names: an optional iterable of descriptors names, to
+        restrict the prefetch to them. Default: all cached descriptors.
+    :returns: the number of values effectively prefetched.
+    """
+
+    if names is not None:
+        names = set(names)
+
+    # {redis connection: [(key, instance, descriptor), …]}
+    wanted = {}
+
+    for instance in instances:
+        for name, descriptor in redis_descriptors_of(
+                instance.__class__).items():
+
+            if not descriptor.cache:
+                continue
+
+            if names is not None and name not in names:
+                continue
+
+            if '_r_c_d_' + descriptor.cache_key in instance.__dict__:
+                # Already fetched or set.
+                continue
+
+            wanted.setdefault(descriptor.REDIS, []).append((
+                descriptor.key_name % getattr(instance,
+                                              descriptor.field_name),
+                instance, descriptor))
+
+    prefetched = 0
+
+    for connection, targets in wanted.items():
+        for chunk in list_chunks(targets, PREFETCH_CHUNK_SIZE):
+            values = connection.mget([key for key, _, _ in chunk])
+
+            for (key, instance, descriptor), value in zip(chunk, values):
+                if value is None:
+                    continue
+
+                setattr(instance, '_r_c_d_' + descriptor.cache_key,
+                        descriptor.to_python(value))
+                prefetched += 1
+
+    return prefetched
+
+
+def incr_redis_descriptors(deltas):
+    """ Atomically apply many integer deltas, in one REDIS round-trip.
+
+    :param deltas: an iterable of ``(instance, descriptor, delta)``
+        tuples. ``descriptor`` is an :class:`IntRedisDescriptor` or the
+        name of one on the instance class; other kinds of descriptors
+        are skipped with a warning.
+    :returns: the list of new values, in the same order as
+        :param:`deltas`. Skipped entries get ``None``.
+
+    Keys which don't exist yet are not touched by the pipeline. For
+    them, we fall back to a classic get-add-set, which computes the
+    descriptor default value as usual.
+    """
+
+    deltas  = list(deltas)
+    results = [None] * len(deltas)
+
+    # {redis connection: (pipeline, [target, …])}, descriptors can
+    # use different REDIS instances than the RedisCachedDescriptor one.
+    pipelines = {}
+
+    for index, (instance, descriptor, delta) in enumerate(deltas):
+        if not isinstance(descriptor, RedisCachedDescriptor):
+            descriptor = redis_descriptors_of(
+                instance.__class__).get(descriptor, descriptor)
+
+        if not isinstance(descriptor, IntRedisDescriptor):
+            LOGGER.warning(u'Skipped non-integer descriptor %s '
+                           u'increment on %s.', descriptor, instance)
+            continue
+
+        try:
+            pipeline, targets = pipelines[descriptor.REDIS]
+
+        except KeyError:
+            pipeline, targets = pipelines[descriptor.REDIS] = (
+                descriptor.REDIS.pipeline(transaction=False), [])
+
+        INCR_CLAMPED_SCRIPT(
+            keys=[descriptor.key_name % getattr(instance,
+                                                descriptor.field_name)],
+            args=[delta,
+                  '' if descriptor.min_value is None
+                  else descriptor.min_value,
+                  '' if descriptor.max_value is None
+                  else descriptor.max_value],
+            client=pipeline)
+
+        targets.append((index, instance, descriptor, delta))
+
+    executed = []
+
+    for pipeline, targets in pipelines.values():
+        executed.extend(zip(targets, pipeline.execute()))
+
+    for (index, instance, descriptor, delta), value in executed:
+
+        if value is None:
+            # No value in REDIS yet; let the
+            # descriptor compute its default.
+            value = (descriptor.__get__(instance) or 0) + delta
+            descriptor.__set__(instance, value)
+
+            # __set__() clamped it.
+            value = descriptor.__get__(instance)
+
+        else:
+            value = int(value)
+
+            if descriptor.cache:
+                setattr(instance, '_r_c_d_' + descriptor.cache_key, value)
+
+        results[index] = value
+
+    return results
+
+
+@contextmanager
+def redis_descriptors_pipeline():
+    """ Buffer all descriptors writes, sent in one round-trip per REDIS.
+
+    Inside the ``with`` block, ``__set__`` and ``__delete__`` calls
+    still update the instance cache immediately, but their REDIS
+    commands are queued in a non-transactional pipeline, which is
+    executed when the block exits (even on exception, to keep the
+    unbuffered persistence semantics).
+
+    There is one pipeline per REDIS client in use by the descriptors
+    written to. Nested blocks share the outer pipelines; only the
+    outermost one flushes them.
+
+    .. warning:: reads are not buffered. A ``__get__`` on a descriptor
+        without instance cache (``cache=False``) will not see a value
+        written earlier in the same block.
+    """
+
+    pipelines = getattr(_BUFFER, 'pipelines', None)
+
+    if pipelines is not None:
+        yield pipelines
+        return
+
+    pipelines = _BUFFER.pipelines = {}
+
+    try:
+        yield pipelines
+
+    finally:
+        _BUFFER.pipelines = None
+
+        for pipeline in pipelines.values():
+            pipeline.execute()
+
+
 class IntRedisDescriptor(RedisCachedDescriptor):
 
     """ Integer version of the generic :class:`RedisCachedDescriptor`.
@@ -331,6 +592,18 @@ class IntRedisDescriptor(RedisCachedDescriptor):
     #       Already covered by base class.
     #
 
+    def incr(self, instance, delta=1):
+        """ Atomically add :param:`delta` (can be negative), server-side.
+
+        Contrary to ``instance.attr += delta``, this costs one REDIS
+        round-trip instead of two, and concurrent increments are never
+        lost. ``min_value`` and ``max_value`` are still honoured.
+
+        Returns the new value.
+        """
+
+        return incr_redis_descriptors([(instance, self, delta)])[0]
+
 
 class DatetimeRedisDescriptor(RedisCachedDescriptor):
 
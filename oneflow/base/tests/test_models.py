@@ -27,7 +27,7 @@ import logging
 from django.conf import settings
 from django.test import TestCase  # TransactionTestCase
 
-from ..utils import RedisSemaphore
+from ..utils import RedisSemaphore, RedisExpiringLock
 from ..fields import RedisCachedDescriptor, IntRedisDescriptor
 
 LOGGER = logging.getLogger(__file__)
@@ -163,6 +163,48 @@ class RedisSemaphoreTests(TestCase):
         self.assertEquals(self.sem1.holders(), 0)
 
 
+class RedisExpiringLockTests(TestCase):
+
+    def make_lock(self, lock_name, lock_value=None):
+
+        lock = RedisExpiringLock('test', lock_name=lock_name,
+                                 lock_value=lock_value, expire_time=60)
+
+        # Not on the class: other tests use the default connection.
+        lock.REDIS = TEST_REDIS
+
+        return lock
+
+    def test_refresh(self):
+
+        lock = self.make_lock('refresh', uuid.uuid4().hex)
+
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.refresh())
+
+        lock.release()
+
+        self.assertFalse(lock.refresh())
+
+    def test_refresh_after_takeover(self):
+
+        lock1 = self.make_lock('takeover', uuid.uuid4().hex)
+        lock2 = self.make_lock('takeover', uuid.uuid4().hex)
+
+        self.assertTrue(lock1.acquire())
+        self.assertFalse(lock2.acquire())
+
+        # The lock expires, and another worker takes it.
+        TEST_REDIS.delete(lock1.lock_id)
+
+        self.assertTrue(lock2.acquire())
+
+        self.assertFalse(lock1.refresh())
+        self.assertFalse(lock1.release())
+        self.assertTrue(lock2.refresh())
+        self.assertTrue(lock2.release())
+
+
 class IntRedisCachedDescriptorTest(TestCase):
 
     def setUp(self):
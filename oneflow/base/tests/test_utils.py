@@ -19,12 +19,19 @@ You should have received a copy of the GNU Affero General Public
 License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 
+import time
 import logging
 
 # from django.conf import settings
 from django.test import TestCase  # TransactionTestCase
 
 from oneflow.base.utils.http import clean_google_url, clean_marketing_url
+from oneflow.base.utils.packed import (
+    PACKED_COMPRESS_MIN_SIZE,
+    pack_mapping,
+    PackedMapping,
+    PackedMappingException,
+)
 
 LOGGER = logging.getLogger(__file__)
 
@@ -288,3 +295,78 @@ class TestHttpUtilsCleanGoogleUrl(TestCase):
         ):
 
             self.assertEquals(clean_google_url(bad_url), good_url)
+
+
+class TestPackedMapping(TestCase):
+
+    """ Test the packed mappings of original data. """
+
+    def setUp(self):
+
+        self.mapping = {
+            u'title': u'Un été à Paris',
+            u'link': u'http://test.com/mytest/',
+            u'tags': [{u'term': u'python'}, {u'term': None}],
+            u'count': 42,
+            u'content': u'x' * (PACKED_COMPRESS_MIN_SIZE * 4),
+        }
+
+    def test_round_trip(self):
+
+        packed = PackedMapping(pack_mapping(self.mapping))
+
+        self.assertEquals(len(packed), len(self.mapping))
+        self.assertEquals(set(packed), set(self.mapping))
+        self.assertEquals(dict(packed), self.mapping)
+
+    def test_compression(self):
+
+        packed = PackedMapping(pack_mapping(self.mapping))
+
+        # Only big values are compressed.
+        self.assertTrue(packed.header[u'content'][2])
+        self.assertFalse(packed.header[u'title'][2])
+
+        self.assertTrue(packed.header[u'content'][1]
+                        < len(self.mapping[u'content']))
+
+        self.assertEquals(packed[u'content'], self.mapping[u'content'])
+        self.assertEquals(packed[u'title'], self.mapping[u'title'])
+
+    def test_lazy_decoding(self):
+
+        packed = PackedMapping(pack_mapping(self.mapping))
+
+        self.assertTrue(u'content' in packed)
+        self.assertFalse(u'missing' in packed)
+        self.assertEquals(packed.values, {})
+
+        packed[u'title']
+
+        self.assertEquals(packed.values.keys(), [u'title'])
+
+    def test_attribute_access(self):
+
+        packed = PackedMapping(pack_mapping(self.mapping))
+
+        self.assertEquals(packed.link, self.mapping[u'link'])
+        self.assertEquals(packed.get(u'missing', u'default'), u'default')
+
+        self.assertRaises(AttributeError, getattr, packed, u'missing')
+        self.assertRaises(KeyError, packed.__getitem__, u'missing')
+
+    def test_struct_time(self):
+
+        published = time.gmtime(1400000000)
+
+        packed = PackedMapping(pack_mapping({
+            u'published_parsed': published}))
+
+        self.assertEquals(packed.published_parsed, list(published))
+
+    def test_bad_magic(self):
+
+        self.assertRaises(PackedMappingException, PackedMapping,
+                          b'{"title": "not packed"}')
+
+        self.assertRaises(PackedMappingException, PackedMapping, b'')
@@ -634,6 +634,19 @@ class RedisExpiringLock(object):
 
         return False
 
+    def refresh(self, expire_time=None):
+        """ Extend the lock life, if we still hold it.
+
+        Return ``False`` if the lock expired or was taken by someone
+        else in the meantime, without touching it.
+        """
+
+        if self.REDIS.get(self.lock_id) != self.lock_value:
+            return False
+
+        return bool(self.REDIS.expire(self.lock_id,
+                                      expire_time or self.expire_time))
+
     def is_locked(self):
         """ OMG this method costs so much,
             and can even have a race condition.
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2013-2014 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+"""
+
+import logging
+import requests
+
+from collections import namedtuple, deque, OrderedDict, defaultdict
+from concurrent import futures
+
+from django.conf import settings
+
+from .http import split_url, SplitUrlException
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ('HttpFetchPool', 'FetchResult', 'url_host', 'run_per_host', )
+
+
+FetchResult = namedtuple('FetchResult', [
+    'key',        # the caller's key (eg. a feed ID).
+    'url',        # the URL asked by the caller.
+    'final_url',  # the last hop, after redirects.
+    'status',     # HTTP status code of the last hop.
+    'headers',    # response headers of the last hop, lowercased keys.
+    'content',    # raw response body (bytes), already un-gzipped.
+    'history',    # list of (url, status) tuples of the redirect hops.
+    'error',      # the exception that occured, or ``None``.
+])
+
+
+def url_host(url):
+    """ Return the lowercased hostname of an URL, for per-host accounting.
+
+    If the URL cannot be split, it is returned as-is: this makes weird
+    URLs accounted on their own instead of crashing the whole pool.
+    """
+
+    try:
+        return split_url(url, split_port=True).hostname.lower()
+
+    except SplitUrlException:
+        return url
+
+
+def run_per_host(jobs, function, max_workers, max_per_host):
+    """ Run ``function(key, url, extra)`` for each job, in a thread pool.
+
+    At most :param:`max_workers` jobs run at the same time, and at most
+    :param:`max_per_host` of them on the same remote host. Results are
+    yielded as soon as they arrive, in completion order.
+
+    :param jobs: an iterable of ``(key, url, extra)`` tuples. ``extra``
+        is passed untouched to :param:`function`.
+    """
+
+    pending = OrderedDict()
+
+    for key, url, extra in jobs:
+        pending.setdefault(url_host(url), deque()).append(
+            (key, url, extra))
+
+    if not pending:
+        return
+
+    running = {}
+    active  = defaultdict(int)
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit_ready():
+
+            for host, queue in pending.items():
+                while queue and active[host] < max_per_host \
+                        and len(running) < max_workers:
+
+                    key, url, extra = queue.popleft()
+
+                    running[executor.submit(
+                        function, key, url, extra)] = host
+                    active[host] += 1
+
+                if not queue:
+                    del pending[host]
+
+        submit_ready()
+
+        while running:
+            done, not_done = futures.wait(
+                running, return_when=futures.FIRST_COMPLETED)
+
+            for future in done:
+                active[running.pop(future)] -= 1
+
+            # Refill the pool before handing results over, in
+            # order for the jobs to continue while the
+            # caller processes what we yield.
+            submit_ready()
+
+            for future in done:
+                yield future.result()
+
+
+class HttpFetchPool(object):
+
+    """ Download many URLs at once, over a bounded pool of connections.
+
+    Connections are kept alive by a shared :class:`requests.Session`,
+    the total concurrency is bounded by :param:`max_workers` and each
+    remote host gets at most :param:`max_per_host` simultaneous requests.
+    Slow hosts thus never monopolize all the workers: jobs for a busy
+    host simply wait in their queue while other hosts are served.
+
+    Results are yielded as soon as they arrive, which lets the caller
+    process them (parsing, database…) while other downloads continue.
+
+    Usage::
+
+        pool = HttpFetchPool(max_workers=32, max_per_host=2)
+
+        for result in pool.fetch_many([(feed.id, feed.url, {}), …]):
+            …
+
+    .. note:: the pool relies on threads. In our gevent-based workers,
+        they are monkey-patched into greenlets, which is exactly what we
+        want for I/O bound jobs.
+    """
+
+    def __init__(self, max_workers=None, max_per_host=None,
+                 timeout=None, headers=None):
+        """ Setup the session and the connection pools. """
+
+        self.max_workers  = max_workers or 16
+        self.max_per_host = max_per_host or 2
+        self.timeout      = timeout or 20
+
+        self.session = requests.Session()
+
+        # pool_connections is the number of per-host pools kept alive,
+        # pool_maxsize the number of connections kept in each of them.
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_per_host)
+
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.session.headers['User-Agent'] = settings.DEFAULT_USER_AGENT
+
+        if headers:
+            self.session.headers.update(headers)
+
+    def fetch(self, key, url, headers=None):
+        """ Download one URL and return a :class:`FetchResult`.
+
+        This method never raises; network errors, timeouts and
+        the like are returned in the ``error`` attribute.
+        """
+
+        try:
+            response = self.session.get(url, headers=headers,
+                                        timeout=self.timeout)
+
+        except Exception as e:
+            return FetchResult(key, url, None, None, {}, None, [], e)
+
+        return FetchResult(
+            key=key,
+            url=url,
+            final_url=response.url,
+            status=response.status_code,
+            headers=dict((k.lower(), v)
+                         for k, v in response.headers.items()),
+            content=response.content,
+            history=[(r.url, r.status_code) for r in response.history],
+            error=None,
+        )
+
+    def fetch_many(self, fetch_requests):
+        """ Yield a :class:`FetchResult` for each request, as they complete.
+
+        :param fetch_requests: an iterable of ``(key, url, headers)``
+            tuples. ``headers`` can be ``None``. Keys are returned
+            untouched in the results, to help the caller match them.
+        """
+
+        return run_per_host(fetch_requests, self.fetch,
+                            max_workers=self.max_workers,
+                            max_per_host=self.max_per_host)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2013-2014 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+"""
+
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ('LRUCache', )
+
+
+class LRUCache(object):
+
+    """ A bounded, per-process, least-recently-used cache.
+
+    Entries can expire after a per-entry ``ttl`` (in seconds), which
+    bounds how long a process can serve a value that another process
+    changed. ``None`` is a valid value: use it for negative caching,
+    and :param:`default` to tell it apart from a miss.
+
+    Usage::
+
+        cache = LRUCache(maxsize=1024)
+
+        value = cache.get(key, MISSING)
+
+        if value is MISSING:
+            value = compute(key)
+            cache.set(key, value, ttl=300)
+
+    .. note:: nothing is shared between processes, thus there is
+        no network round-trip at all on hits. Invalidations are
+        local too, see :meth:`delete` and :meth:`delete_values`.
+    """
+
+    def __init__(self, maxsize):
+        """ Hello, LRU. """
+
+        self.maxsize = maxsize
+
+        # {key: (value, expiry timestamp or None)}, oldest first.
+        self.entries = OrderedDict()
+        self.lock    = threading.Lock()
+
+    def __len__(self):
+        """ The number of entries, expired ones included. """
+
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """ Return the value of :param:`key` and mark it recently used. """
+
+        with self.lock:
+            try:
+                value, expiry = self.entries.pop(key)
+
+            except KeyError:
+                return default
+
+            if expiry is not None and expiry < time.time():
+                return default
+
+            self.entries[key] = (value, expiry)
+
+            return value
+
+    def set(self, key, value, ttl=None):
+        """ Store a value, evicting the least recently used if full. """
+
+        with self.lock:
+            self.entries.pop(key, None)
+
+            self.entries[key] = (value, None if ttl is None
+                                 else time.time() + ttl)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        """ Forget :param:`key`, if present. """
+
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_values(self, test):
+        """ Forget all entries whose value satisfies ``test(value)``.
+
+        This walks the whole cache; it is meant for rare invalidations.
+        """
+
+        with self.lock:
+            for key in [key for key, (value, expiry)
+                        in self.entries.items() if test(value)]:
+                del self.entries[key]
+
+    def clear(self):
+        """ Forget everything. """
+
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2013-2014 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+"""
+
+import json
+import time
+import zlib
+import struct
+import logging
+
+from collections import Mapping
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ('pack_mapping', 'PackedMapping', 'PackedMappingException', )
+
+
+# Format of a packed mapping:
+#
+#   MAGIC, header length (4 bytes, big endian), JSON header, values.
+#
+# The header is ``{key: [offset, length, compressed]}``; each value is
+# encoded in JSON on its own, and zlib-compressed if it is big enough
+# for compression to pay. Reading one key thus never decodes the others.
+PACKED_MAGIC = b'PM1'
+PACKED_HEADER = struct.Struct('>I')
+PACKED_COMPRESS_MIN_SIZE = 256
+
+
+class PackedMappingException(Exception):
+
+    """ Raised when a packed mapping cannot be read. """
+
+    pass
+
+
+def packable(value):
+    """ Return a JSON-encodable version of :param:`value`.
+
+    ``time.struct_time`` (feedparser ``*_parsed`` values) are
+    not tuples for :mod:`json`; we keep them as lists.
+    """
+
+    if isinstance(value, time.struct_time):
+        return list(value)
+
+    return unicode(value)
+
+
+def pack_mapping(mapping, default=packable):
+    """ Pack a mapping into compact bytes, see :class:`PackedMapping`.
+
+    Values which cannot be encoded in JSON, even with the help of the
+    :param:`default` function (see :func:`json.dumps`), are skipped
+    with a warning.
+    """
+
+    header = {}
+    values = []
+    offset = 0
+
+    for key, value in mapping.items():
+        try:
+            encoded = json.dumps(value, default=default,
+                                 separators=(',', ':'))
+
+        except (TypeError, ValueError, UnicodeDecodeError):
+            LOGGER.warning(u'Skipped unpackable key %s (%r).', key, value)
+            continue
+
+        compressed = len(encoded) >= PACKED_COMPRESS_MIN_SIZE
+
+        if compressed:
+            encoded = zlib.compress(encoded)
+
+        header[key] = (offset, len(encoded), compressed)
+        values.append(encoded)
+        offset += len(encoded)
+
+    header = json.dumps(header, separators=(',', ':'))
+
+    return b''.join([PACKED_MAGIC, PACKED_HEADER.pack(len(header)),
+                     header] + values)
+
+
+class PackedMapping(Mapping):
+
+    """ A read-only, lazy mapping over bytes built by :func:`pack_mapping`.
+
+    Only the header is decoded at creation; each value is decompressed
+    and decoded the first time it is accessed, then kept.
+
+    Like feedparser's ``FeedParserDict``, keys are readable as
+    attributes too (eg. ``entry.published_parsed``).
+    """
+
+    def __init__(self, packed):
+        """ Decode the header only. """
+
+        packed = bytes(packed)
+
+        if not packed.startswith(PACKED_MAGIC):
+            raise PackedMappingException(u'Not a packed mapping.')
+
+        start = len(PACKED_MAGIC) + PACKED_HEADER.size
+
+        header_length, = PACKED_HEADER.unpack(
+            packed[len(PACKED_MAGIC):start])
+
+        self.header = json.loads(packed[start:start + header_length])
+        self.packed = packed
+        self.start  = start + header_length
+        self.values = {}
+
+    def __getitem__(self, key):
+        """ Decode the value of :param:`key`, once. """
+
+        try:
+            return self.values[key]
+
+        except KeyError:
+            pass
+
+        offset, length, compressed = self.header[key]
+
+        offset += self.start
+        encoded = self.packed[offset:offset + length]
+
+        if compressed:
+            encoded = zlib.decompress(encoded)
+
+        value = self.values[key] = json.loads(encoded)
+
+        return value
+
+    def __getattr__(self, name):
+        """ Attribute access to keys, like ``FeedParserDict``. """
+
+        if name in ('header', 'packed', 'start', 'values'):
+            # Not yet set in __init__().
+            raise AttributeError(name)
+
+        try:
+            return self[name]
+
+        except KeyError:
+            raise AttributeError(name)
+
+    def __contains__(self, key):
+        """ No need to decode anything. """
+
+        return key in self.header
+
+    def __iter__(self):
+        """ Iterate keys, without decoding values. """
+
+        return iter(self.header)
+
+    def __len__(self):
+        """ The number of keys. """
+
+        return len(self.header)
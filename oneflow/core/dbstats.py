@@ -18,14 +18,19 @@ You should have received a copy of the GNU Affero General Public
 License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 
+import string
 import logging
 
 from statsd import statsd
 # from constance import config
 
+from django.db import connection
+from django.contrib.contenttypes.models import ContentType
+
 from oneflow.core.models import (
     SimpleTag as Tag,
-    BaseFeed, Subscription,
+    BaseFeed, MailFeed, TwitterFeed,
+    Subscription,
     Article,
     Author,
     WebSite,
@@ -39,6 +44,7 @@ LOGGER = logging.getLogger(__name__)
 
 
 __all__ = [
+    'count_conditions',
     'synchronize_statsd_articles_gauges',
     'synchronize_statsd_tags_gauges',
     'synchronize_statsd_websites_gauges',
@@ -49,40 +55,126 @@ __all__ = [
 ]
 
 
+# ———————————————————————————————————————————————————————— Single-scan counts
+
+
+class ModelColumns(dict):
+
+    """ Map field names of a model to their qualified SQL columns. """
+
+    def __init__(self, model):
+        """ Hello, columns. """
+
+        super(ModelColumns, self).__init__()
+
+        self.model = model
+
+    def __missing__(self, name):
+        """ Resolve the column, in the parent table for inherited fields. """
+
+        qn = connection.ops.quote_name
+
+        field, field_model = self.model._meta.get_field_by_name(name)[:2]
+
+        column = self[name] = u'{0}.{1}'.format(
+            qn((field_model or self.model)._meta.db_table), qn(field.column))
+
+        return column
+
+
+def model_from_clause(model):
+    """ Return the table of a model, joined to its parents tables. """
+
+    qn = connection.ops.quote_name
+
+    table = qn(model._meta.db_table)
+    pk_column = qn(model._meta.pk.column)
+
+    from_clause = table
+
+    # With multi-table inheritance, all tables share the primary key value.
+    for parent in model._meta.get_parent_list():
+        from_clause += u' INNER JOIN {0} ON {1}.{2} = {0}.{3}'.format(
+            qn(parent._meta.db_table), table, pk_column,
+            qn(parent._meta.pk.column))
+
+    return from_clause
+
+
+def count_conditions(model, conditions):
+    """ Count the rows of a model matching each condition, in one scan.
+
+    Instead of one ``COUNT(*)`` query per condition, each of them being
+    a sequential scan of the table, all counts are computed together by
+    conditional aggregates.
+
+    :param conditions: a list of ``(name, sql, params)``. ``sql`` is a
+        boolean SQL expression, in which ``{field_name}`` is replaced by
+        the qualified column of the field, and ``params`` its parameters.
+    :returns: a dict ``{name: count}``, plus the row count in ``total``.
+    """
+
+    columns = ModelColumns(model)
+    formatter = string.Formatter()
+
+    selects = [u'count(*)']
+    all_params = []
+
+    for name, sql, params in conditions:
+        selects.append(u'count(CASE WHEN {0} THEN 1 END)'.format(
+            formatter.vformat(sql, (), columns)))
+        all_params.extend(params)
+
+    cursor = connection.cursor()
+    cursor.execute(u'SELECT {0} FROM {1}'.format(
+        u', '.join(selects), model_from_clause(model)), all_params)
+
+    row = cursor.fetchone()
+
+    counts = dict(zip((name for name, sql, params in conditions), row[1:]))
+    counts['total'] = row[0]
+
+    return counts
+
+
+def duplicates_conditions(full):
+
+    if full:
+        return [('duplicates', u'{duplicate_of} IS NOT NULL', [])]
+
+    return []
+
+
+# ———————————————————————————————————————————————————————————— statsd gauges
+
+
 def synchronize_statsd_articles_gauges(full=False):
     """ synchronize all articles-related gauges on our statsd server. """
 
     with benchmark('synchronize statsd gauges for Article.*'):
 
-        empty               = Article.objects.empty()
-        # empty_pending       = empty.filter(content_error='', url_error='')
-        # empty_content_error = empty.filter(content_error__ne='')
-        # empty_url_error     = empty.filter(url_error__ne='')
+        conditions = [
+            ('markdown', u'{content_type} = %s', [CONTENT_TYPES.MARKDOWN]),
+            ('html', u'{content_type} = %s', [CONTENT_TYPES.HTML]),
+            ('empty', u'({content_type} IS NULL OR {content_type} = %s)',
+             [CONTENT_TYPES.NONE]),
+            ('content_errors', u'{content_error} IS NOT NULL', []),
+            ('url_errors', u'{url_error} IS NOT NULL', []),
+        ]
 
-        parsed             = Article.objects.parsed()
-        html               = parsed.filter(content_type=CONTENT_TYPES.HTML)
-        markdown           = parsed.filter(content_type=CONTENT_TYPES.MARKDOWN)
+        if full:
+            conditions.extend([
+                ('orphaned',
+                 u'{is_orphaned} AND {duplicate_of} IS NULL', []),
+                ('absolutes', u'{url_absolute}', []),
+            ])
 
-        absolutes          = Article.objects.absolute()
-        duplicates         = Article.objects.duplicate()
-        orphaned           = Article.objects.orphaned().master()
-        content_errors     = Article.objects.exclude(content_error=None)
-        url_errors         = Article.objects.exclude(url_error=None)
+        counts = count_conditions(Article,
+                                  conditions + duplicates_conditions(full))
 
         with statsd.pipeline() as spipe:
-            spipe.gauge('articles.counts.total',
-                        Article.objects.all().count())
-            spipe.gauge('articles.counts.markdown', markdown.count())
-            spipe.gauge('articles.counts.html', html.count())
-            spipe.gauge('articles.counts.empty', empty.count())
-            spipe.gauge('articles.counts.content_errors',
-                        content_errors.count())
-            spipe.gauge('articles.counts.url_errors', url_errors.count())
-
-            if full:
-                spipe.gauge('articles.counts.orphaned', orphaned.count())
-                spipe.gauge('articles.counts.absolutes', absolutes.count())
-                spipe.gauge('articles.counts.duplicates', duplicates.count())
+            for name, count in counts.items():
+                spipe.gauge('articles.counts.' + name, count)
 
 
 def synchronize_statsd_tags_gauges(full=False):
@@ -90,11 +182,11 @@ def synchronize_statsd_tags_gauges(full=False):
 
     with benchmark('synchronize statsd gauges for Tag.*'):
 
-        statsd.gauge('tags.counts.total', Tag.objects.all().count())
+        counts = count_conditions(Tag, duplicates_conditions(full))
 
-        if full:
-            duplicates = Tag.objects.exclude(duplicate_of=None)
-            statsd.gauge('tags.counts.duplicates', duplicates.count())
+        with statsd.pipeline() as spipe:
+            for name, count in counts.items():
+                spipe.gauge('tags.counts.' + name, count)
 
 
 def synchronize_statsd_websites_gauges(full=False):
@@ -102,11 +194,11 @@ def synchronize_statsd_websites_gauges(full=False):
 
     with benchmark('synchronize statsd gauges for WebSite.*'):
 
-        statsd.gauge('websites.counts.total', WebSite.objects.all().count())
+        counts = count_conditions(WebSite, duplicates_conditions(full))
 
-        if full:
-            duplicates = WebSite.objects.exclude(duplicate_of=None)
-            statsd.gauge('websites.counts.duplicates', duplicates.count())
+        with statsd.pipeline() as spipe:
+            for name, count in counts.items():
+                spipe.gauge('websites.counts.' + name, count)
 
 
 def synchronize_statsd_authors_gauges(full=False):
@@ -114,11 +206,11 @@ def synchronize_statsd_authors_gauges(full=False):
 
     with benchmark('synchronize statsd gauges for Author.*'):
 
-        statsd.gauge('authors.counts.total', Author.objects.all().count())
+        counts = count_conditions(Author, duplicates_conditions(full))
 
-        if full:
-            duplicates = Author.objects.exclude(duplicate_of=None)
-            statsd.gauge('authors.counts.duplicates', duplicates.count())
+        with statsd.pipeline() as spipe:
+            for name, count in counts.items():
+                spipe.gauge('authors.counts.' + name, count)
 
 
 def synchronize_statsd_feeds_gauges(full=False):
@@ -126,19 +218,26 @@ def synchronize_statsd_feeds_gauges(full=False):
 
     with benchmark('synchronize statsd gauges for BaseFeed.*'):
 
-        all_feeds = BaseFeed.objects.all()
-
-        statsd.gauge('feeds.counts.total', all_feeds.count())
-        statsd.gauge('feeds.counts.open', BaseFeed.objects.active().count())
+        conditions = [
+            ('open', u'{is_active}', []),
+        ]
 
         if full:
-            statsd.gauge('feeds.counts.mail', all_feeds.mail().count())
-            statsd.gauge('feeds.counts.twitter', all_feeds.twitter().count())
+            get_for_model = ContentType.objects.get_for_model
 
-            duplicates = BaseFeed.objects.exclude(duplicate_of=None)
-            statsd.gauge('feeds.counts.duplicates', duplicates.count())
+            conditions.extend([
+                ('mail', u'{polymorphic_ctype} = %s',
+                 [get_for_model(MailFeed).id]),
+                ('twitter', u'{polymorphic_ctype} = %s',
+                 [get_for_model(TwitterFeed).id]),
+            ])
 
-        pass
+        counts = count_conditions(BaseFeed,
+                                  conditions + duplicates_conditions(full))
+
+        with statsd.pipeline() as spipe:
+            for name, count in counts.items():
+                spipe.gauge('feeds.counts.' + name, count)
 
 
 def synchronize_statsd_subscriptions_gauges(full=False):
@@ -155,9 +254,14 @@ def synchronize_statsd_reads_gauges(full=False):
 
     with benchmark('synchronize statsd gauges for Read.*'):
 
-        count = Read.objects.all().count()
-        good = Read.objects.good().count()
-        bad = Read.objects.bad().count()
+        counts = count_conditions(Read, [
+            ('good', u'{is_good}', []),
+            ('bad', u'NOT {is_good}', []),
+        ])
+
+        count = counts['total']
+        good = counts['good']
+        bad = counts['bad']
 
         with statsd.pipeline() as spipe:
             spipe.gauge('reads.counts.total', count)
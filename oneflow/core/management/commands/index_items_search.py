@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2015 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import logging
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from oneflow.core.models.reldb.item.base import (
+    search_index_items_batch,
+    baseitem_search_index,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    """ Index the items which existed before the search vector. """
+
+    args = u'[last item ID]'
+    help = (
+        u'Index existing items for full-text search, batch by batch, '
+        u'each one committed on its own. Start after the given item ID '
+        u'(default: 0), to resume an interrupted run.'
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--background', action='store_true', default=False,
+                    help=u'Launch the indexing celery task instead of '
+                         u'indexing here.'),
+        make_option('--batch-size', type='int', default=None,
+                    help=u'Items per batch (default: '
+                         u'config.SEARCH_INDEX_BATCH_SIZE).'),
+    )
+
+    def handle(self, *args, **options):
+        """ Index, Luke. """
+
+        last_id    = int(args[0]) if args else 0
+        batch_size = options.get('batch_size')
+
+        if options.get('background'):
+            baseitem_search_index.delay(last_id, batch_size)
+            LOGGER.info(u'Launched the items search indexing task.')
+            return
+
+        while True:
+            batch_last_id = search_index_items_batch(last_id, batch_size)
+
+            if batch_last_id is None:
+                break
+
+            LOGGER.info(u'Indexed items #%s to #%s for search.',
+                        last_id + 1, batch_last_id)
+
+            last_id = batch_last_id
+
+        LOGGER.info(u'Items search indexing finished.')
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2015 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import logging
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from oneflow.core.models.reldb.item.original_data import (
+    original_data_pack_legacy_batch,
+    original_data_pack_legacy,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    """ Convert legacy feedparser original data to the packed format. """
+
+    args = u'[last item ID]'
+    help = (
+        u'Convert legacy feedparser original data to the packed format, '
+        u'batch by batch, each one committed on its own. Start after the '
+        u'given item ID (default: 0), to resume an interrupted run.'
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--background', action='store_true', default=False,
+                    help=u'Launch the packing celery task instead of '
+                         u'packing here.'),
+        make_option('--batch-size', type='int', default=None,
+                    help=u'Rows per batch (default: '
+                         u'config.ORIGINAL_DATA_PACK_BATCH_SIZE).'),
+    )
+
+    def handle(self, *args, **options):
+        """ Pack, Luke. """
+
+        last_id    = int(args[0]) if args else 0
+        batch_size = options.get('batch_size')
+
+        if options.get('background'):
+            original_data_pack_legacy.delay(last_id, batch_size)
+            LOGGER.info(u'Launched the original data packing task.')
+            return
+
+        while True:
+            last_id = original_data_pack_legacy_batch(last_id, batch_size)
+
+            if last_id is None:
+                break
+
+        LOGGER.info(u'Legacy original data packing finished.')
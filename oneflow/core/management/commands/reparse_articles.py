@@ -52,7 +52,7 @@ class Command(BaseCommand):
                 if arg.isdigit():
                     website = WebSite.objects.get(id=int(arg))
                 else:
-                    website = WebSite.objects.get_from_url(arg)
+                    website = WebSite.get_from_url(arg)
             else:
                 test = True
 
@@ -21,9 +21,12 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 from datetime import datetime
 
+import re
 import imaplib
 import logging
 
+from collections import OrderedDict
+
 from constance import config
 
 from django.db import models
@@ -53,6 +56,9 @@ __all__ = [
     'mailaccount_mailboxes_default',
 ]
 
+# Extracts the UID from an IMAP FETCH response line.
+IMAP_FETCH_UID_RE = re.compile(r'\bUID (\d+)\b')
+
 
 def mailaccount_mailboxes_default(mailaccount):
     """ Build a MailAccount mailboxes default value. """
@@ -313,6 +319,22 @@ class MailAccount(BaseAccount):
 
             self._selected_mailbox_ = mailbox_name
 
+            try:
+                self._selected_uidvalidity_ = imap_conn.response(
+                    'UIDVALIDITY')[1][0]
+
+            except (IndexError, TypeError):
+                # The server didn't send it. Incremental
+                # sync will fall back to date searches.
+                self._selected_uidvalidity_ = None
+
+            try:
+                self._selected_uidnext_ = int(imap_conn.response(
+                    'UIDNEXT')[1][0])
+
+            except (IndexError, TypeError, ValueError):
+                self._selected_uidnext_ = None
+
     def imap_close(self, imap_conn=None):
 
         if imap_conn is None:
@@ -324,6 +346,8 @@ class MailAccount(BaseAccount):
         imap_conn.close()
 
         self._selected_mailbox_ = None
+        self._selected_uidvalidity_ = None
+        self._selected_uidnext_ = None
 
     def imap_logout(self, imap_conn=None):
 
@@ -517,6 +541,334 @@ class MailAccount(BaseAccount):
 
                         yield email_prettify_raw_message(raw_data[1])
 
+    # ——————————————————————————————————————————————————— Incremental IMAP sync
+
+    def uid_redis_key(self, uid):
+        """ Cache key of a message, by UID in the selected mailbox.
+
+        Unlike sequence numbers, UIDs are only unique per mailbox.
+        """
+
+        return u'ma:{0}:{1}:uid:{2}'.format(self.pk,
+                                            self._selected_mailbox_, uid)
+
+    def sync_state_key(self, consumer=None):
+        """ REDIS key of the sync state of the selected mailbox.
+
+        :param consumer: something unique (eg. a feed ID) if many
+            things sync independently the same mailbox.
+        """
+
+        return u'ma:{0}:{1}:sync{2}'.format(
+            self.pk, self._selected_mailbox_,
+            u'' if consumer is None else u':{0}'.format(consumer))
+
+    def sync_last_uid(self, consumer=None):
+        """ Return the highest UID seen by :param:`consumer`, or ``None``.
+
+        ``None`` means the consumer never synced the selected mailbox,
+        or that its UIDVALIDITY changed since (or is unknown).
+        """
+
+        uidvalidity = getattr(self, '_selected_uidvalidity_', None)
+
+        if not uidvalidity:
+            return None
+
+        state = REDIS.hgetall(self.sync_state_key(consumer))
+
+        if state.get('uidvalidity') != uidvalidity:
+            return None
+
+        return int(state.get('uid', 0))
+
+    def sync_checkpoint(self, uid, consumer=None):
+        """ Return the sync state of the selected mailbox, up to :param:`uid`.
+
+        It is meant to be stored later via :meth:`store_sync_checkpoints`,
+        once the consumer is done with the messages. ``None`` if the
+        mailbox has no UIDVALIDITY (incremental sync is not possible).
+        """
+
+        uidvalidity = getattr(self, '_selected_uidvalidity_', None)
+
+        if not uidvalidity:
+            return None
+
+        return self.sync_state_key(consumer), uidvalidity, int(uid)
+
+    @staticmethod
+    def store_sync_checkpoints(checkpoints):
+        """ Store sync states from :meth:`sync_checkpoint`, in one go. """
+
+        pipeline = REDIS.pipeline(transaction=False)
+
+        for state_key, uidvalidity, uid in checkpoints:
+            pipeline.hmset(state_key, {
+                'uidvalidity': uidvalidity,
+                'uid': uid,
+            })
+
+        pipeline.execute()
+
+    def imap_search_new(self, imap_conn=None, since=None, consumer=None,
+                        last_uids=None):
+        """ Yield ``(uid, headers)`` of new messages in the selected mailbox.
+
+        The UIDVALIDITY of the mailbox and the highest UID seen are
+        stored in REDIS. Next calls only search ``UID n+1:*``. The
+        first call (or the first after a UIDVALIDITY change) falls back
+        to a ``SENTSINCE`` search, like :meth:`imap_search_since`.
+
+        Only headers are downloaded (``BODY.PEEK[HEADER]``, which doesn't
+        mark messages as seen). Use :meth:`imap_fetch_messages` to get
+        the full messages which are worth it.
+
+        The sync state is updated once all messages have been yielded.
+
+        :param last_uids: for many consumers sharing the scan, the list
+            of their :meth:`sync_last_uid`. The search starts from the
+            lowest one, and no sync state is stored: the caller filters
+            messages and checkpoints each consumer on its own.
+        """
+
+        if imap_conn is None:
+            imap_conn = self._imap_connection_
+
+        if imap_conn is None:
+            raise RuntimeError('Not connected!')
+
+        if last_uids is None:
+            last_uid = self.sync_last_uid(consumer)
+
+        elif last_uids and None not in last_uids:
+            last_uid = min(last_uids)
+
+        else:
+            last_uid = None
+
+        if last_uid is not None:
+            result, data = imap_conn.uid('search', None,
+                                         'UID', '{0}:*'.format(last_uid + 1))
+
+        elif since is None:
+            result, data = imap_conn.uid('search', None, 'ALL')
+
+        else:
+            result, data = imap_conn.uid(
+                'search', None, '(SENTSINCE {date})'.format(
+                    date=since.strftime("%d-%b-%Y")))
+
+        if result != 'OK':
+            LOGGER.error(u'IMAP %s: could not search new emails '
+                         u'in %s (%s)', self, self._selected_mailbox_, data)
+            return
+
+        # HEADS UP: “n:*” always matches the last message,
+        #           even if its UID is lower than n.
+        uids = [uid for uid in data[0].split() if int(uid) > (last_uid or 0)]
+
+        if not uids:
+            return
+
+        LOGGER.debug(u'IMAP %s: %s new email(s) in %s.', self,
+                     len(uids), self._selected_mailbox_)
+
+        for uids_chunk in list_chunks(uids, config.MAIL_IMAP_FETCH_MAX):
+
+            result, data = imap_conn.uid('fetch', ','.join(uids_chunk),
+                                         '(BODY.PEEK[HEADER])')
+
+            if result != 'OK':
+                LOGGER.error(u'IMAP %s: could not fetch headers of '
+                             u'emails %s (%s)', self, uids_chunk, data)
+                continue
+
+            for raw_data in data:
+                if not isinstance(raw_data, tuple):
+                    continue
+
+                match = IMAP_FETCH_UID_RE.search(raw_data[0])
+
+                if match is None:
+                    continue
+
+                yield match.group(1), email_prettify_raw_message(raw_data[1])
+
+        if last_uids is None:
+            checkpoint = self.sync_checkpoint(
+                max(int(uid) for uid in uids), consumer)
+
+            if checkpoint is not None:
+                self.store_sync_checkpoints([checkpoint])
+
+    def imap_fetch_messages(self, uids, imap_conn=None):
+        """ Yield ``(uid, message)`` for some UIDs of the selected mailbox.
+
+        Messages are fetched in chunks of ``MAIL_IMAP_FETCH_MAX``,
+        or from the REDIS cache if ``MAIL_IMAP_CACHE_MESSAGES``.
+        """
+
+        if imap_conn is None:
+            imap_conn = self._imap_connection_
+
+        if imap_conn is None:
+            raise RuntimeError('Not connected!')
+
+        use_cache = config.MAIL_IMAP_CACHE_MESSAGES
+        to_fetch  = []
+
+        if use_cache:
+            cache_expiry_time = config.MAIL_IMAP_CACHE_EXPIRY
+
+            for uid in uids:
+                message = REDIS.get(self.uid_redis_key(uid))
+
+                if message is None:
+                    to_fetch.append(uid)
+
+                else:
+                    yield uid, email_prettify_raw_message(message)
+
+        else:
+            to_fetch = list(uids)
+
+        for uids_chunk in list_chunks(to_fetch, config.MAIL_IMAP_FETCH_MAX):
+
+            result, data = imap_conn.uid('fetch', ','.join(uids_chunk),
+                                         '(RFC822)')
+
+            if result != 'OK':
+                LOGGER.error(u'IMAP %s: could not fetch emails '
+                             u'%s (%s)', self, uids_chunk, data)
+                continue
+
+            for raw_data in data:
+                if not isinstance(raw_data, tuple):
+                    continue
+
+                match = IMAP_FETCH_UID_RE.search(raw_data[0])
+
+                if match is None:
+                    continue
+
+                uid = match.group(1)
+
+                if use_cache:
+                    REDIS.setex(self.uid_redis_key(uid),
+                                cache_expiry_time, raw_data[1])
+
+                yield uid, email_prettify_raw_message(raw_data[1])
+
+    def imap_scan(self, matchers, since=None, consumer=None,
+                  checkpoints=None):
+        """ Yield ``(key, message, rules)`` for new messages of all mailboxes.
+
+        The account connects once and walks each mailbox once, whatever
+        the number of matchers. Headers of new messages are tested
+        against all of them, then full messages are downloaded once,
+        only for the ones which matched at least one.
+
+        :param matchers: a ``{key: matcher}`` dict. A matcher is
+            anything with a ``match(message)`` method which returns
+            a list of rules, like
+            :class:`~oneflow.core.models.reldb.feed.CompiledRules`.
+        :param since: see :meth:`imap_search_new`.
+        :param consumer: see :meth:`imap_search_new`.
+        :param checkpoints: an optional dict. When given, each matcher
+            key is a sync consumer on its own: it gets only messages
+            newer than its own checkpoint, and nothing is stored.
+            Instead, the dict is filled with ``{key: [checkpoint, …]}``
+            (one per fully scanned mailbox), for the caller to give them
+            to :meth:`store_sync_checkpoints` once the messages of
+            ``key`` are safely handled. All keys are checkpointed at the
+            highest UID of the mailbox, even when none of its messages
+            were new to them: else a key without checkpoint would make
+            every scan search the whole mailbox again.
+        """
+
+        if not matchers:
+            return
+
+        with self:
+            self.update_mailboxes()
+
+            for mailbox_name in self.mailboxes:
+
+                self.imap_select(mailbox_name=mailbox_name)
+
+                try:
+                    # {uid: [(key, matched_rules)]}
+                    matched = OrderedDict()
+                    scanned = 0
+
+                    if checkpoints is None:
+                        last_uids = None
+                        searched  = self.imap_search_new(since=since,
+                                                         consumer=consumer)
+
+                    else:
+                        # {key: last UID or None}
+                        last_uids = dict((key, self.sync_last_uid(key))
+                                         for key in matchers)
+
+                        # The highest UID of the mailbox when selected.
+                        # Messages which arrived since come from the
+                        # search, and raise it.
+                        uidnext = getattr(self, '_selected_uidnext_', None)
+                        top_uid = uidnext - 1 if uidnext else 0
+
+                        searched  = self.imap_search_new(
+                            since=since, last_uids=last_uids.values())
+
+                    for uid, headers in searched:
+
+                        scanned += 1
+
+                        if last_uids is not None:
+                            top_uid = max(top_uid, int(uid))
+
+                        for key, matcher in matchers.items():
+
+                            if last_uids is not None:
+                                last_uid = last_uids[key]
+
+                                if last_uid is not None \
+                                        and int(uid) <= last_uid:
+                                    # Already seen in a previous scan.
+                                    continue
+
+                            matched_rules = matcher.match(headers)
+
+                            if matched_rules:
+                                matched.setdefault(uid, []).append(
+                                    (key, matched_rules))
+
+                    for uid, message in self.imap_fetch_messages(
+                            matched.keys()):
+                        for key, matched_rules in matched[uid]:
+                            yield key, message, matched_rules
+
+                    if last_uids is not None:
+                        for key, last_uid in last_uids.items():
+                            if top_uid <= (last_uid or 0):
+                                continue
+
+                            checkpoint = self.sync_checkpoint(top_uid, key)
+
+                            if checkpoint is not None:
+                                checkpoints.setdefault(key, []).append(
+                                    checkpoint)
+
+                finally:
+                    self.imap_close()
+
+                LOGGER.debug(u'IMAP %s: %s/%s email(s) matched %s '
+                             u'matcher(s) in mailbox %s.', self,
+                             len(matched), scanned, len(matchers),
+                             mailbox_name)
+
+
 # ———————————————————————————————————————————————————————————————— Celery tasks
 
 register_task_method(MailAccount, MailAccount.test_connection,
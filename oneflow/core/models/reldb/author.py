@@ -22,14 +22,17 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 import logging
 
 from statsd import statsd
+from constance import config
 from json_field import JSONField
 
 # from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save  # , pre_save, pre_delete
+from django.db import models, IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete  # , pre_save
 from django.utils.translation import ugettext_lazy as _
 
 # from oneflow.base.utils import register_task_method
+from oneflow.base.utils.lru import LRUCache
 
 from common import DjangoUser as User
 from website import WebSite
@@ -42,6 +45,11 @@ __all__ = [
 ]
 
 
+# {(origin name, website ID): author ID}, in each process. Shared by
+# all the items a worker post-processes during a feed refresh.
+AUTHORS_CACHE = LRUCache(maxsize=16384)
+
+
 class Author(models.Model):
 
     """ An author, gathered from a website during crawling / indexing. """
@@ -134,107 +142,338 @@ class Author(models.Model):
     @classmethod
     def get_authors_from_feedparser_article(cls, feedparser_article,
                                             set_to_article=None):
-        """ Extract author(s) from a feedparser article. """
+        """ Extract author(s) from a feedparser article.
 
-        if set_to_article:
-            # This is an absolutized URL, hopefully.
-            article_url = set_to_article.url
+        Authors are resolved per item, by the original data
+        post-processing: it runs after the URL absolutization, and
+        authors need the absolutized website to be told apart (feed
+        URLs are often redirectors, eg. feedproxy.google.com). All the
+        names of the article are still resolved in one query.
+        """
 
-        else:
-            article_url = getattr(feedparser_article, 'link',
-                                  '').replace(' ', '%20') or None
+        return cls.get_authors_from_feedparser_articles(
+            [(set_to_article, feedparser_article)]).get(
+                set_to_article.id if set_to_article else None, [])
 
-        if article_url:
-            website = WebSite.get_from_url(article_url)
+    @classmethod
+    def get_authors_from_feedparser_articles(cls, items_articles):
+        """ Extract the authors of many feedparser articles at once.
 
-        else:
-            LOGGER.critical(u'NO url, cannot get any author.')
-            return []
+        :param items_articles: an iterable of ``(item, feedparser
+            article)`` tuples. ``item`` can be ``None``; if not, the
+            authors are set to it, and its (absolutized, hopefully)
+            URL gives the authors website instead of the article link.
 
-        # Use a set() internally to avoid duplicates (seen a lot in RSS feeds).
-        authors = set()
+        Return a ``{item ID: [authors]}`` dict; the key is ``None``
+        for articles without item.
 
-        if 'authors' in feedparser_article:
-            # 'authors' can be [{}], which is useless.
+        All ``(origin_name, website)`` pairs are resolved together by
+        :meth:`get_authors_ids`, and the missing items/authors links
+        are inserted in one query.
+        """
 
-            for author_dict in feedparser_article['authors']:
-                author = cls.get_author_from_feedparser_dict(author_dict,
-                                                             website)
+        # [(item, [(origin_name, website ID)])]
+        items_names = []
 
-                if author:
-                    if set_to_article:
-                        set_to_article.authors.add(author)
+        # {(origin_name, website ID): is_unsure}
+        wanted = {}
 
-                    authors.add(author)
+        # [(item, feedparser article, URL)]
+        items_urls = []
 
-        if 'author_detail' in feedparser_article:
-            author = cls.get_author_from_feedparser_dict(
-                feedparser_article['author_detail'], website)
+        for item, feedparser_article in items_articles:
+
+            if item is None:
+                article_url = getattr(feedparser_article, 'link',
+                                      '').replace(' ', '%20') or None
+
+            else:
+                article_url = item.url
+
+            items_urls.append((item, feedparser_article, article_url))
+
+        # Resolve all websites at once, without loading them.
+        urls_ids = WebSite.get_ids_from_urls(
+            set(article_url for item, feedparser_article, article_url
+                in items_urls if article_url))
+
+        for item, feedparser_article, article_url in items_urls:
+
+            if not article_url:
+                LOGGER.critical(u'NO url, cannot get any author.')
+                continue
+
+            website_id = urls_ids[article_url]
+
+            names = []
+
+            for origin_name, is_unsure in \
+                    cls.origin_names_from_feedparser_article(
+                        feedparser_article):
+                key = (origin_name, website_id)
+
+                if key not in names:
+                    names.append(key)
+
+                # The first found wins, as with get_or_create().
+                wanted.setdefault(key, is_unsure)
+
+            items_names.append((item, names))
+
+        if not wanted:
+            return {}
+
+        names_ids = cls.get_authors_ids(wanted)
+        authors = cls.objects.in_bulk(set(names_ids.values()))
+
+        # Authors deleted by another process (eg. merged duplicates)
+        # are still in our cache. Forget them, and resolve again.
+        stale = [name for name, author_id in names_ids.items()
+                 if author_id not in authors]
+
+        if stale:
+            for name in stale:
+                AUTHORS_CACHE.delete(name)
+
+            names_ids.update(cls.get_authors_ids(
+                dict((name, wanted[name]) for name in stale)))
+
+            authors.update(cls.objects.in_bulk(
+                set(names_ids.values()) - set(authors)))
 
-            if author:
-                if set_to_article:
-                    set_to_article.authors.add(author)
+        results = {}
+        links = []
 
-                authors.add(author)
+        for item, names in items_names:
+            # Use a set() internally to avoid duplicates
+            # (seen a lot in RSS feeds).
+            item_authors_ids = set()
+
+            for key in names:
+                author_id = names_ids.get(key)
+
+                if author_id in authors:
+                    item_authors_ids.add(author_id)
+
+            # Always return a list, else we hit
+            # http://dev.1flow.net/development/1flow-dev/group/4026/
+            results[item.id if item else None] = [
+                authors[linked_id] for linked_id in item_authors_ids]
+
+            if item is not None:
+                links.extend((item, linked_id)
+                             for linked_id in item_authors_ids)
+
+        if links:
+            cls.add_authors_to_items(links)
+
+        return results
+
+    @classmethod
+    def origin_names_from_feedparser_article(cls, feedparser_article):
+        """ Return the ``(origin_name, is_unsure)`` of a feedparser article.
+
+        Authors are found in the ``authors``, ``author_detail`` and
+        ``author`` keys, in this order.
+        """
+
+        author_dicts = []
+
+        if 'authors' in feedparser_article:
+            # 'authors' can be [{}], which is useless.
+            author_dicts.extend(feedparser_article['authors'])
+
+        if 'author_detail' in feedparser_article:
+            author_dicts.append(feedparser_article['author_detail'])
 
         if 'author' in feedparser_article:
-            author = cls.get_author_from_feedparser_dict(
-                {'name': feedparser_article['author']}, website)
+            author_dicts.append({'name': feedparser_article['author']})
 
-            if author:
-                if set_to_article:
-                    set_to_article.authors.add(author)
+        names = []
 
-                authors.add(author)
+        for author_dict in author_dicts:
+            origin_name = cls.origin_name_from_feedparser_dict(author_dict)
 
-        # Always return a list, else we hit
-        # http://dev.1flow.net/development/1flow-dev/group/4026/
-        return list(authors)
+            if origin_name is not None:
+                names.append(origin_name)
+
+        return names
 
     @classmethod
-    def get_author_from_feedparser_dict(cls, author_dict, website):
-        """ Guess and get an author from a feedparser dictionnary. """
+    def origin_name_from_feedparser_dict(cls, author_dict):
+        """ Return ``(origin_name, is_unsure)`` for a feedparser dict.
+
+        Return ``None`` if the dictionnary holds no usable name.
+        """
 
         email = author_dict.get('email', None)
 
         if email:
             # An email is less likely to have a duplicates than
             # a standard name. It takes precedence if it exists.
-
-            author, created = cls.objects.get_or_create(origin_name=email,
-                                                        website=website)
-
-            return author
+            return email, False
 
         home_page = author_dict.get('href', None)
 
         if home_page:
             # A home_page is less likely to have a duplicates than a standard
             # name too. It also takes precedence after email if it exists.
+            return home_page, True
 
-            author, created = cls.objects.get_or_create(origin_name=home_page,
-                                                        website=website)
+        origin_name = author_dict.get('name', None)
 
-            if created:
-                author.is_unsure = True
-                author.save()
+        if origin_name:
+            return origin_name, True
 
-            return author
+        return None
 
-        origin_name = author_dict.get('name', None)
+    @classmethod
+    def get_author_from_feedparser_dict(cls, author_dict, website):
+        """ Guess and get an author from a feedparser dictionnary. """
 
-        if origin_name:
+        origin_name = cls.origin_name_from_feedparser_dict(author_dict)
 
-            author, created = cls.objects.get_or_create(origin_name=origin_name,
-                                                        website=website)
+        if origin_name is None:
+            return None
 
-            if created:
-                author.is_unsure = True
-                author.save()
+        key = (origin_name[0], website.id if website else None)
 
-            return author
+        try:
+            return cls.objects.get(
+                id=cls.get_authors_ids({key: origin_name[1]})[key])
 
-        return None
+        except cls.DoesNotExist:
+            # Deleted by another process, but still in our cache.
+            AUTHORS_CACHE.delete(key)
+
+            return cls.objects.get(
+                id=cls.get_authors_ids({key: origin_name[1]})[key])
+
+    @classmethod
+    def get_authors_ids(cls, wanted):
+        """ Return ``{(origin_name, website ID): author ID}``.
+
+        :param wanted: a ``{(origin_name, website ID): is_unsure}``
+            dict. ``is_unsure`` is used only for authors created here.
+
+        Pairs are looked up in :data:`AUTHORS_CACHE` first. The missing
+        ones are fetched in one query, and the authors which don't exist
+        yet are created with one ``bulk_create()``. If another process
+        created some of them in the meantime, we fall back to creating
+        them one by one.
+        """
+
+        names_ids = {}
+        missing = set()
+
+        for key in wanted:
+            author_id = AUTHORS_CACHE.get(key)
+
+            if author_id is None:
+                missing.add(key)
+
+            else:
+                names_ids[key] = author_id
+
+        if not missing:
+            return names_ids
+
+        def fetch(keys):
+
+            by_website = {}
+
+            for origin_name, website_id in keys:
+                by_website.setdefault(website_id, []).append(origin_name)
+
+            query = Q()
+
+            for website_id, origin_names in by_website.items():
+                if website_id is None:
+                    query |= Q(website__isnull=True,
+                               origin_name__in=origin_names)
+
+                else:
+                    query |= Q(website_id=website_id,
+                               origin_name__in=origin_names)
+
+            found = {}
+
+            for author_id, origin_name, website_id in cls.objects.filter(
+                    query).values_list('id', 'origin_name', 'website_id'):
+
+                key = (origin_name, website_id)
+
+                if key in keys:
+                    found[key] = author_id
+
+            return found
+
+        found = fetch(missing)
+        to_create = missing - set(found)
+
+        if to_create:
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create([
+                        cls(origin_name=origin_name, website_id=website_id,
+                            is_unsure=wanted[(origin_name, website_id)])
+                        for origin_name, website_id in to_create
+                    ])
+
+            except IntegrityError:
+                # Another process created some of them.
+                for origin_name, website_id in to_create:
+                    cls.objects.get_or_create(
+                        origin_name=origin_name, website_id=website_id,
+                        defaults={'is_unsure': wanted[(origin_name,
+                                                       website_id)]})
+
+            else:
+                # bulk_create() doesn't send post_save.
+                statsd.gauge('authors.counts.total', len(to_create),
+                             delta=True)
+
+            found.update(fetch(to_create))
+
+        ttl = config.AUTHOR_CACHE_TTL
+
+        for key, author_id in found.items():
+            names_ids[key] = author_id
+            AUTHORS_CACHE.set(key, author_id, ttl=ttl)
+
+        return names_ids
+
+    @classmethod
+    def add_authors_to_items(cls, links):
+        """ Link authors to items, in one query.
+
+        :param links: a list of ``(item, author ID)`` tuples. Existing
+            links are skipped.
+        """
+
+        through = type(links[0][0]).authors.through
+
+        existing = set(through.objects.filter(
+            baseitem_id__in=set(item.id for item, author_id in links)
+        ).values_list('baseitem_id', 'author_id'))
+
+        to_create = set((item.id, author_id) for item, author_id in links
+                        if (item.id, author_id) not in existing)
+
+        if not to_create:
+            return
+
+        try:
+            with transaction.atomic():
+                through.objects.bulk_create([
+                    through(baseitem_id=item_id, author_id=author_id)
+                    for item_id, author_id in to_create
+                ])
+
+        except IntegrityError:
+            # Linked in the meantime; add() skips existing links.
+            for item, author_id in links:
+                item.authors.add(author_id)
 
     @classmethod
     def get_author_from_twitter_user(cls, twitter_user):
@@ -286,7 +525,7 @@ class Author(models.Model):
         #     u'verified': False
         # }
 
-        twitter_ws = WebSite.get_from_url(u'https://twitter.com')
+        twitter_ws_id = WebSite.get_id_from_url(u'https://twitter.com')
 
         username = twitter_user.get('screen_name', twitter_user['id_str'])
 
@@ -296,7 +535,7 @@ class Author(models.Model):
 
         author, created = cls.objects.get_or_create(
             origin_id=twitter_user['id'],
-            website=twitter_ws,
+            website_id=twitter_ws_id,
             defaults={
                 'name': name,
                 'username': username,
@@ -325,4 +564,10 @@ def author_post_save(instance, **kwargs):
     statsd.gauge('authors.counts.total', 1, delta=True)
 
 
+def author_post_delete(instance, **kwargs):
+
+    AUTHORS_CACHE.delete((instance.origin_name, instance.website_id))
+
+
 post_save.connect(author_post_save, sender=Author)
+post_delete.connect(author_post_delete, sender=Author)
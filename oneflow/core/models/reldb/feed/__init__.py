@@ -21,6 +21,8 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 from base import *  # NOQA
 
+from rules import *  # NOQA
+
 from rssatom import *  # NOQA
 
 from mail import *  # NOQA
@@ -28,6 +30,7 @@ from mailrule import *  # NOQA
 
 from twitter import *  # NOQA
 from twitterrule import *  # NOQA
+from twitterstream import *  # NOQA
 
 from combined import *  # NOQA
 from combinedrule import *  # NOQA
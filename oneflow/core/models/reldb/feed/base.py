@@ -20,12 +20,14 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 import six
 import json
+import itertools
 import uuid
 import logging
+import calendar
 
 from statsd import statsd
 from constance import config
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from transmeta import TransMeta
 
 from json_field import JSONField
@@ -46,7 +48,7 @@ from polymorphic import (
 from sparks.django.models.mixins import DiffMixin
 
 from oneflow.base.fields import IntRedisDescriptor, DatetimeRedisDescriptor
-from oneflow.base.utils.dateutils import now, timedelta, today
+from oneflow.base.utils.dateutils import now, timedelta, today, pytime
 
 from oneflow.base.utils import (
     register_task_method,
@@ -55,7 +57,7 @@ from oneflow.base.utils import (
 
 from ..common import (
     DjangoUser as User,
-    # REDIS,
+    REDIS,
     CONTENT_TYPES,
     ORIGINS,
     # BAD_SITE_URL_BASE,
@@ -63,7 +65,7 @@ from ..common import (
 
 from ..duplicate import AbstractDuplicateAwareModel
 from ..tag import AbstractTaggedModel
-from ..language import AbstractMultipleLanguagesModel
+from ..language import Language, AbstractMultipleLanguagesModel
 from ..item import BaseItem, Article, Tweet
 # from ..tag import SimpleTag
 
@@ -77,6 +79,8 @@ __all__ = [
     'BaseFeedManager',
     'BaseFeedQuerySet',
     'basefeed_pre_save',
+    'basefeed_refresh_schedule_post_save',
+    'basefeed_refresh_schedule_pre_delete',
 
     'basefeed_all_items_count_default',
     'basefeed_good_items_count_default',
@@ -86,6 +90,40 @@ __all__ = [
 ]
 
 
+# ————————————————————————————————————————————————————————— Refresh scheduling
+
+# A redis sorted set of active feeds IDs, scored by the UNIX timestamp
+# of their next refresh. The global refresher only pops due members.
+REFRESH_SCHEDULE_KEY = 'bf:rsch'
+
+# When popped, due feeds are pushed this many seconds in the future,
+# so that the next global rounds don't re-launch them while their
+# refresh task waits in the queue. A successful refresh reschedules
+# them for real; a crashed one makes them due again after that delay.
+REFRESH_SCHEDULE_LEASE = 2700
+
+REFRESH_SCHEDULE_POP = REDIS.register_script("""
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1],
+                       'LIMIT', 0, ARGV[2])
+
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], ARGV[3], member)
+end
+
+return due
+""")
+
+
+def refresh_due_timestamp(date_last_fetch, fetch_interval):
+    """ Return the UNIX timestamp at which a feed should be refreshed. """
+
+    if date_last_fetch is None:
+        # Never fetched: as soon as possible.
+        return 0
+
+    return calendar.timegm(date_last_fetch.utctimetuple()) + fetch_interval
+
+
 # ————————————————————————————————————————— Utils / redis descriptors functions
 
 
@@ -495,6 +533,81 @@ class BaseFeed(six.with_metaclass(BaseFeedMeta,
             )
             return self.__refresh_lock
 
+    # —————————————————————————————————————————————————————— Refresh scheduling
+
+    @classmethod
+    def rebuild_refresh_schedule(cls):
+        """ Re-create the whole refresh schedule from the database.
+
+        Needed only when the redis key vanished (first run, flushed
+        database…). In normal conditions, the schedule is maintained
+        by each feed on :meth:`save` via :meth:`schedule_refresh`.
+        """
+
+        feeds = BaseFeed.objects.filter(
+            is_active=True, is_internal=False).values_list(
+                'id', 'date_last_fetch', 'fetch_interval')
+
+        with REDIS.pipeline() as pipe:
+            pipe.delete(REFRESH_SCHEDULE_KEY)
+
+            count = 0
+
+            for feed_id, date_last_fetch, fetch_interval in feeds.iterator():
+                pipe.zadd(REFRESH_SCHEDULE_KEY,
+                          refresh_due_timestamp(date_last_fetch,
+                                                fetch_interval),
+                          feed_id)
+                count += 1
+
+            pipe.execute()
+
+        LOGGER.info(u'Rebuilt feeds refresh schedule with %s feeds.', count)
+
+        return count
+
+    @classmethod
+    def pop_refresh_due_ids(cls, limit=None, lease=None):
+        """ Return the IDs of feeds whose refresh is due, most late first.
+
+        Returned feeds are leased for :param:`lease` seconds (default:
+        ``REFRESH_SCHEDULE_LEASE``) and will not be returned again
+        until then, unless their refresh reschedules them earlier.
+        """
+
+        if not REDIS.exists(REFRESH_SCHEDULE_KEY):
+            cls.rebuild_refresh_schedule()
+
+        mynow = int(pytime.time())
+
+        return [int(feed_id) for feed_id in REFRESH_SCHEDULE_POP(
+                keys=[REFRESH_SCHEDULE_KEY],
+                args=[mynow, limit or -1,
+                      mynow + (lease or REFRESH_SCHEDULE_LEASE)])]
+
+    @classmethod
+    def unschedule_refresh_ids(cls, feeds_ids):
+        """ Remove some feeds from the refresh schedule. """
+
+        if feeds_ids:
+            REDIS.zrem(REFRESH_SCHEDULE_KEY, *feeds_ids)
+
+    def schedule_refresh(self):
+        """ Update our position in the refresh schedule.
+
+        Inactive and internal feeds are not refreshed, thus they are
+        removed from the schedule.
+        """
+
+        if self.is_active and not self.is_internal:
+            REDIS.zadd(REFRESH_SCHEDULE_KEY,
+                       refresh_due_timestamp(self.date_last_fetch,
+                                             self.fetch_interval),
+                       self.id)
+
+        else:
+            self.unschedule_refresh_ids([self.id])
+
     # —————————————————————————————————————————————————————————— Internal utils
 
     def has_option(self, option):
@@ -699,18 +812,32 @@ class BaseFeed(six.with_metaclass(BaseFeedMeta,
 
         return False
 
-    def refresh(self, force=False, commit=True):
-        """ Look for new content in a 1flow feed. """
+    def refresh(self, force=False, commit=True, locked=False, **kwargs):
+        """ Look for new content in a 1flow feed.
+
+        :param locked: set this to ``True`` if the caller already called
+            :meth:`refresh_must_abort` and thus already holds our refresh
+            lock. Used by batch refreshers that check and lock many feeds
+            before fetching them all at once.
+
+        Any other keyword argument is forwarded untouched to
+        the :meth:`refresh_feed_internal` method of the subclass.
+
+        :returns: ``True`` if new content was fetched and handled
+            without error, ``None`` otherwise (or if the subclass
+            handles its refresh on its own).
+        """
 
         # HEADS UP: refresh_must_abort() has already acquire()'d our lock.
-        if self.refresh_must_abort(force=force):
+        if not locked and self.refresh_must_abort(force=force):
             self.refresh_lock.release()
             return
 
         preventive_slow_down = False
 
         try:
-            data = self.refresh_feed_internal(force=force, commit=commit)
+            data = self.refresh_feed_internal(force=force, commit=commit,
+                                              **kwargs)
 
         except:
             LOGGER.exception(u'Could not refresh feed %s, operating '
@@ -788,6 +915,8 @@ class BaseFeed(six.with_metaclass(BaseFeedMeta,
         # terminate if called too early.
         self.refresh_lock.release()
 
+        return True
+
     def update_last_fetch(self):
         """ Allow to customize the last fetch datetime.
 
@@ -861,6 +990,18 @@ def basefeed_pre_save(instance, **kwargs):
         feed.options = json.loads(feed.options)
 
 
+def basefeed_refresh_schedule_post_save(instance, **kwargs):
+    """ Keep the refresh schedule in sync with the feed attributes. """
+
+    instance.schedule_refresh()
+
+
+def basefeed_refresh_schedule_pre_delete(instance, **kwargs):
+    """ Remove a deleted feed from the refresh schedule. """
+
+    BaseFeed.unschedule_refresh_ids([instance.id])
+
+
 def basefeed_post_save(instance, **kwargs):
     """ Do whatever useful on Feed.post_save(). """
 
@@ -900,15 +1041,28 @@ pre_save.connect(basefeed_pre_save, sender=BaseFeed)
 
 
 def basefeed_export_content_classmethod(cls, since, until=None,
-                                        folder=None, user=None):
-    """ Pull articles & feeds since :param:`param` and return them in a dict.
-
-        if a feed has no new article, it's not represented at all. The returned
-        dict is suitable to be converted to JSON.
+                                        folder=None, user=None,
+                                        cursor=None, batch_size=None):
+    """ Pull articles & feeds since :param:`param` and yield them as dicts.
+
+    If a feed has no new article, it's not represented at all. Feeds
+    are yielded in ID order; their ``articles`` entry is an iterator of
+    ``(cursor, exported_items)`` batches, to be consumed before the next
+    feed. Items are paged on ``(date_published, id)`` and the authors,
+    tags and language of a whole batch are loaded in a few queries,
+    instead of a few queries per item.
+
+    :param cursor: a cursor previously yielded with a batch. The export
+        then resumes right after this batch.
+    :param batch_size: how many items are loaded together. Defaults to
+        ``config.FEED_EXPORT_BATCH_SIZE``.
     """
 
     from twitter import TwitterFeed
 
+    if batch_size is None:
+        batch_size = config.FEED_EXPORT_BATCH_SIZE
+
     def export_folder(folder):
 
         return {
@@ -961,7 +1115,11 @@ def basefeed_export_content_classmethod(cls, since, until=None,
 
         return exported_feed
 
-    def export_one_item(item, related_to=None):
+    def export_one_item(item, related, related_to=None):
+
+        authors, tags, languages = related
+
+        language = languages.get(item.language_id)
 
         if isinstance(item, Tweet):
             return OrderedDict(
@@ -972,13 +1130,11 @@ def basefeed_export_content_classmethod(cls, since, until=None,
                 date_published=item.date_published
                 or related_to.date_published,
 
-                authors=[(a.name or a.origin_name)
-                         for a in item.authors.all()],
+                authors=authors.get(item.id, []),
                 date_updated=None,
-                language=item.language.dj_code
-                if item.language else None,
+                language=language.dj_code if language else None,
                 text_direction=item.text_direction,
-                tags=[t.name for t in item.tags.all()],
+                tags=tags.get(item.id, []),
             )
         else:
             return OrderedDict(
@@ -992,13 +1148,11 @@ def basefeed_export_content_classmethod(cls, since, until=None,
                 content_type=content_type(item.content_type),
                 date_published=item.date_published,
 
-                authors=[(a.name or a.origin_name)
-                         for a in item.authors.all()],
+                authors=authors.get(item.id, []),
                 date_updated=None,
-                language=item.language.dj_code
-                if item.language else None,
+                language=language.dj_code if language else None,
                 text_direction=item.text_direction,
-                tags=[t.name for t in item.tags.all()],
+                tags=tags.get(item.id, []),
             )
 
     def origin(origin):
@@ -1033,6 +1187,120 @@ def basefeed_export_content_classmethod(cls, since, until=None,
         if content_type == CONTENT_TYPES.BOOKMARK:
             return u'bookmark'
 
+    def items_batches(items, after=None):
+        """ Keyset pagination: no OFFSET, every page is an index scan. """
+
+        # NULL dates would break the (date_published, id) ordering.
+        items = items.filter(date_published__isnull=False).order_by(
+            'date_published', 'id')
+
+        while True:
+            if after is None:
+                page = items
+
+            else:
+                after_date, after_id = after
+                page = items.filter(
+                    Q(date_published__gt=after_date)
+                    | Q(date_published=after_date, id__gt=after_id))
+
+            batch = list(page[:batch_size])
+
+            if not batch:
+                return
+
+            yield batch
+
+            if len(batch) < batch_size:
+                return
+
+            after = (batch[-1].date_published, batch[-1].id)
+
+    def related_of_batch(batch):
+        """ Load entities, authors, tags & languages of a whole batch.
+
+        Return ``(entities, (authors, tags, languages))``, dicts keyed
+        by item ID (languages by language ID).
+        """
+
+        entities = defaultdict(list)
+
+        tweets_ids = [item.id for item in batch if isinstance(item, Tweet)]
+
+        if tweets_ids:
+            links = list(Tweet.entities.through.objects.filter(
+                tweet_id__in=tweets_ids).order_by('id').values_list(
+                    'tweet_id', 'baseitem_id'))
+
+            if links:
+                entities_items = BaseItem.objects.in_bulk(
+                    set(entity_id for tweet_id, entity_id in links))
+
+                for tweet_id, entity_id in links:
+                    try:
+                        entities[tweet_id].append(entities_items[entity_id])
+
+                    except KeyError:
+                        # Deleted between the two queries.
+                        pass
+
+        all_items = batch + [entity for tweet_entities in entities.values()
+                             for entity in tweet_entities]
+        items_ids = set(item.id for item in all_items)
+
+        authors = defaultdict(list)
+        through = BaseItem.authors.through
+
+        for item_id, name, origin_name in through.objects.filter(
+                baseitem_id__in=items_ids).order_by('id').values_list(
+                    'baseitem_id', 'author__name', 'author__origin_name'):
+            authors[item_id].append(name or origin_name)
+
+        tags = defaultdict(list)
+
+        for item_id, name in BaseItem.tags.through.objects.filter(
+                baseitem_id__in=items_ids).order_by('id').values_list(
+                    'baseitem_id', 'simpletag__name'):
+            tags[item_id].append(name)
+
+        languages = Language.objects.in_bulk(set(
+            item.language_id for item in all_items if item.language_id))
+
+        return entities, (authors, tags, languages)
+
+    def export_batches(feed, batches):
+
+        for batch in batches:
+            entities, related = related_of_batch(batch)
+
+            exported_items = []
+
+            for item in batch:
+                exported_items.append(export_one_item(item, related))
+
+                for entity in entities.get(item.id, ()):
+                    exported_items.append(export_one_item(
+                        entity, related, related_to=item))
+
+            counters['items'] += len(exported_items)
+
+            last = batch[-1]
+
+            yield (u'{0},{1},{2}'.format(feed.id, last.id,
+                                         last.date_published.isoformat()),
+                   exported_items)
+
+    after_feed_id = after = None
+
+    if cursor:
+        try:
+            after_feed_id, after_id, after_date = cursor.split(u',', 2)
+            after_feed_id = int(after_feed_id)
+            after = (after_date, int(after_id))
+
+        except ValueError:
+            raise ValueError(u'Invalid export cursor “{0}”'.format(cursor))
+
     if folder is not None and folder.is_root:
         user = folder.user
         folder = None
@@ -1040,8 +1308,6 @@ def basefeed_export_content_classmethod(cls, since, until=None,
     if folder is None:
         active_feeds = BaseFeed.objects.filter(is_active=True,
                                                is_internal=False)
-        active_feeds_count = active_feeds.count()
-
         folders = None
 
     else:
@@ -1058,7 +1324,7 @@ def basefeed_export_content_classmethod(cls, since, until=None,
 
     exported_websites = {}
     exported_feeds_count = 0
-    total_exported_items_count = 0
+    counters = {'items': 0}
 
     if active_feeds_count:
         if folders:
@@ -1073,21 +1339,26 @@ def basefeed_export_content_classmethod(cls, since, until=None,
                        u'no active feed. Is this possible?')
         return
 
-    for feed in active_feeds:
+    active_feeds = active_feeds.order_by('id')
+
+    if after_feed_id is not None:
+        active_feeds = active_feeds.filter(id__gte=after_feed_id)
 
-        related_fields = ['language', 'authors', 'tags', ]
+    if folder:
+        subscriptions = dict(
+            (subscription.feed_id, subscription) for subscription
+            in folder.user.all_subscriptions.filter(
+                feed_id__in=active_feeds.values_list('id', flat=True)
+            ).prefetch_related('tags'))
+
+    for feed in active_feeds:
 
         if isinstance(feed, TwitterFeed):
             new_items = feed.good_items.tweet()
-            related_fields.extend(['entities', 'entities__language',
-                                  'entities__authors', 'entities__tags', ])
 
         else:
             new_items = feed.good_items
 
-        # LOGGER.debug(u'Feed export: selected %s new items in feed %s.',
-        #              new_items.count(), feed)
-
         if since:
             new_items = new_items.filter(
                 date_published__gte=since)
@@ -1096,26 +1367,15 @@ def basefeed_export_content_classmethod(cls, since, until=None,
             new_items = new_items.filter(
                 date_published__lt=until)
 
-        new_items.prefetch_related(*related_fields)
+        batches = items_batches(new_items,
+                                after if feed.id == after_feed_id else None)
 
-        new_items_count = new_items.count()
+        try:
+            first_batch = next(batches)
 
-        if not new_items_count:
+        except StopIteration:
             continue
 
-        exported_items = []
-
-        for item in new_items.iterator():
-            exported_items.append(export_one_item(item))
-
-            if hasattr(item, 'entities'):
-                for entity in item.entities.all().iterator():
-                    exported_items.append(export_one_item(entity,
-                                                          related_to=item))
-
-        exported_items_count = len(exported_items)
-        total_exported_items_count += exported_items_count
-
         try:
             website = feed.website
 
@@ -1139,11 +1399,13 @@ def basefeed_export_content_classmethod(cls, since, until=None,
 
                 exported_websites[website.url] = exported_website
 
-        if folder:
-            subscription = feed.subscriptions.get(user=folder.user)
+        exported_items = export_batches(
+            feed, itertools.chain((first_batch, ), batches))
 
-            exported_feed = export_one_feed(feed, exported_items,
-                                            subscription=subscription)
+        if folder:
+            exported_feed = export_one_feed(
+                feed, exported_items,
+                subscription=subscriptions.get(feed.id))
 
         else:
             exported_feed = export_one_feed(feed, exported_items,
@@ -1156,13 +1418,8 @@ def basefeed_export_content_classmethod(cls, since, until=None,
 
         exported_feeds_count += 1
 
-        LOGGER.info(u'%s items exported in feed %s.',
-                    exported_items_count, feed)
-
     LOGGER.info(u'%s feeds and %s total items exported.',
-                exported_feeds_count, total_exported_items_count)
-
-    # return exported_feeds
+                exported_feeds_count, counters['items'])
 
 setattr(BaseFeed, 'export_content',
         classmethod(basefeed_export_content_classmethod))
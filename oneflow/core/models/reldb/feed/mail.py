@@ -21,6 +21,7 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 import json
 import logging
 
+from celery import task
 from statsd import statsd
 from constance import config
 
@@ -30,6 +31,8 @@ from django.db.models.signals import pre_save, post_save, pre_delete
 from django.utils.translation import ugettext_lazy as _
 # from django.utils.text import slugify
 
+from oneflow.base.utils.dateutils import benchmark
+
 from ..account import MailAccount
 
 from base import (
@@ -37,8 +40,11 @@ from base import (
     BaseFeedManager,
     BaseFeed,
     basefeed_pre_save,
+    basefeed_refresh_schedule_post_save,
+    basefeed_refresh_schedule_pre_delete,
 )
 
+from rules import CompiledRules, mail_message_values
 from common import (
     MAIL_MATCH_ACTIONS,
     MAIL_FINISH_ACTIONS,
@@ -153,6 +159,14 @@ class MailFeed(BaseFeed):
 
     # ——————————————————————————————————————————————————————————————— Internals
 
+    def compile_rules(self):
+        """ Return our valid rules, as a :class:`CompiledRules`. """
+
+        return CompiledRules(
+            self.rules.filter(is_valid=True).order_by('group', 'position'),
+            self.rules_operation == MAIL_RULES_OPERATIONS.ANY,
+            mail_message_values)
+
     def build_refresh_kwargs(self):
         """ Return a kwargs suitable for Email feed refreshing method. """
 
@@ -181,18 +195,25 @@ class MailFeed(BaseFeed):
 
         return False
 
-    def refresh_feed_internal(self, verbose=True, force=False, commit=True):
-        """ Refresh a mail feed. """
+    def refresh_feed_internal(self, verbose=True, force=False, commit=True,
+                              prefetched=None):
+        """ Refresh a mail feed.
+
+        :param prefetched: a list of entries already matched for us
+            by :func:`refresh_mailfeeds_pool`. When ``None``, our
+            accounts are scanned here by :meth:`get_new_entries`.
+        """
 
         LOGGER.info(u'Refreshing mail feed %s…', self)
 
-        feed_kwargs = self.build_refresh_kwargs()
+        if prefetched is None:
+            prefetched = self.get_new_entries(**self.build_refresh_kwargs())
 
         new_emails = 0
         duplicates = 0
         mutualized = 0
 
-        for email in self.get_new_entries(**feed_kwargs):
+        for email in prefetched:
             created = self.process_email(email)
 
             if created:
@@ -209,154 +230,215 @@ class MailFeed(BaseFeed):
 
         return new_emails, duplicates, mutualized
 
-    def get_new_entries(self, **kwargs):
-        """ Return new mails from the current feed. """
-
-        def prepare_message(message, rules):
-
-            # if __debug__:
-            #     LOGGER.debug(u'>>> MATCH #%s FOUND '
-            #                  u'by rule #%s:\n'
-            #                  u'   Subject: %s\n'
-            #                  u'      From: %s\n'
-            #                  u'      Date: %s\n'
-            #                  u'      Body: %s…\n'
-            #                  u'  %s\n',
-            #                  mailbox_matched + 1,
-            #                  rule.pk,
-            #                  message.get('subject'),
-            #                  message.get('from'),
-            #                  message.get('date'),
-            #                  email_get_first_text_block(
-            #                      message).strip().replace(
-            #                      '\r', '').replace(
-            #                      '\n', ' ')[:80],
-            #                  rule)
-
-            return {
-                'email': message,
-                'date': message.get('date', None),
-                'meta': {
-                    'processing': self.match_action,
-                    # (rule.match_action or self.match_action)
-                    'matched_rules': json.dumps([r.repr_for_json()
-                                                for r in rules]),
-                }
+    def get_accounts(self, usable_accounts=None):
+        """ Return the usable mail accounts our rules apply to.
+
+        :param usable_accounts: the usable mail accounts of our user,
+            if the caller already has them.
+        """
+
+        if usable_accounts is None:
+            usable_accounts = self.user.accounts.mail().usable()
+
+        accounts_ids = set(account.id for account in self.account.all())
+
+        if not accounts_ids:
+            # No account selected means all of them.
+            return list(usable_accounts)
+
+        return [account for account in usable_accounts
+                if account.id in accounts_ids]
+
+    def prepare_entry(self, message, rules):
+        """ Wrap a matched message for :meth:`process_email`. """
+
+        # if __debug__:
+        #     LOGGER.debug(u'>>> MATCH FOUND by rules %s:\n'
+        #                  u'   Subject: %s\n'
+        #                  u'      From: %s\n'
+        #                  u'      Date: %s\n'
+        #                  u'      Body: %s…\n',
+        #                  rules,
+        #                  message.get('subject'),
+        #                  message.get('from'),
+        #                  message.get('date'),
+        #                  email_get_first_text_block(
+        #                      message).strip().replace(
+        #                      '\r', '').replace(
+        #                      '\n', ' ')[:80])
+
+        return {
+            'email': message,
+            'date': message.get('date', None),
+            'meta': {
+                'processing': self.match_action,
+                # (rule.match_action or self.match_action)
+                'matched_rules': json.dumps([r.repr_for_json()
+                                            for r in rules]),
             }
+        }
 
-        since = kwargs.get('since')
+    def get_new_entries(self, **kwargs):
+        """ Return new mails from the current feed.
 
-        # Freeze the QuerySet as tuple() for current run.
-        # This avoids having a moving set of rules for each account.
-        feed_rules = tuple(
-            self.rules.filter(is_valid=True).order_by('group', 'position')
-        )
+        .. note:: this scans our accounts for us only. In normal
+            operations, :func:`refresh_mailfeeds_pool` scans each
+            account once for all the feeds of its owner.
+        """
 
-        usable_accounts = self.user.accounts.mail().usable()
+        since = kwargs.get('since')
 
-        rules_operation_any = self.rules_operation == MAIL_RULES_OPERATIONS.ANY
+        # Compile the rules once for current run. This avoids having
+        # a moving set of rules for each account, and any database
+        # query while matching messages.
+        matchers = {self.id: self.compile_rules()}
 
-        total_matched   = 0
-        total_unmatched = 0
+        total_matched = 0
 
-        for account in usable_accounts:
+        for account in self.get_accounts():
 
-            with account:
-                account.update_mailboxes()
+            account_matched = 0
+
+            for key, message, rules in account.imap_scan(matchers, since=since,
+                                                         consumer=self.id):
+                account_matched += 1
+                yield self.prepare_entry(message, rules)
 
                 #
-                # TODO: implement feed.account.mailboxes specific usage here
+                # TODO: implement final action
+                #       via generator send back.
                 #
 
-                account_matched   = 0
-                account_unmatched = 0
+            total_matched += account_matched
+
+            LOGGER.info(u'Mailfeed %s: %s email(s) matched in %s',
+                        self.name, account_matched, account)
+
+        LOGGER.info(u'Mailfeed %s: %s email(s) matched in all accounts.',
+                    self.name, total_matched)
 
-                for mailbox_name in account.mailboxes:
 
-                    account.imap_select(mailbox_name=mailbox_name)
+# ———————————————————————————————————————————————————————————————— Celery tasks
 
-                    mailbox_matched   = 0
-                    mailbox_unmatched = 0
 
-                    for message in account.imap_search_since(since=since):
+@task(queue='refresh')
+def refresh_mailfeeds_pool(feeds_ids, force=False):
+    """ Refresh many mail feeds, scanning each mail account only once.
 
-                        matched = False
-                        seen_groups = []
+    The due feeds bring along the other active mail feeds of their
+    owners: their rules are matched during the same scan, which costs
+    nothing more, and this aligns their refresh schedules over time.
+    IMAP load thus grows with the number of accounts, not with the
+    number of feeds × accounts.
+    """
+
+    if config.FEED_FETCH_DISABLED or config.FEED_FETCH_EMAIL_DISABLED:
+        LOGGER.info(u'Email feeds pooled refresh disabled by dynamic '
+                    u'configuration.')
+        return
 
-                        for rule in feed_rules:
+    feeds_ids = set(feeds_ids)
+    feeds     = {}
 
-                            if rule.group:
-                                if rule.group in seen_groups:
-                                    # The rule will return the match
-                                    # result for its whole group. No
-                                    # need to try others of the same.
-                                    continue
+    users_ids = MailFeed.objects.filter(
+        id__in=feeds_ids).values_list('user_id', flat=True).distinct()
 
-                                else:
-                                    seen_groups.append(rule.group)
+    for feed in MailFeed.objects.filter(
+            user_id__in=list(users_ids), is_active=True,
+            is_internal=False).prefetch_related('account'):
 
-                            if rule.match_message(message):
+        if feed.id in feeds_ids:
+            # HEADS UP: refresh_must_abort() acquire()s the feed lock.
+            if feed.refresh_must_abort(force=force):
+                feed.refresh_lock.release()
+                continue
+
+        elif not feed.refresh_lock.acquire():
+            # A companion feed already beiing refreshed.
+            continue
+
+        feeds[feed.id] = feed
+
+    if not feeds:
+        return
 
-                                if rules_operation_any:
+    # {account_id: (account, {feed_id: compiled_rules}, [dates])}
+    accounts = {}
+    matchers = {}
 
-                                    yield prepare_message(message, [rule])
-                                    matched = True
-                                    break
+    for user_id in set(feed.user_id for feed in feeds.values()):
+        usable_accounts = list(
+            MailAccount.objects.usable().filter(user_id=user_id))
 
-                                else:
-                                    matched = True
-                                    # but continue, we need to match all
+        for feed in feeds.values():
+            if feed.user_id != user_id:
+                continue
 
-                            else:
-                                if rules_operation_any:
-                                    # nothing to do, next
-                                    # rule will perhaps match.
-                                    pass
+            matchers[feed.id] = feed.compile_rules()
 
-                                else:
-                                    # One rule/group of a “AND” set()
-                                    # didn't match. Don't bother trying
-                                    # others, it's dead pal.
-                                    matched = False
-                                    break
+            for account in feed.get_accounts(usable_accounts):
+                account_data = accounts.setdefault(
+                    account.id, (account, {}, []))
 
-                        if matched:
-                            mailbox_matched += 1
-                            if not rules_operation_any:
-                                yield prepare_message(message, feed_rules)
+                account_data[1][feed.id] = matchers[feed.id]
+                account_data[2].append(feed.date_last_fetch)
 
-                            #
-                            # TODO: implement final action
-                            #       via generator send back.
-                            #
+    entries = dict((feed_id, []) for feed_id in feeds)
 
-                        else:
-                            mailbox_unmatched += 1
+    # {feed_id: [checkpoint, …]}, each feed has its own UID checkpoint
+    # in each mailbox, advanced only once its refresh succeeded.
+    checkpoints = {}
 
-                    account_matched   += mailbox_matched
-                    account_unmatched += mailbox_unmatched
+    # Feeds of accounts which could not be scanned. An empty refresh
+    # would advance their date_last_fetch, which is the search window
+    # of feeds without UID checkpoint: their messages would be lost.
+    failed = {}
 
-                    account.imap_close()
+    with benchmark(u'Pooled refresh of {0} mail feeds on {1} '
+                   u'accounts'.format(len(feeds), len(accounts))):
 
-                    LOGGER.debug(u'Mailfeed %s: %s/%s email(s) matched in '
-                                 u'mailbox %s of %s', self.name,
-                                 mailbox_matched,
-                                 mailbox_matched + mailbox_unmatched,
-                                 mailbox_name, account)
+        for account, account_matchers, dates in accounts.values():
 
-                # end with account
+            # The oldest wins; this only matters without UID checkpoint.
+            since = None if None in dates else min(dates)
 
-            total_matched   += account_matched
-            total_unmatched += account_unmatched
+            try:
+                for feed_id, message, rules in account.imap_scan(
+                        account_matchers, since=since,
+                        checkpoints=checkpoints):
+                    entries[feed_id].append(
+                        feeds[feed_id].prepare_entry(message, rules))
 
-            LOGGER.info(u'Mailfeed %s: %s/%s email(s) matched in %s',
-                        self.name, account_matched,
-                        account_matched + account_unmatched,
-                        account)
+            except Exception as e:
+                LOGGER.exception(u'Pooled scan of mail account %s failed.',
+                                 account)
 
-        LOGGER.info(u'Mailfeed %s: %s/%s email(s) matched in all accounts.',
-                    self.name, total_matched,
-                    total_matched + total_unmatched)
+                for feed_id in account_matchers:
+                    failed.setdefault(feed_id, []).append(
+                        u'{0}: {1}'.format(account, e))
+
+        for feed_id, feed in feeds.items():
+            if feed_id in failed:
+                try:
+                    feed.error(u'Could not scan mail account(s) ({0})'.format(
+                               u', '.join(failed[feed_id])))
+
+                finally:
+                    feed.refresh_lock.release()
+
+                continue
+
+            try:
+                refreshed = feed.refresh(force=force, locked=True,
+                                         prefetched=entries[feed_id])
+
+            except:
+                LOGGER.exception(u'Pooled refresh of feed %s failed.', feed)
+                feed.refresh_lock.release()
+
+            else:
+                if refreshed and feed_id in checkpoints:
+                    MailAccount.store_sync_checkpoints(checkpoints[feed_id])
 
 
 # ————————————————————————————————————————————————————————————————————— Signals
@@ -409,3 +491,6 @@ pre_save.connect(basefeed_pre_save, sender=MailFeed)
 pre_save.connect(mailfeed_pre_save, sender=MailFeed)
 post_save.connect(mailfeed_post_save, sender=MailFeed)
 pre_delete.connect(mailfeed_pre_delete, sender=MailFeed)
+
+post_save.connect(basefeed_refresh_schedule_post_save, sender=MailFeed)
+pre_delete.connect(basefeed_refresh_schedule_pre_delete, sender=MailFeed)
@@ -20,7 +20,6 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 import re
 import logging
-import operator
 
 from positions import PositionField
 
@@ -36,12 +35,11 @@ from django.utils.translation import ugettext_lazy as _
 
 from sparks.django.models.mixins import ModelDiffMixin
 
-from ..account.common import OTHER_VALID_HEADERS_lower, BASE_HEADERS
+from ..account.common import OTHER_VALID_HEADERS_lower
 
 from mail import MailFeed
+from rules import CompiledRules, mail_message_values
 from common import (
-    RULES_OPERATIONS,
-
     MAIL_MATCH_TYPES,
     MAIL_HEADER_FIELDS,
     MAIL_RULES_OPERATIONS,
@@ -149,70 +147,6 @@ class MailFeedRule(ModelDiffMixin):
 
     check_error = models.CharField(max_length=255, null=True, blank=True)
 
-    # —————————————————————————————————————————————————————————————— Properties
-
-    @property
-    def operation(self):
-        """ Return a Python function doing the operation of the rule.
-
-        Cache it in an attribute to avoid redoing all the work each time
-        this property is called, because in many cases the rule will be
-        called more than once (on multiple messages of multiple mailboxes).
-        """
-
-        try:
-            return self._operation_
-
-        except AttributeError:
-
-            def mymethodcaller(name):
-                def caller(a, b):
-                    return getattr(a, name)(b)
-
-                return caller
-
-            def ncontains(a, b):
-                return not operator.contains(a, b)
-
-            def nstarts(a, b):
-                return not a.startswith(b)
-
-            def nends(a, b):
-                return not a.endswith(b)
-
-            if self.match_type in (MAIL_MATCH_TYPES.RE_MATCH,
-                                   MAIL_MATCH_TYPES.NRE_MATCH):
-                # The .lower() should work also with the RE. It
-                # should even be faster than a standard /I match().
-                compiled_re = re.compile(self.match_value
-                                         if self.match_case
-                                         else self.match_value.lower())
-
-            def re_match(a, b):
-                """ :param:`b` is ignored, it's here for call compat only. """
-
-                return bool(compiled_re.match(a))
-
-            def nre_match(a, b):
-                return not re_match(a, b)
-
-            OPERATIONS = {
-                MAIL_MATCH_TYPES.CONTAINS: operator.contains,
-                MAIL_MATCH_TYPES.NCONTAINS: ncontains,
-                MAIL_MATCH_TYPES.STARTS: mymethodcaller('startswith'),
-                MAIL_MATCH_TYPES.NSTARTS: nstarts,
-                MAIL_MATCH_TYPES.ENDS: mymethodcaller('endswith'),
-                MAIL_MATCH_TYPES.NENDS: nends,
-                MAIL_MATCH_TYPES.EQUALS: operator.eq,
-                MAIL_MATCH_TYPES.NEQUALS: operator.ne,
-                MAIL_MATCH_TYPES.RE_MATCH: re.match,
-                MAIL_MATCH_TYPES.NRE_MATCH: nre_match,
-            }
-
-            self._operation_ = OPERATIONS[self.match_type]
-
-            return self._operation_
-
     # —————————————————————————————————————————————————————————————————— Django
 
     def __unicode__(self):
@@ -303,97 +237,26 @@ class MailFeedRule(ModelDiffMixin):
                 self.save()
 
     def match_message(self, message):
-        """ True if :param:`message` matches the current rule or its group. """
-
-        if self.group:
-            return self.match_message_in_group(message)
-
-        else:
-            return self.match_message_individual(message)
+        """ True if :param:`message` matches the current rule or its group.
 
-    def match_message_in_group(self, message):
-        """ Return True if our rule group says so. """
-
-        operation_any = self.group_operation == RULES_OPERATIONS.ANY
-        operation_all = not operation_any
-
-        rules_group = self.mailfeed.rules.filter(group=self.group)
+        .. note:: to match many messages against all the rules of a
+            feed, prefer the feed ``compile_rules()`` method.
+        """
 
-        for rule in rules_group:
+        try:
+            compiled_rules = self._compiled_rules_
 
-            if rule.match_message_individual(message):
-                if operation_any:
-                    # First match makes the group be true.
-                    return True
+        except AttributeError:
+            if self.group:
+                # Only one query for all messages.
+                rules = self.mailfeed.rules.filter(
+                    group=self.group).order_by('position')
 
             else:
-                if operation_all:
-                    # First non-match kills the group.
-                    return False
-
-        # OK, this is kind of a nice shortcut.
-        return operation_all
-
-    def match_message_individual(self, message):
-        """ Test message against the current rule, member of a group or not. """
-
-        def match_header(header, value):
-            if not self.match_case:
-                header = header.lower()
-
-            return self.operation(header, value)
-
-        HEADERS = BASE_HEADERS.copy()
-        HEADERS[u'other'] = self.other_header
-
-        #
-        # TODO: implement body searching.
-        #
+                rules = [self]
 
-        if self.match_case:
-            value = self.match_value
-
-        else:
-            # HEADS UP: we don't care for the RE; the
-            # second parameter in that case is ignored.
-            value = self.match_value.lower()
-
-        for header_name in HEADERS[self.header_field]:
-            header = message.get(header_name, u'')
-
-            if isinstance(header, list) or isinstance(header, tuple):
-                if len(header) > 2:
-                    for header_part in header:
-                        if isinstance(header, list) \
-                                or isinstance(header, tuple):
-                            header = u'{0} {1}'.format(*header_part)
-
-                            if match_header(header, value):
-                                return True
-
-                        else:
-                            if match_header(header_part, value):
-                                return True
-
-                else:
-                    if header[1].startswith(u'<'):
-                        # Here we've got [u'Olivier Cortès', '<oc@1flow.io>']
-                        # it's the same person; one test.
-
-                        header = u'{0} {1}'.format(*header)
-
-                        if match_header(header, value):
-                            return True
-
-                    else:
-                        # There we've got [u'Toto <n@t.com>', u'Tutu <m@t.com>']
-                        # They are 2 different persons and 2 tests.
-
-                        for header_part in header:
-                            if match_header(header_part, value):
-                                return True
-            else:
-                if match_header(header, value):
-                    return True
+            # A single unit, which applies our group operation.
+            compiled_rules = self._compiled_rules_ = CompiledRules(
+                rules, True, mail_message_values)
 
-        return False
+        return bool(compiled_rules.match(message))
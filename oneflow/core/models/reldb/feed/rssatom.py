@@ -19,6 +19,8 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 """
 import logging
+import hashlib
+import calendar
 import requests
 import newspaper
 import feedparser
@@ -28,6 +30,7 @@ from statsd import statsd
 from constance import config
 
 from xml.sax import SAXParseException
+from email.utils import formatdate
 
 from django.conf import settings
 from django.db import models  # , IntegrityError
@@ -35,14 +38,19 @@ from django.db.models.signals import pre_save, post_save, pre_delete
 from django.utils.translation import ugettext_lazy as _
 from django.core.validators import URLValidator
 
+from oneflow.base.fields import TextRedisDescriptor
 from oneflow.base.utils import HttpResponseLogProcessor
 from oneflow.base.utils.http import clean_url
+from oneflow.base.utils.fetchpool import HttpFetchPool
+from oneflow.base.utils.packed import pack_mapping
 from oneflow.base.utils.dateutils import (
     datetime_extended_parser,
     datetime_from_feedparser_entry,
+    benchmark,
 )
 
 from ..common import (
+    REDIS,
     FeedIsHtmlPageException,
     FeedFetchException,
     # CONTENT_TYPES,
@@ -53,7 +61,7 @@ from ..common import (
 )
 
 from ..website import WebSite
-from ..item import Article
+from ..item import Article, ArticlesBatchException
 from ..tag import SimpleTag
 
 from common import throttle_fetch_interval
@@ -63,6 +71,8 @@ from base import (
     BaseFeedManager,
     BaseFeed,
     basefeed_pre_save,
+    basefeed_refresh_schedule_post_save,
+    basefeed_refresh_schedule_pre_delete,
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -73,6 +83,8 @@ __all__ = [
     'prepare_feed_url',
     'parse_feeds_urls',
     'discover_feeds_urls',
+    'refresh_rssatom_feeds_pool',
+    'feed_entry_fingerprint',
 ]
 
 # —————————————————————————————————————————————— External modules configuration
@@ -81,6 +93,9 @@ __all__ = [
 feedparser.registerDateHandler(datetime_extended_parser)
 feedparser.USER_AGENT = settings.DEFAULT_USER_AGENT
 
+# Statuses on which we stop before even looking at the feed content.
+FEED_HTTP_ERRORS = (400, 401, 402, 403, 404, 500, 502, 503)
+
 
 def check_feedparser_error(parsed_feed, feed=None):
     """ Check for harmless or harmfull feedparser errors. """
@@ -132,6 +147,20 @@ def check_feedparser_error(parsed_feed, feed=None):
             u'Final feed page is advertised as non-XML.')
 
 
+def feed_entry_fingerprint(entry):
+    """ Identify a feedparser entry and its version, whatever the format.
+
+    The GUID (or link) says which entry it is, the updated (or published)
+    date which version of it. Entries without any date get only one.
+    """
+
+    key = entry.get('id') or entry.get('link') or entry.get('title') or u''
+    version = entry.get('updated') or entry.get('published') or u''
+
+    return hashlib.sha1(u'{0}|{1}'.format(key, version).encode('utf-8')
+                        ).hexdigest()[:16]
+
+
 def prepare_feed_url(feed_url):
     """ Try to validate an URL as much as possible. """
 
@@ -204,7 +233,7 @@ def create_feeds_from_url(feed_url, creator=None, recurse=True):
 
     # Stop on HTTP errors before stopping on feedparser errors,
     # because he is much more lenient in many conditions.
-    if feed_status in (400, 401, 402, 403, 404, 500, 502, 503):
+    if feed_status in FEED_HTTP_ERRORS:
         raise FeedFetchException(u'Error {0} when fetching feed {1}'.format(
             feed_status, feed_url))
 
@@ -250,8 +279,8 @@ def create_feeds_from_url(feed_url, creator=None, recurse=True):
     else:
         # Wow. FeedParser creates a <anything>.feed . Impressive.
         fp_feed = parsed_feed.feed
-        website = WebSite.get_from_url(clean_url(
-                                       fp_feed.get('link', feed_url)))
+        website_id = WebSite.get_id_from_url(clean_url(
+                                             fp_feed.get('link', feed_url)))
 
         defaults = {
             'name': fp_feed.get('title', u'Feed from {0}'.format(feed_url)),
@@ -260,7 +289,7 @@ def create_feeds_from_url(feed_url, creator=None, recurse=True):
             'description_en': fp_feed.get(
                 'description',
                 fp_feed.get('subtitle', u'')),
-            'website': website
+            'website_id': website_id
         }
 
         new_feed, created = RssAtomFeed.objects.get_or_create(
@@ -371,6 +400,13 @@ class RssAtomFeed(BaseFeed):
                                       max_length=64, null=True,
                                       blank=True)
 
+    # For feeds which send neither ETag nor Last-Modified: the SHA1 of
+    # the last raw document, and REDIS_SEEN_ENTRIES_KEY for its entries.
+    last_fingerprint = TextRedisDescriptor(attr_name='raf.l_fp',
+                                           default=None)
+
+    REDIS_SEEN_ENTRIES_KEY = 'raf:{0}:seen'
+
     # —————————————————————————————————————————————————————— Django & Grappelli
 
     @staticmethod
@@ -408,7 +444,42 @@ class RssAtomFeed(BaseFeed):
                                        mutualized,
                                        duplicates,
                                        bool(self.last_etag
-                                            or self.last_modified))
+                                            or self.last_modified
+                                            or self.last_fingerprint))
+
+    def filter_seen_entries(self, entries):
+        """ Return ``(entries not seen at last refresh, fingerprints)``.
+
+        ``fingerprints`` are the ones of all :param:`entries`, to be
+        given to :meth:`remember_seen_entries` once they are processed.
+        """
+
+        fingerprints = [feed_entry_fingerprint(entry) for entry in entries]
+
+        if not fingerprints:
+            return [], fingerprints
+
+        seen = REDIS.smembers(self.REDIS_SEEN_ENTRIES_KEY.format(self.id))
+
+        return [entry for entry, fingerprint in zip(entries, fingerprints)
+                if fingerprint not in seen], fingerprints
+
+    def remember_seen_entries(self, fingerprints):
+        """ Replace the seen entries by the ones of the current document.
+
+        Feeds only hold their latest entries, thus the index stays small.
+        """
+
+        key = self.REDIS_SEEN_ENTRIES_KEY.format(self.id)
+
+        with REDIS.pipeline() as pipe:
+            pipe.delete(key)
+
+            if fingerprints:
+                pipe.sadd(key, *fingerprints)
+                pipe.expire(key, config.FEED_FETCH_MAX_INTERVAL * 2)
+
+            pipe.execute()
 
     # —————————————————————————————————————————————————————— High-level methods
 
@@ -447,42 +518,127 @@ class RssAtomFeed(BaseFeed):
 
         return kwargs, http_logger
 
-    def refresh_feed_internal(self, force=False, commit=True):
-        """ Refresh an RSS feed. """
+    def build_refresh_headers(self):
+        """ Return HTTP headers suitable for a pooled feed download.
+
+        This is the :mod:`requests` equivalent of what
+        :meth:`build_refresh_kwargs` gives to :func:`feedparser.parse`.
+        """
+
+        headers = {'Accept': feedparser.ACCEPT_HEADER}
+
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+
+        else:
+            modified = self.latest_item_date_published
+
+            if modified is not None:
+                headers['If-Modified-Since'] = formatdate(
+                    calendar.timegm(modified.utctimetuple()), usegmt=True)
+
+        if self.last_etag:
+            headers['If-None-Match'] = self.last_etag
+
+        if self.website:
+            headers['Referer'] = self.website.url
+
+        return headers
+
+    def parse_prefetched(self, prefetched):
+        """ Feed the raw bytes of a pooled download to feedparser.
+
+        :param prefetched: a :class:`FetchResult` from the fetch pool.
+        """
+
+        # requests already un-gzipped the content;
+        # feedparser must not try to do it again.
+        response_headers = dict((k, v)
+                                for k, v in prefetched.headers.items()
+                                if k != 'content-encoding')
+
+        # Feedparser will pick etag and last-modified in the headers.
+        parsed_feed = feedparser.parse(prefetched.content,
+                                       response_headers=response_headers)
+
+        parsed_feed['href'] = prefetched.final_url
+        parsed_feed['status'] = prefetched.status
+
+        return parsed_feed
+
+    def refresh_feed_internal(self, force=False, commit=True,
+                              prefetched=None):
+        """ Refresh an RSS feed.
+
+        :param prefetched: an already downloaded feed content, as
+            given by :func:`refresh_rssatom_feeds_pool`. When ``None``,
+            the feed is downloaded here by :func:`feedparser.parse`.
+        """
 
         LOGGER.info(u'%s %s: refreshing now…',
                     self._meta.verbose_name, self.id)
 
-        feedparser_kwargs, http_logger = self.build_refresh_kwargs()
-        parsed_feed = feedparser.parse(self.url, **feedparser_kwargs)
+        if prefetched is None:
+            feedparser_kwargs, http_logger = self.build_refresh_kwargs()
+            parsed_feed = feedparser.parse(self.url, **feedparser_kwargs)
 
-        # In case of a redirection, just check the last hop HTTP status.
-        try:
-            feed_status = http_logger.log[-1]['status']
+            # In case of a redirection, just check the last hop HTTP status.
+            try:
+                feed_status = http_logger.log[-1]['status']
+                feed_url    = http_logger.log[-1]['url']
 
-        except IndexError as e:
-            # The website could not be reached? Network
-            # unavailable? on my production server???
+            except IndexError as e:
+                # The website could not be reached? Network
+                # unavailable? on my production server???
 
-            self.error(u'Could not refresh RSS/Atom feed ({0})'.format(
-                       parsed_feed.get('bozo_exception', u'IndexError')),
-                       last_fetch=True, commit=commit)
-            return
+                self.error(u'Could not refresh RSS/Atom feed ({0})'.format(
+                           parsed_feed.get('bozo_exception', u'IndexError')),
+                           last_fetch=True, commit=commit)
+                return
+
+        else:
+            if prefetched.error is not None:
+                self.error(u'Could not refresh RSS/Atom feed ({0})'.format(
+                           prefetched.error), last_fetch=True, commit=commit)
+                return
+
+            feed_status = prefetched.status
+            feed_url    = prefetched.final_url
+            parsed_feed = None
 
         # Stop on HTTP errors before stopping on feedparser errors,
         # because he is much more lenient in many conditions.
-        if feed_status in (400, 401, 402, 403, 404, 500, 502, 503):
-            self.error(u'HTTP %s on %s' % (http_logger.log[-1]['status'],
-                       http_logger.log[-1]['url']),
+        if feed_status in FEED_HTTP_ERRORS:
+            self.error(u'HTTP %s on %s' % (feed_status, feed_url),
                        last_fetch=True, commit=commit)
             return
 
-        try:
-            check_feedparser_error(parsed_feed, self)
+        content_fingerprint = None
 
-        except Exception as e:
-            self.close(reason=unicode(e), commit=commit)
-            return
+        # Only pooled downloads are hashed: feedparser.parse() downloads
+        # and parses in one go, without giving back the raw document.
+        # Once parsed, there is nothing left to save by skipping it; the
+        # ETag/Last-Modified headers and the seen entries do the rest.
+        if parsed_feed is None and feed_status != 304:
+            content_fingerprint = hashlib.sha1(
+                prefetched.content or '').hexdigest()
+
+            if not force and content_fingerprint == self.last_fingerprint:
+                # Same as a 304, for feeds without ETag nor Last-Modified.
+                LOGGER.info(u'%s %s: no new content (same fingerprint).',
+                            self._meta.verbose_name, self.id)
+
+                return 0, 0, 0
+
+            parsed_feed = self.parse_prefetched(prefetched)
+
+        if parsed_feed is not None:
+            try:
+                check_feedparser_error(parsed_feed, self)
+
+            except Exception as e:
+                self.close(reason=unicode(e), commit=commit)
+                return
 
         new_articles  = 0
         duplicates    = 0
@@ -512,30 +668,58 @@ class RssAtomFeed(BaseFeed):
                         self._meta.verbose_name,
                         self.id, self_tags, tags)
 
-        for article in parsed_feed.entries:
-            created = self.create_article_from_feedparser(article, tags)
+        entries, fingerprints = self.filter_seen_entries(parsed_feed.entries)
 
-            if created:
-                new_articles += 1
+        if force:
+            entries = parsed_feed.entries
 
-            elif created is False:
-                duplicates += 1
+        elif len(entries) < len(parsed_feed.entries):
+            LOGGER.info(u'%s %s: skipped %s entries already seen.',
+                        self._meta.verbose_name, self.id,
+                        len(parsed_feed.entries) - len(entries))
 
-            else:
-                mutualized += 1
+        failed = []
 
-        # Store the date/etag for next cycle. Doing it after the full
-        # refresh worked ensures that in case of any exception during
-        # the loop, the retried refresh will restart on the same
+        new_articles, duplicates, mutualized = \
+            self.create_articles_from_feedparser(entries, tags,
+                                                 failed=failed)
+
+        # Store the date/etag/fingerprints for next cycle. Doing it after
+        # the full refresh worked ensures that in case of any exception
+        # during the loop, the retried refresh will restart on the same
         # entries without loosing anything.
-        self.last_modified = getattr(parsed_feed, 'modified', None)
-        self.last_etag     = getattr(parsed_feed, 'etag', None)
+        if failed:
+            # Entries which could not be created must come back: don't
+            # let the next fetch skip the document, nor them.
+            LOGGER.warning(u'%s %s: %s entries could not be created, they '
+                           u'will be retried at next refresh.',
+                           self._meta.verbose_name, self.id, len(failed))
+
+            failed_fingerprints = set(feed_entry_fingerprint(entry)
+                                      for entry in failed)
+
+            fingerprints = [fingerprint for fingerprint in fingerprints
+                            if fingerprint not in failed_fingerprints]
+
+        else:
+            self.last_modified = getattr(parsed_feed, 'modified', None)
+            self.last_etag     = getattr(parsed_feed, 'etag', None)
+
+            if content_fingerprint is not None:
+                self.last_fingerprint = content_fingerprint
+
+        self.remember_seen_entries(fingerprints)
 
         return new_articles, duplicates, mutualized
 
-    def create_article_from_feedparser(self, article, feed_tags):
-        """ Take a feedparser item and a list of Feed subscribers and
-            feed tags, and create the corresponding Article and Read(s). """
+    def prepare_article_from_feedparser(self, article, feed_tags,
+                                        known_tags=None):
+        """ Return the :meth:`Article.create_article` arguments for
+            a feedparser item, as a dict suitable for
+            :meth:`Article.create_articles`.
+
+        :param known_tags: see :meth:`SimpleTag.get_tags_set`.
+        """
 
         feedparser_content = getattr(article, 'content', None)
 
@@ -554,7 +738,8 @@ class RssAtomFeed(BaseFeed):
                         t['term'] for t in article.get('tags', [])
                         # Sometimes, t['term'] can be None.
                         # http://dev.1flow.net/webapps/1flow/group/4082/
-                        if t['term'] is not None), origin=self)
+                        if t['term'] is not None), origin=self,
+                        known=known_tags)
                         | set(feed_tags))
         except:
             LOGGER.exception(u'Convert article tags failed on %s',
@@ -562,34 +747,157 @@ class RssAtomFeed(BaseFeed):
                                         for t in article.get('tags', [])))
             tags = set(feed_tags)
 
+        return {
+            # We *NEED* a title, but as we have no article.lang yet,
+            # it must be language independant as much as possible.
+            'title': getattr(article, 'title', u' ? '),
+
+            # Sometimes feedparser gives us URLs with spaces in them.
+            # Using the full `urlquote()` on an already url-quoted URL
+            # could be very destructive, thus we patch only this case.
+            #
+            # If there is no `.link`, we use '' to be able to `replace()`,
+            # but in fine `None` is a more regular "no value" mean. Sorry
+            # for the weird '' or None that just does the job.
+            'url': getattr(article, 'link', '').replace(' ', '%20') or None,
+
+            # These go into create_article(**kwargs)
+            'tags': tags,
+            'excerpt': content,
+            'date_published': date_published,
+            'origin': ORIGINS.FEEDPARSER,
+        }
+
+    def create_articles_from_feedparser(self, articles, feed_tags,
+                                        failed=None):
+        """ Create all articles of a fetch at once.
+
+        Return a ``(new_articles, duplicates, mutualized)`` tuple, as
+        needed by :meth:`throttle_fetch_interval`. If the batch creation
+        fails, fall back to creating one by one the articles it did not
+        create.
+
+        :param failed: an optional list, completed with the
+            :param:`articles` which could not be created.
+        """
+
+        new_articles  = 0
+        duplicates    = 0
+        mutualized    = 0
+
+        # Resolve the tags of all entries at once. Each entry
+        # then picks its own without any database query.
+        known_tags = dict((tag.id, tag) for tag in feed_tags)
+
+        try:
+            SimpleTag.get_tags_set((t['term'] for article in articles
+                                    for t in article.get('tags', [])
+                                    if t['term'] is not None),
+                                   origin=self, known=known_tags)
+        except:
+            LOGGER.exception(u'Batch tags resolution failed in feed %s, '
+                             u'entries will resolve their own.', self)
+
+        entries = [self.prepare_article_from_feedparser(article, feed_tags,
+                                                        known_tags)
+                   for article in articles]
+
+        # {entry index: article}, created by a failed batch.
+        batch_created = {}
+
+        try:
+            results = Article.create_articles(entries, self)
+
+        except ArticlesBatchException as e:
+            LOGGER.warning(u'Batch articles creation failed in feed %s '
+                           u'after %s articles, falling back to one-by-one '
+                           u'for the others.', self, len(e.created))
+
+            results = None
+            batch_articles = Article.objects.in_bulk(e.created.values())
+            batch_created = dict(
+                (index, batch_articles[article_id])
+                for index, article_id in e.created.items()
+                if article_id in batch_articles)
+
+        except:
+            LOGGER.exception(u'Batch articles creation failed in feed %s, '
+                             u'falling back to one-by-one.', self)
+
+            results = None
+
+        for index, article in enumerate(articles):
+
+            if index in batch_created:
+                created = self.finish_article_from_feedparser(
+                    article, batch_created[index], True,
+                    entries[index]['date_published'])
+
+            elif results is None:
+                created = self.create_article_from_feedparser(
+                    article, feed_tags, entry=entries[index],
+                    failed=failed)
+
+            else:
+                new_article, created = results[index]
+
+                if new_article is None:
+                    if failed is not None:
+                        failed.append(article)
+
+                else:
+                    created = self.finish_article_from_feedparser(
+                        article, new_article, created,
+                        entries[index]['date_published'])
+
+            if created:
+                new_articles += 1
+
+            elif created is False:
+                duplicates += 1
+
+            else:
+                mutualized += 1
+
+        return new_articles, duplicates, mutualized
+
+    def create_article_from_feedparser(self, article, feed_tags, entry=None,
+                                       failed=None):
+        """ Take a feedparser item and a list of Feed subscribers and
+            feed tags, and create the corresponding Article and Read(s).
+
+        :param failed: see :meth:`create_articles_from_feedparser`.
+        """
+
+        if entry is None:
+            entry = self.prepare_article_from_feedparser(article, feed_tags)
+
+        kwargs = entry.copy()
+
         try:
             new_article, created = Article.create_article(
-                # We *NEED* a title, but as we have no article.lang yet,
-                # it must be language independant as much as possible.
-                title=getattr(article, 'title', u' ? '),
-
-                # Sometimes feedparser gives us URLs with spaces in them.
-                # Using the full `urlquote()` on an already url-quoted URL
-                # could be very destructive, thus we patch only this case.
-                #
-                # If there is no `.link`, we use '' to be able to `replace()`,
-                # but in fine `None` is a more regular "no value" mean. Sorry
-                # for the weird '' or None that just does the job.
-                url=getattr(article, 'link', '').replace(' ', '%20') or None,
+                title=kwargs.pop('title'),
+                url=kwargs.pop('url'),
                 feeds=[self],
-
-                # These go into create_article(**kwargs)
-                tags=tags,
-                excerpt=content,
-                date_published=date_published,
-                origin=ORIGINS.FEEDPARSER)
+                **kwargs)
 
         except:
             # NOTE: duplication handling is already
             # taken care of in Article.create_article().
             LOGGER.exception(u'Article creation failed in feed %s.', self)
+
+            if failed is not None:
+                failed.append(article)
+
             return False
 
+        return self.finish_article_from_feedparser(
+            article, new_article, created, entry['date_published'])
+
+    def finish_article_from_feedparser(self, article, new_article,
+                                       created, date_published):
+        """ Update our counters and the article original data. """
+
         mutualized = created is None
 
         if created or mutualized:
@@ -604,8 +912,8 @@ class RssAtomFeed(BaseFeed):
             if created or (mutualized
                            and new_article.origin != ORIGINS.FEEDPARSER):
                 try:
-                    new_article.add_original_data('feedparser',
-                                                  unicode(article),
+                    new_article.add_original_data('feedparser_packed',
+                                                  pack_mapping(article),
                                                   launch_task=True)
 
                 except:
@@ -674,6 +982,57 @@ def discover_feeds_urls(feed_url):
                 feed_url, len(created), len(known))
 
 
+@task(queue='refresh')
+def refresh_rssatom_feeds_pool(feeds_ids, force=False):
+    """ Download many RSS/Atom feeds at once, then refresh them.
+
+    Downloads happen concurrently in a :class:`HttpFetchPool`, and
+    each feed is processed (parsed, articles created…) as soon as its
+    content arrives, while other downloads continue in the background.
+    This allows one worker process to refresh a lot of feeds without
+    beiing stuck on one slow remote host at a time.
+    """
+
+    if config.FEED_FETCH_DISABLED or config.FEED_FETCH_RSSATOM_DISABLED:
+        LOGGER.info(u'RSS/Atom feeds pooled refresh disabled by dynamic '
+                    u'configuration.')
+        return
+
+    feeds = {}
+    fetch_requests = []
+
+    for feed in RssAtomFeed.objects.filter(id__in=feeds_ids):
+
+        # HEADS UP: refresh_must_abort() acquire()s the feed lock.
+        if feed.refresh_must_abort(force=force):
+            feed.refresh_lock.release()
+            continue
+
+        feeds[feed.id] = feed
+        fetch_requests.append((feed.id, feed.url,
+                               feed.build_refresh_headers()))
+
+    if not feeds:
+        return
+
+    pool = HttpFetchPool(max_workers=config.FEED_FETCH_POOL_SIZE,
+                         max_per_host=config.FEED_FETCH_POOL_PER_HOST,
+                         timeout=config.FEED_FETCH_POOL_TIMEOUT)
+
+    with benchmark(u'Pooled refresh of {0} RSS/Atom feeds'.format(
+                   len(feeds))):
+
+        for result in pool.fetch_many(fetch_requests):
+            feed = feeds[result.key]
+
+            try:
+                feed.refresh(force=force, locked=True, prefetched=result)
+
+            except:
+                LOGGER.exception(u'Pooled refresh of feed %s failed.', feed)
+                feed.refresh_lock.release()
+
+
 # ————————————————————————————————————————————————————————————————————— Signals
 
 
@@ -686,12 +1045,10 @@ def rssatomfeed_pre_save(instance, **kwargs):
         # The feed already exists, don't bother.
         return
 
-    if feed.website:
+    if feed.website_id:
         return
 
-    website = WebSite.get_from_url(feed.url)
-
-    feed.website = website
+    feed.website_id = WebSite.get_id_from_url(feed.url)
 
 
 def rssatomfeed_post_save(instance, **kwargs):
@@ -705,6 +1062,8 @@ def rssatomfeed_post_save(instance, **kwargs):
 
 def rssatomfeed_pre_delete(instance, **kwargs):
 
+    REDIS.delete(instance.REDIS_SEEN_ENTRIES_KEY.format(instance.id))
+
     statsd.gauge('feeds.counts.total', -1, delta=True)
     statsd.gauge('feeds.counts.rssatom', -1, delta=True)
 
@@ -715,3 +1074,6 @@ pre_save.connect(basefeed_pre_save, sender=RssAtomFeed)
 pre_save.connect(rssatomfeed_pre_save, sender=RssAtomFeed)
 post_save.connect(rssatomfeed_post_save, sender=RssAtomFeed)
 pre_delete.connect(rssatomfeed_pre_delete, sender=RssAtomFeed)
+
+post_save.connect(basefeed_refresh_schedule_post_save, sender=RssAtomFeed)
+pre_delete.connect(basefeed_refresh_schedule_pre_delete, sender=RssAtomFeed)
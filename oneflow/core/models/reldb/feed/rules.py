@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2013-2014 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+"""
+
+import re
+import logging
+
+from ..account.common import BASE_HEADERS
+
+from common import (
+    RULES_OPERATIONS,
+    MAIL_HEADER_FIELDS,
+    TWITTER_MATCH_TYPES,
+    TWITTER_MATCH_FIELDS,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+__all__ = [
+    'CompiledRules',
+    'compile_rule_test',
+    'mail_message_values',
+    'tweet_values',
+]
+
+
+# NOTE: mail match types are a subset of the twitter ones,
+#       with the same values. We use the complete set here.
+MATCH_TYPES = TWITTER_MATCH_TYPES
+
+MAIL_HEADERS_NAMES = {
+    MAIL_HEADER_FIELDS.SUBJECT: BASE_HEADERS[u'subject'],
+    MAIL_HEADER_FIELDS.FROM: BASE_HEADERS[u'from'],
+    MAIL_HEADER_FIELDS.TO: BASE_HEADERS[u'to'],
+    MAIL_HEADER_FIELDS.COMMON: BASE_HEADERS[u'common'],
+    MAIL_HEADER_FIELDS.LIST: BASE_HEADERS[u'list'],
+}
+
+
+# ————————————————————————————————————————————————————————— Values extractors
+
+
+def mail_message_values(message, rule):
+    """ Return the list of strings of :param:`message` a rule applies to.
+
+    Address headers can come as lists or tuples. ``(u'Olivier Cortès',
+    u'<oc@1flow.io>')`` is one person, thus one value; ``(u'Toto
+    <n@t.com>', u'Tutu <m@t.com>')`` are two persons and two values.
+    """
+
+    if rule.header_field == MAIL_HEADER_FIELDS.OTHER:
+        headers_names = (rule.other_header, )
+
+    else:
+        headers_names = MAIL_HEADERS_NAMES.get(rule.header_field, ())
+
+    values = []
+
+    for header_name in headers_names:
+        header = message.get(header_name, u'')
+
+        if isinstance(header, (list, tuple)):
+            if len(header) == 2 and not isinstance(header[1], (list, tuple)) \
+                    and header[1].startswith(u'<'):
+                values.append(u'{0} {1}'.format(*header))
+
+            else:
+                for header_part in header:
+                    if isinstance(header_part, (list, tuple)):
+                        values.append(u' '.join(header_part))
+
+                    else:
+                        values.append(header_part)
+
+        else:
+            values.append(header)
+
+    return values
+
+
+def tweet_values(tweet, rule):
+    """ Return the values of a JSON tweet a rule applies to. """
+
+    field    = rule.match_field
+    entities = tweet.get('entities', {})
+    user     = tweet.get('user', {})
+
+    if field == TWITTER_MATCH_FIELDS.TWEET:
+        return [tweet.get('text', u'')]
+
+    elif field == TWITTER_MATCH_FIELDS.LANGUAGE:
+        return [tweet['lang']] if tweet.get('lang') else []
+
+    elif field == TWITTER_MATCH_FIELDS.CREATOR:
+        return [value for value in (user.get('screen_name'),
+                                    user.get('name')) if value]
+
+    elif field == TWITTER_MATCH_FIELDS.FAVORITES:
+        return [tweet.get('favorite_count', 0)]
+
+    elif field == TWITTER_MATCH_FIELDS.RETWEETS:
+        return [tweet.get('retweet_count', 0)]
+
+    elif field == TWITTER_MATCH_FIELDS.URLS:
+        return [url.get('expanded_url') or url.get('url')
+                for url in entities.get('urls', [])]
+
+    elif field == TWITTER_MATCH_FIELDS.MEDIA:
+        return [media.get('media_url')
+                for media in entities.get('media', [])]
+
+    elif field == TWITTER_MATCH_FIELDS.MENTIONS:
+        return [mention.get('screen_name')
+                for mention in entities.get('user_mentions', [])]
+
+    elif field == TWITTER_MATCH_FIELDS.HASHTAGS:
+        return [hashtag.get('text')
+                for hashtag in entities.get('hashtags', [])]
+
+    LOGGER.warning(u'Rule #%s: unsupported tweet field %s, ignored.',
+                   rule.id, field)
+
+    return []
+
+
+# ——————————————————————————————————————————————————————————————— Rules tests
+
+
+def compile_rule_test(rule):
+    """ Return a function ``test(values)`` for a single rule.
+
+    ``values`` must already be lowercased if the rule doesn't match case.
+    The match value is lowercased and the regular expressions compiled
+    here, once, instead of at every call.
+    """
+
+    match_type = rule.match_type
+    value      = rule.match_value or u''
+
+    if not rule.match_case:
+        value = value.lower()
+
+    if match_type == MATCH_TYPES.EXISTS:
+        return lambda values: bool(values)
+
+    elif match_type == MATCH_TYPES.NEXISTS:
+        return lambda values: not values
+
+    elif match_type in (MATCH_TYPES.LOWER, MATCH_TYPES.LOWEREQ,
+                        MATCH_TYPES.GREATER, MATCH_TYPES.GREATEREQ):
+        number = float(value)
+
+        compare = {
+            MATCH_TYPES.LOWER: lambda a: a < number,
+            MATCH_TYPES.LOWEREQ: lambda a: a <= number,
+            MATCH_TYPES.GREATER: lambda a: a > number,
+            MATCH_TYPES.GREATEREQ: lambda a: a >= number,
+        }[match_type]
+
+        return lambda values: any(compare(float(a)) for a in values)
+
+    elif match_type in (MATCH_TYPES.RE_MATCH, MATCH_TYPES.NRE_MATCH):
+        match = re.compile(value).match
+
+        if match_type == MATCH_TYPES.RE_MATCH:
+            return lambda values: any(match(a) for a in values)
+
+        return lambda values: any(not match(a) for a in values)
+
+    # HEADS UP: ENDS and NSTARTS share the same value. We keep the order
+    #           of the historical operations dict, where ENDS came last.
+    operation = {
+        MATCH_TYPES.CONTAINS: lambda a: value in a,
+        MATCH_TYPES.NCONTAINS: lambda a: value not in a,
+        MATCH_TYPES.STARTS: lambda a: a.startswith(value),
+        MATCH_TYPES.NSTARTS: lambda a: not a.startswith(value),
+        MATCH_TYPES.ENDS: lambda a: a.endswith(value),
+        MATCH_TYPES.NENDS: lambda a: not a.endswith(value),
+        MATCH_TYPES.EQUALS: lambda a: a == value,
+        MATCH_TYPES.NEQUALS: lambda a: a != value,
+    }[match_type]
+
+    return lambda values: any(operation(a) for a in values)
+
+
+class CompiledRules(object):
+
+    """ An in-memory, precompiled version of the rules of a feed.
+
+    Build it once per refresh, then call :meth:`match` for each message.
+    No database query is made after the initialization.
+
+    Rules are grouped by their ``group`` attribute. Each group (and each
+    rule without group) is a unit; a unit matches according to its
+    ``group_operation``, and the message matches according to the feed
+    :param:`operation_any`.
+
+    All plain ``CONTAINS`` rules on the same values are merged into one
+    regular expression. When it doesn't find anything, which is the
+    common case, all of them are false without testing them one by one.
+
+    :param rules: an iterable of rules, ordered by group and position.
+    :param operation_any: ``True`` if any unit is enough for a message
+        to match, ``False`` if they all must match.
+    :param values_getter: a function ``(message, rule)`` which returns
+        the list of values of the message that the rule applies to.
+    """
+
+    def __init__(self, rules, operation_any, values_getter):
+        """ Group, precompile and merge the rules. """
+
+        self.rules         = list(rules)
+        self.operation_any = operation_any
+        self.values_getter = values_getter
+
+        # [(group_operation_any, [(rule, values_key, test, prefilter)])]
+        self.units = []
+
+        # {values_key: [values of the CONTAINS rules]}
+        contains = {}
+        groups   = {}
+
+        for rule in self.rules:
+            values_key = self.values_key(rule)
+
+            if rule.match_type == MATCH_TYPES.CONTAINS:
+                value = rule.match_value or u''
+
+                contains.setdefault(values_key, []).append(
+                    value if rule.match_case else value.lower())
+
+            compiled = [rule, values_key, compile_rule_test(rule), None]
+
+            if rule.group:
+                try:
+                    groups[rule.group][1].append(compiled)
+
+                except KeyError:
+                    groups[rule.group] = (
+                        rule.group_operation == RULES_OPERATIONS.ANY,
+                        [compiled])
+                    self.units.append(groups[rule.group])
+
+            else:
+                self.units.append((True, [compiled]))
+
+        prefilters = dict(
+            (values_key, re.compile(u'|'.join(
+                re.escape(value) for value in values)).search)
+            for values_key, values in contains.items()
+            if len(values) > 1
+        )
+
+        for _, compiled_rules in self.units:
+            for compiled in compiled_rules:
+                if compiled[0].match_type == MATCH_TYPES.CONTAINS:
+                    compiled[3] = prefilters.get(compiled[1])
+
+    def __len__(self):
+        """ The number of rules. """
+
+        return len(self.rules)
+
+    def values_key(self, rule):
+        """ Rules with the same key get the same values from a message. """
+
+        return (getattr(rule, 'header_field', None),
+                getattr(rule, 'other_header', None),
+                getattr(rule, 'match_field', None),
+                rule.match_case)
+
+    def match(self, message):
+        """ Return the list of rules which matched, or an empty list.
+
+        For an *any* operation, this is the rules of the first unit
+        which matched. For *all*, this is all the rules.
+        """
+
+        # {values_key: values}, computed once per message.
+        values_cache = {}
+
+        # {values_key: bool}, the merged CONTAINS results.
+        prefilters_cache = {}
+
+        def rule_matches(rule, values_key, test, prefilter):
+
+            try:
+                values = values_cache[values_key]
+
+            except KeyError:
+                values = [value for value in
+                          self.values_getter(message, rule)
+                          if value is not None]
+
+                if not rule.match_case:
+                    values = [value.lower()
+                              if isinstance(value, basestring)
+                              else value for value in values]
+
+                values_cache[values_key] = values
+
+            if prefilter is not None:
+                try:
+                    found = prefilters_cache[values_key]
+
+                except KeyError:
+                    found = prefilters_cache[values_key] = any(
+                        prefilter(value) for value in values)
+
+                if not found:
+                    return False
+
+            return test(values)
+
+        matched = False
+
+        for group_operation_any, compiled_rules in self.units:
+
+            if group_operation_any:
+                unit_matched = any(rule_matches(*compiled)
+                                   for compiled in compiled_rules)
+
+            else:
+                unit_matched = all(rule_matches(*compiled)
+                                   for compiled in compiled_rules)
+
+            if unit_matched:
+                if self.operation_any:
+                    return [compiled[0] for compiled in compiled_rules]
+
+                matched = True
+
+            elif not self.operation_any:
+                # One unit of an “AND” set() didn't match.
+                return []
+
+        return self.rules if matched else []
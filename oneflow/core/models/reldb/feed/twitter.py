@@ -46,6 +46,8 @@ from base import (
     BaseFeedManager,
     BaseFeed,
     basefeed_pre_save,
+    basefeed_refresh_schedule_post_save,
+    basefeed_refresh_schedule_pre_delete,
 )
 
 from common import (
@@ -63,10 +65,60 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'TwitterFeed',
+    'coverage_member',
 
     # tasks will be added by register_task_method(),
 ]
 
+# Covered tweet IDs ranges are stored as “end:start” members of a sorted
+# set, all with the same score, thus ordered lexicographically. Tweet
+# IDs don't fit in the scores doubles, but zero-padded to 20 digits,
+# they sort as strings exactly like as numbers, in Lua too.
+COVERAGE_ID_WIDTH = 20
+
+COVERAGE_INSERT = REDIS.register_script("""
+local new_start, new_end = ARGV[1], ARGV[2]
+local members = redis.call('ZRANGEBYLEX', KEYS[1], '[' .. ARGV[3], '+')
+
+for _, member in ipairs(members) do
+    local member_start = string.sub(member, 22)
+
+    if member_start > ARGV[4] then
+        break
+    end
+
+    local member_end = string.sub(member, 1, 20)
+
+    if member_start < new_start then
+        new_start = member_start
+    end
+
+    if member_end > new_end then
+        new_end = member_end
+    end
+
+    redis.call('ZREM', KEYS[1], member)
+end
+
+redis.call('ZADD', KEYS[1], 0, new_end .. ':' .. new_start)
+
+return redis.call('ZCARD', KEYS[1])
+""")
+
+
+def coverage_id(tweet_id):
+    """ Return a tweet ID as a zero-padded string. """
+
+    return u'{0:0{1}d}'.format(int(tweet_id), COVERAGE_ID_WIDTH)
+
+
+def coverage_member(member):
+    """ Return the ``(start, end)`` IDs range of a coverage member. """
+
+    return (int(member[COVERAGE_ID_WIDTH + 1:]),
+            int(member[:COVERAGE_ID_WIDTH]))
+
+
 # —————————————————————————————————————————————————————————— Manager / QuerySet
 
 
@@ -237,12 +289,25 @@ class TwitterFeed(BaseFeed):
 
         return bool(self.uri)
 
+    @property
+    def is_filter_stream(self):
+        """ True if we are consumed via the public ``statuses/filter``. """
+
+        return not (self.is_timeline or self.uri) and bool(
+            self.track_terms or self.track_locations)
+
     @property
     def redis_good_periods_key(self):
         """ Return a string for redis keying on our Twitter good periods."""
 
         return u'tf:{0}:gdper'.format(self.id)
 
+    @property
+    def redis_coverage_key(self):
+        """ Return a string for redis keying on our covered IDs ranges. """
+
+        return u'tf:{0}:cover'.format(self.id)
+
     @property
     def redis_time_ids_key(self):
         """ Return a string for redis keying on our Twitter SINCE/MAX values."""
@@ -263,9 +328,11 @@ class TwitterFeed(BaseFeed):
 
     @property
     def good_periods_count(self):
-        """ Return our good periods count. """
+        """ Return our good periods count, after merge. """
 
-        return int(REDIS.scard(self.redis_good_periods_key) or 0)
+        self.migrate_good_periods()
+
+        return int(REDIS.zcard(self.redis_coverage_key) or 0)
 
     @property
     def can_backfill_more(self):
@@ -340,37 +407,127 @@ class TwitterFeed(BaseFeed):
 
         return self.set_time_tweet_id(which_id, latest=False)
 
-    def record_good_period(self, start, end):
-        """ Record a good period into redis. """
+    def migrate_good_periods(self):
+        """ Import the good periods of the old unmerged set, if any.
+
+        They were stored as ``(start, end)`` strings. The old key is
+        deleted after, thus this costs one ``EXISTS`` next times.
+        """
+
+        if not REDIS.exists(self.redis_good_periods_key):
+            return
+
+        for period in REDIS.smembers(self.redis_good_periods_key):
+            try:
+                start, end = (int(x) for x in period.strip('()').split(','))
+
+            except ValueError:
+                LOGGER.warning(u'%s: invalid good period %s, ignored.',
+                               self, period)
+                continue
+
+            self.record_good_period(start, end, migrate=False)
+
+        REDIS.delete(self.redis_good_periods_key)
+
+    def record_good_period(self, start, end, migrate=True):
+        """ Record a covered IDs range, merged with the overlapping ones.
+
+        Adjacent ranges are merged too; the operation is atomic. Return
+        the number of disjoint ranges after the merge.
+        """
+
+        if migrate:
+            self.migrate_good_periods()
+
+        start, end = min(start, end), max(start, end)
+
+        return COVERAGE_INSERT(keys=[self.redis_coverage_key],
+                               args=[coverage_id(start), coverage_id(end),
+                                     coverage_id(max(start - 1, 0)),
+                                     coverage_id(end + 1)],
+                               client=REDIS)
+
+    def coverage_ranges(self, low=None):
+        """ Yield our covered ``(start, end)`` ranges, ending from low.
+
+        Each call to ``ZRANGEBYLEX`` costs O(log(N)) to find the first
+        range, then O(1) per range; ranges are fetched by chunks.
+        """
+
+        self.migrate_good_periods()
+
+        minimum = u'-' if low is None else u'[' + coverage_id(low)
+        offset  = 0
+
+        while True:
+            members = REDIS.zrangebylex(self.redis_coverage_key,
+                                        minimum, u'+', offset, 100)
+
+            for member in members:
+                yield coverage_member(member)
+
+            if len(members) < 100:
+                break
+
+            offset += len(members)
+
+    def coverage_gaps(self, low, high):
+        """ Return the ``(start, end)`` ranges not covered in [low, high]. """
+
+        gaps   = []
+        cursor = low
+
+        for start, end in self.coverage_ranges(low):
+            if start > high:
+                break
+
+            if start > cursor:
+                gaps.append((cursor, start - 1))
+
+            cursor = max(cursor, end + 1)
 
-        REDIS.sadd(self.redis_good_periods_key, (start, end, ))
+            if cursor > high:
+                break
+
+        if cursor <= high:
+            gaps.append((cursor, high))
+
+        return gaps
+
+    def coverage_floor(self, tweet_id):
+        """ Return the highest ID below :param:`tweet_id` not covered. """
+
+        for start, end in self.coverage_ranges(tweet_id):
+            if start <= tweet_id:
+                return start - 1
+
+            break
+
+        return tweet_id
 
     def check_new_good_period(self, period_start_item, period_end_item):
         """ Check if the period (start, end) is OK to record.
 
-        “good periods” offer coverage of consecutive tweets, allowing
-        one day to eventually check timeline to guarantee their consistency
-        and non-missing tweets in covered periods.
-
-        .. todo:: one day, finish the coverage feature, by analyzing good
-            periods, merge them, and backfill non-covered periods. This
-            will work on timelines, partially on lists (because list
-            members vary over time), and will be practically undoable on
-            search streams because of quota constraints. And anyway, except
-            for history concerns, doing it on search streams seems pretty
-            pointless to me.
+        “good periods” offer coverage of consecutive tweets. They are
+        merged on insert, and :meth:`backfill` uses them to request
+        only the missing ranges from Twitter.
+
+        .. todo:: lists coverage is partial, because list members vary
+            over time. Search streams are not backfilled completely
+            anyway, because of quota constraints.
         """
 
         if period_start_item and period_end_item and (
                 period_start_item != period_end_item):
 
-            # FUTURE: do something with these.
-            self.record_good_period(period_start_item, period_end_item)
+            count = self.record_good_period(period_start_item,
+                                            period_end_item)
 
             if settings.DEBUG:
                 LOGGER.info(u'%s: good period %s-%s recorded, %s total.',
                             self, period_start_item, period_end_item,
-                            self.good_periods_count)
+                            count)
 
     def can_continue_consuming(self):
         """ Return True if the current feed is still in good conditions.
@@ -394,6 +551,21 @@ class TwitterFeed(BaseFeed):
 
     # ———————————————————————————————————————————————————— BaseFeed connections
 
+    def stream_account_id(self):
+        """ Return the ID of the Twitter account our stream goes through.
+
+        It's always the same, to be able to merge our stream with the
+        other feeds of this account. ``None`` if we have no account.
+        """
+
+        accounts_ids = [account.id for account in self.account.all()]
+
+        if accounts_ids:
+            return min(accounts_ids)
+
+        return self.user.accounts.twitter().order_by(
+            'id').values_list('id', flat=True).first()
+
     def refresh_must_abort_internal(self):
         """ Specific conditions where an Twitter feed should not refresh. """
 
@@ -416,8 +588,19 @@ class TwitterFeed(BaseFeed):
                 globals()['twitterfeed_backfill_task'].delay(self.id)
                 # LOGGER.debug(u'%s: launched backfill() task.', self)
 
-            globals()['twitterfeed_consume_task'].delay(self.id)
-            # LOGGER.debug(u'%s: launched consume() task.', self)
+            stream_account_id = self.stream_account_id()
+
+            if self.is_filter_stream and stream_account_id:
+                # Avoid circular import
+                from twitterstream import twitteraccount_stream_task
+
+                # Merged with the other feeds of the account. If
+                # its stream already runs, it will pick us soon.
+                twitteraccount_stream_task.delay(stream_account_id)
+
+            else:
+                globals()['twitterfeed_consume_task'].delay(self.id)
+                # LOGGER.debug(u'%s: launched consume() task.', self)
 
             # Tell BaseFeed.refresh() we are completely autonomous.
             return True
@@ -536,6 +719,9 @@ class TwitterFeed(BaseFeed):
         """ Consume tweets from a stream (public/user).
 
         This is an internal method, called from :meth:`consume`.
+
+        Return ``True`` if we stopped because there was nothing more
+        to get (eg. a backfilled range is now completely covered).
         """
 
         def format_quota(quota):
@@ -591,6 +777,10 @@ class TwitterFeed(BaseFeed):
             parameters = {}
 
         exit_loop = False
+        completed = False
+
+        # The lowest ID of the current backfilling batch.
+        lowest_id = None
 
         max_rewind_range = config.TWITTER_BACKFILL_ALLOWED_REWIND_RANGE
         max_rewind_range_as_dt_from_now = (
@@ -639,6 +829,10 @@ class TwitterFeed(BaseFeed):
                             item, backfilling=backfilling)
 
                         if processed:
+                            if backfilling and (lowest_id is None
+                                                or item['id'] < lowest_id):
+                                lowest_id = item['id']
+
                             if cur_processed == 0 and not backfilling:
                                 # At the first received item while streaming,
                                 # we need to check if backfill is needed.
@@ -671,6 +865,7 @@ class TwitterFeed(BaseFeed):
 
                             LOGGER.info(u'%s: backfilled to the maximum '
                                         u'allowed.', self)
+                            completed = True
                             break
 
                     if cur_processed == 0:
@@ -694,6 +889,7 @@ class TwitterFeed(BaseFeed):
                             # API quota, hitting duplicates in our database.
                             LOGGER.info(u'%s: no new item in stream.', self)
 
+                        completed = True
                         break
 
                     else:
@@ -705,7 +901,9 @@ class TwitterFeed(BaseFeed):
                         # Only if we were already at end will it cost
                         # us an API call for nothing.
                         if backfilling:
-                            parameters['max_id'] = self.oldest_id - 1
+                            # Not self.oldest_id: when filling a gap,
+                            # we are way above it.
+                            parameters['max_id'] = lowest_id - 1
 
                         else:
                             parameters['since_id'] = self.latest_id
@@ -781,6 +979,8 @@ class TwitterFeed(BaseFeed):
                     all_processed, infinite_count,
                     format_quota(result.get_rest_quota()))
 
+        return completed
+
     def consume(self):
         u""" Consume a Twitter stream, forward, and permanently.
 
@@ -880,6 +1080,9 @@ class TwitterFeed(BaseFeed):
           ``config.TWITTER_BACKFILL_ALLOWED_REWIND_RANGE``; the first
           that matches stops us.
 
+        Both skip the IDs ranges already covered (see
+        :meth:`record_good_period`), to save our API quota.
+
         .. note:: this method is available as a celery task
             via :func:`twitterfeed_backfill_task`.
         """
@@ -926,23 +1129,69 @@ class TwitterFeed(BaseFeed):
             else:
                 max_id = oldest_id - 1
 
-        if since_id:
-            parameters['since_id'] = since_id
+            if max_id:
+                # Don't rewind again what we already have.
+                max_id = self.coverage_floor(max_id)
+
+            ranges = [(None, max_id)]
 
-        if max_id:
-            parameters['max_id'] = max_id
+        elif since_id and max_id:
+            # Only the missing parts, if any.
+            ranges = [(start - 1, end) for start, end
+                      in self.coverage_gaps(since_id + 1, max_id)]
+
+            if not ranges:
+                LOGGER.info(u'%s: range %s-%s already covered, no need '
+                            u'to backfill.', self, since_id, max_id)
+                return
+
+        else:
+            ranges = [(since_id, max_id)]
 
         # —————————————————————————————————————————————— The backfill operation
 
-        if since_id or max_id:
-            LOGGER.info(u'%s: backfilling since %s to max %s…',
-                        self, since_id, max_id)
+        if self.is_timeline:
+            # WARNING: statuses/home_timeline API 15 per 15 minute only…
+            api_path = 'statuses/home_timeline'
+
+            parameters.update({
+                'count': count or 200,  # Else it's 20 by default…
+                'trim_user': 1,
+            })
+
+        elif self.uri:
+            # We have a twitter list.
+            api_path = 'lists/statuses'
+            owner_screen_name, _, slug = self.uri[1:].split(u'/')
+
+            parameters.update({
+                'count': count or 200,  # Else it's 20 by default…
+                'include_rts': 1,
+                'slug': slug,
+                'owner_screen_name': owner_screen_name
+            })
+
+        elif self.track_terms or self.track_locations:
+            api_path = 'search/tweets'
+
+            parameters.update({
+                'count': count or 200,  # Else it's 20 by default…
+                'result_type': 'recent',  # or: 'mixed', 'popular'
+            })
+
+            if self.track_terms:
+                parameters['track'] = self.track_terms
+
+            if self.track_locations:
+                parameters['locations'] = self.track_locations
+
+            # Search/tweets doesn't use locations (bounding boxes),
+            # but geocodes (bounding circles)… We need to convert,
+            # and results won't be exactly the same.
+            # Geocode: 37.781157,-122.398720,1mi
 
         else:
-            # We never got any item from this stream.
-            # Who called us ??? It was too early.
-            LOGGER.info(u'%s: Backfilling for first '
-                        u'content in the feed.', self)
+            return
 
         # can be None
         period_start_item = self.oldest_id
@@ -950,51 +1199,32 @@ class TwitterFeed(BaseFeed):
         statsd.incr('api.twitter.actions.backfill')
 
         try:
-            if self.is_timeline:
-                # WARNING: statuses/home_timeline API 15 per 15 minute only…
+            for range_since_id, range_max_id in ranges:
 
-                parameters.update({
-                    'count': count or 200,  # Else it's 20 by default…
-                    'trim_user': 1,
-                })
+                range_parameters = parameters.copy()
 
-                self.__consume_items('statuses/home_timeline',
-                                     parameters, backfilling=True)
+                if range_since_id:
+                    range_parameters['since_id'] = range_since_id
 
-            elif self.uri:
-                # We have a twitter list.
-                owner_screen_name, _, slug = self.uri[1:].split(u'/')
+                if range_max_id:
+                    range_parameters['max_id'] = range_max_id
 
-                parameters.update({
-                    'count': count or 200,  # Else it's 20 by default…
-                    'include_rts': 1,
-                    'slug': slug,
-                    'owner_screen_name': owner_screen_name
-                })
-
-                self.__consume_items('lists/statuses',
-                                     parameters, backfilling=True)
-
-            elif self.track_terms or self.track_locations:
-
-                parameters.update({
-                    'count': count or 200,  # Else it's 20 by default…
-                    'result_type': 'recent',  # or: 'mixed', 'popular'
-                })
+                if range_since_id or range_max_id:
+                    LOGGER.info(u'%s: backfilling since %s to max %s…',
+                                self, range_since_id, range_max_id)
 
-                if self.track_terms:
-                    parameters['track'] = self.track_terms
-
-                if self.track_locations:
-                    parameters['locations'] = self.track_locations
+                else:
+                    # We never got any item from this stream.
+                    # Who called us ??? It was too early.
+                    LOGGER.info(u'%s: Backfilling for first '
+                                u'content in the feed.', self)
 
-                # Search/tweets doesn't use locations (bounding boxes),
-                # but geocodes (bounding circles)… We need to convert,
-                # and results won't be exactly the same.
-                # Geocode: 37.781157,-122.398720,1mi
+                completed = self.__consume_items(api_path, range_parameters,
+                                                 backfilling=True)
 
-                self.__consume_items('search/tweets',
-                                     parameters, backfilling=True)
+                if completed and range_since_id and range_max_id:
+                    # since_id is exclusive, max_id inclusive.
+                    self.record_good_period(range_since_id + 1, range_max_id)
 
         finally:
             self.check_new_good_period(period_start_item, self.oldest_id)
@@ -1059,3 +1289,6 @@ pre_save.connect(basefeed_pre_save, sender=TwitterFeed)
 pre_save.connect(twitterfeed_pre_save, sender=TwitterFeed)
 post_save.connect(twitterfeed_post_save, sender=TwitterFeed)
 pre_delete.connect(twitterfeed_pre_delete, sender=TwitterFeed)
+
+post_save.connect(basefeed_refresh_schedule_post_save, sender=TwitterFeed)
+pre_delete.connect(basefeed_refresh_schedule_pre_delete, sender=TwitterFeed)
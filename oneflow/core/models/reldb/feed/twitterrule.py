@@ -20,7 +20,6 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 import re
 import logging
-import operator
 
 from positions import PositionField
 
@@ -36,12 +35,11 @@ from django.utils.translation import ugettext_lazy as _
 
 from sparks.django.models.mixins import ModelDiffMixin
 
-from ..account.common import OTHER_VALID_HEADERS_lower, BASE_HEADERS
+from ..account.common import OTHER_VALID_HEADERS_lower
 
 from twitter import TwitterFeed
+from rules import CompiledRules, tweet_values
 from common import (
-    RULES_OPERATIONS,
-
     TWITTER_MATCH_TYPES,
     TWITTER_MATCH_FIELDS,
     TWITTER_RULES_OPERATIONS,
@@ -149,70 +147,6 @@ class TwitterFeedRule(ModelDiffMixin):
 
     check_error = models.CharField(max_length=255, null=True, blank=True)
 
-    # —————————————————————————————————————————————————————————————— Properties
-
-    @property
-    def operation(self):
-        """ Return a Python function doing the operation of the rule.
-
-        Cache it in an attribute to avoid redoing all the work each time
-        this property is called, because in many cases the rule will be
-        called more than once (on multiple messages of multiple twitterboxes).
-        """
-
-        try:
-            return self._operation_
-
-        except AttributeError:
-
-            def mymethodcaller(name):
-                def caller(a, b):
-                    return getattr(a, name)(b)
-
-                return caller
-
-            def ncontains(a, b):
-                return not operator.contains(a, b)
-
-            def nstarts(a, b):
-                return not a.startswith(b)
-
-            def nends(a, b):
-                return not a.endswith(b)
-
-            if self.match_type in (TWITTER_MATCH_TYPES.RE_MATCH,
-                                   TWITTER_MATCH_TYPES.NRE_MATCH):
-                # The .lower() should work also with the RE. It
-                # should even be faster than a standard /I match().
-                compiled_re = re.compile(self.match_value
-                                         if self.match_case
-                                         else self.match_value.lower())
-
-            def re_match(a, b):
-                """ :param:`b` is ignored, it's here for call compat only. """
-
-                return bool(compiled_re.match(a))
-
-            def nre_match(a, b):
-                return not re_match(a, b)
-
-            OPERATIONS = {
-                TWITTER_MATCH_TYPES.CONTAINS: operator.contains,
-                TWITTER_MATCH_TYPES.NCONTAINS: ncontains,
-                TWITTER_MATCH_TYPES.STARTS: mymethodcaller('startswith'),
-                TWITTER_MATCH_TYPES.NSTARTS: nstarts,
-                TWITTER_MATCH_TYPES.ENDS: mymethodcaller('endswith'),
-                TWITTER_MATCH_TYPES.NENDS: nends,
-                TWITTER_MATCH_TYPES.EQUALS: operator.eq,
-                TWITTER_MATCH_TYPES.NEQUALS: operator.ne,
-                TWITTER_MATCH_TYPES.RE_MATCH: re.match,
-                TWITTER_MATCH_TYPES.NRE_MATCH: nre_match,
-            }
-
-            self._operation_ = OPERATIONS[self.match_type]
-
-            return self._operation_
-
     # —————————————————————————————————————————————————————————————————— Django
 
     def __unicode__(self):
@@ -307,97 +241,26 @@ class TwitterFeedRule(ModelDiffMixin):
                 self.save()
 
     def match_message(self, message):
-        """ True if :param:`message` matches the current rule or its group. """
-
-        if self.group:
-            return self.match_message_in_group(message)
-
-        else:
-            return self.match_message_individual(message)
+        """ True if :param:`message` matches the current rule or its group.
 
-    def match_message_in_group(self, message):
-        """ Return True if our rule group says so. """
-
-        operation_any = self.group_operation == RULES_OPERATIONS.ANY
-        operation_all = not operation_any
-
-        rules_group = self.twitterfeed.rules.filter(group=self.group)
+        .. note:: to match many messages against all the rules of a
+            feed, prefer the feed ``compile_rules()`` method.
+        """
 
-        for rule in rules_group:
+        try:
+            compiled_rules = self._compiled_rules_
 
-            if rule.match_message_individual(message):
-                if operation_any:
-                    # First match makes the group be true.
-                    return True
+        except AttributeError:
+            if self.group:
+                # Only one query for all messages.
+                rules = self.twitterfeed.rules.filter(
+                    group=self.group).order_by('position')
 
             else:
-                if operation_all:
-                    # First non-match kills the group.
-                    return False
-
-        # OK, this is kind of a nice shortcut.
-        return operation_all
-
-    def match_message_individual(self, message):
-        """ Test message against the current rule, member of a group or not. """
-
-        def match_field(field, value):
-            if not self.match_case:
-                field = field.lower()
-
-            return self.operation(field, value)
-
-        HEADERS = BASE_HEADERS.copy()
-        HEADERS[u'other'] = self.other_field
-
-        #
-        # TODO: implement body searching.
-        #
+                rules = [self]
 
-        if self.match_case:
-            value = self.match_value
-
-        else:
-            # HEADS UP: we don't care for the RE; the
-            # second parameter in that case is ignored.
-            value = self.match_value.lower()
-
-        for field_name in HEADERS[self.match_field]:
-            field = message.get(field_name, u'')
-
-            if isinstance(field, list) or isinstance(field, tuple):
-                if len(field) > 2:
-                    for field_part in field:
-                        if isinstance(field, list) \
-                                or isinstance(field, tuple):
-                            field = u'{0} {1}'.format(*field_part)
-
-                            if match_field(field, value):
-                                return True
-
-                        else:
-                            if match_field(field_part, value):
-                                return True
-
-                else:
-                    if field[1].startswith(u'<'):
-                        # Here we've got [u'Olivier Cortès', '<oc@1flow.io>']
-                        # it's the same person; one test.
-
-                        field = u'{0} {1}'.format(*field)
-
-                        if match_field(field, value):
-                            return True
-
-                    else:
-                        # There we've got [u'Toto <n@t.com>', u'Tutu <m@t.com>']
-                        # They are 2 different persons and 2 tests.
-
-                        for field_part in field:
-                            if match_field(field_part, value):
-                                return True
-            else:
-                if match_field(field, value):
-                    return True
+            # A single unit, which applies our group operation.
+            compiled_rules = self._compiled_rules_ = CompiledRules(
+                rules, True, tweet_values)
 
-        return False
+        return bool(compiled_rules.match(message))
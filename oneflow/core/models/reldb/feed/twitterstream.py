@@ -0,0 +1,607 @@
+# -*- coding: utf-8 -*-
+u"""
+Copyright 2013-2014 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+"""
+
+import re
+import time
+import uuid
+import logging
+
+from collections import OrderedDict
+
+from celery import task
+from statsd import statsd
+from constance import config
+from celery.exceptions import SoftTimeLimitExceeded
+
+from oneflow.base.utils import RedisExpiringLock
+
+from ..account import TwitterAccount
+from ..item import Tweet, mark_tweet_deleted
+
+from twitter import TwitterFeed, twitterfeed_consume_task
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+__all__ = [
+    'TwitterAPITransport',
+    'TwitterStreamMultiplexer',
+    'track_matcher',
+    'locations_matcher',
+    'twitteraccount_stream_lock',
+    'twitteraccount_stream_task',
+]
+
+
+# Public streams limits, per connection.
+# https://dev.twitter.com/streaming/overview/request-parameters
+STREAM_MAX_TRACK_TERMS = 400
+STREAM_MAX_LOCATIONS   = 25
+
+TRACK_WORDS_RE = re.compile(ur'\w+', re.UNICODE)
+
+
+# ——————————————————————————————————————————————————————————————— Transports
+
+
+class TwitterAPITransport(object):
+
+    """ Read Twitter streams through the account :class:`TwitterAPI`.
+
+    A transport is anything with a ``stream(api_path, parameters)``
+    method returning an iterable of decoded JSON items. Tests can
+    use a fake one yielding local tweets.
+    """
+
+    def __init__(self, account):
+        """ Nothing fancy. """
+
+        self.account = account
+
+    def stream(self, api_path, parameters):
+        """ Yield the items of a stream until it disconnects. """
+
+        with self.account as tweetapi:
+            for item in tweetapi.request(api_path,
+                                         parameters).get_iterator():
+                yield item
+
+
+# —————————————————————————————————————————————————————————————————— Matchers
+
+
+def track_words(text):
+    """ Return the lowercased words of a text, without punctuation. """
+
+    return TRACK_WORDS_RE.findall(text.lower())
+
+
+def tweet_track_words(tweet):
+    """ Return the set of words a track phrase is tested against.
+
+    Like Twitter does, this includes the text, the expanded URLs,
+    the user screen name, the mentions and the hashtags.
+    """
+
+    entities = tweet.get('entities', {})
+
+    texts = [tweet.get('text', u''),
+             tweet.get('user', {}).get('screen_name', u'')]
+
+    texts.extend(url.get('expanded_url') or u''
+                 for url in entities.get('urls', []))
+
+    texts.extend(mention.get('screen_name', u'')
+                 for mention in entities.get('user_mentions', []))
+
+    texts.extend(hashtag.get('text', u'')
+                 for hashtag in entities.get('hashtags', []))
+
+    return set(track_words(u' '.join(texts)))
+
+
+def track_phrases(track_terms):
+    """ Split a ``track`` parameter into its phrases, cleaned. """
+
+    return [phrase.strip() for phrase in (track_terms or u'').split(u',')
+            if phrase.strip()]
+
+
+def track_matcher(track_terms):
+    """ Return a function ``match(tweet_words)`` for a ``track`` parameter.
+
+    A phrase matches if all its words are in the tweet, regardless of
+    order and case; phrases are OR'ed. This is a bit looser than
+    Twitter (``#twitter`` matches ``twitter``), which is harmless:
+    the stream only sends tweets matched by at least one phrase.
+    """
+
+    phrases = [frozenset(track_words(phrase))
+               for phrase in track_phrases(track_terms)]
+
+    phrases = [phrase for phrase in phrases if phrase]
+
+    return lambda tweet_words: any(phrase <= tweet_words
+                                   for phrase in phrases)
+
+
+def locations_boxes(track_locations):
+    """ Return a list of ``(sw_lon, sw_lat, ne_lon, ne_lat)`` boxes. """
+
+    try:
+        coordinates = [float(value) for value
+                       in (track_locations or u'').split(u',')
+                       if value.strip()]
+
+    except ValueError:
+        LOGGER.warning(u'Invalid track locations “%s”, ignored.',
+                       track_locations)
+        return []
+
+    return [tuple(coordinates[index:index + 4])
+            for index in range(0, len(coordinates) - 3, 4)]
+
+
+def locations_matcher(track_locations):
+    """ Return a function ``match(tweet)`` for a ``locations`` parameter.
+
+    Geotagged tweets match if their point is in a box. Others match if
+    their place bounding box intersects a box, as Twitter does.
+    """
+
+    boxes = locations_boxes(track_locations)
+
+    def match(tweet):
+
+        if not boxes:
+            return False
+
+        try:
+            lon, lat = tweet['coordinates']['coordinates']
+
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        else:
+            return any(box[0] <= lon <= box[2] and box[1] <= lat <= box[3]
+                       for box in boxes)
+
+        try:
+            points = tweet['place']['bounding_box']['coordinates'][0]
+
+        except (KeyError, TypeError, IndexError):
+            return False
+
+        lons = [point[0] for point in points]
+        lats = [point[1] for point in points]
+
+        return any(min(lons) <= box[2] and max(lons) >= box[0]
+                   and min(lats) <= box[3] and max(lats) >= box[1]
+                   for box in boxes)
+
+    return match
+
+
+# ——————————————————————————————————————————————————————————————— Multiplexer
+
+
+class TwitterStreamMultiplexer(object):
+
+    """ Consume the public stream of many feeds over one connection.
+
+    All the track-terms/locations feeds consumed through one Twitter
+    account are merged into one ``statuses/filter`` stream, within the
+    API limits. Each incoming tweet is routed in memory to the feeds
+    which match it, and tweets are created by batches.
+
+    Timelines and lists are not merged: a timeline is already one
+    stream per account, and lists are REST-polled with their own
+    ``since_id``. They keep their own :meth:`TwitterFeed.consume`.
+
+    :param account: the :class:`TwitterAccount` to stream with.
+    :param feeds: the candidate feeds. The ones which don't fit
+        in the stream limits are available in :attr:`overflow`.
+    :param transport: see :class:`TwitterAPITransport`, the default.
+    """
+
+    def __init__(self, account, feeds, transport=None):
+        """ Merge the feeds parameters and build the routes. """
+
+        self.account   = account
+        self.transport = transport or TwitterAPITransport(account)
+
+        self.feeds    = OrderedDict()
+        self.overflow = []
+
+        # [(feed_id, track_match or None, locations_match or None)]
+        self.routes = []
+
+        terms     = OrderedDict()
+        locations = OrderedDict()
+
+        for feed in sorted(feeds, key=lambda f: f.id):
+            feed_terms     = track_phrases(feed.track_terms)
+            feed_locations = locations_boxes(feed.track_locations)
+
+            new_terms = [term for term in feed_terms
+                         if term.lower() not in terms]
+            new_locations = [box for box in feed_locations
+                             if box not in locations]
+
+            if len(terms) + len(new_terms) > STREAM_MAX_TRACK_TERMS \
+                or len(locations) + len(new_locations) \
+                    > STREAM_MAX_LOCATIONS:
+                self.overflow.append(feed)
+                continue
+
+            for term in new_terms:
+                terms[term.lower()] = term
+
+            for box in new_locations:
+                locations[box] = True
+
+            self.feeds[feed.id] = feed
+            self.routes.append((
+                feed.id,
+                track_matcher(feed.track_terms) if feed_terms else None,
+                locations_matcher(feed.track_locations)
+                if feed_locations else None,
+            ))
+
+        self.parameters = {}
+
+        if terms:
+            self.parameters['track'] = u','.join(terms.values())
+
+        if locations:
+            self.parameters['locations'] = u','.join(
+                u','.join(unicode(value) for value in box)
+                for box in locations)
+
+        # {tweet_id: (item, set(feeds_ids))}
+        self.buffer = OrderedDict()
+
+    @classmethod
+    def signature(cls, feeds):
+        """ Something that changes when the stream must be rebuilt. """
+
+        return sorted((feed.id, feed.track_terms, feed.track_locations)
+                      for feed in feeds)
+
+    def route(self, tweet):
+        """ Return the IDs of the feeds a tweet must go into. """
+
+        words = None
+        feeds_ids = set()
+
+        for feed_id, track_match, locations_match in self.routes:
+
+            if track_match is not None:
+                if words is None:
+                    words = tweet_track_words(tweet)
+
+                if track_match(words):
+                    feeds_ids.add(feed_id)
+                    continue
+
+            if locations_match is not None and locations_match(tweet):
+                feeds_ids.add(feed_id)
+
+        return feeds_ids
+
+    def handle_item(self, item):
+        """ Buffer a tweet, or handle a control message.
+
+        Return ``True`` if the stream must be disconnected.
+        """
+
+        if 'text' in item:
+            feeds_ids = self.route(item)
+
+            if feeds_ids:
+                try:
+                    self.buffer[item['id']][1].update(feeds_ids)
+
+                except KeyError:
+                    self.buffer[item['id']] = (item, feeds_ids)
+
+            else:
+                LOGGER.debug(u'%s: tweet #%s matched no feed.',
+                             self.account, item['id'])
+
+            statsd.incr('api.twitter.items.processed')
+
+        elif 'delete' in item:
+            try:
+                mark_tweet_deleted.delay(item['delete']['status']['id'])
+
+            except:
+                LOGGER.exception(u'Unable to delete tweet '
+                                 u'from item %s', item)
+
+        elif 'limit' in item:
+            LOGGER.warning(u'%s: %s tweets missed', self.account,
+                           item['limit'].get('track'))
+
+            statsd.incr('api.twitter.messages.tweets_missed')
+
+        elif 'warning' in item:
+            percent = item['warning'].get('percent_full', 0)
+
+            statsd.incr('api.twitter.messages.stall_warning')
+
+            if percent > 75:
+                LOGGER.error(u'%s: Remote queue %s%% full, disconnecting.',
+                             self.account, percent)
+                return True
+
+            LOGGER.warning(u'%s: stall warning sent (%s%% full)',
+                           self.account, percent)
+
+        elif 'disconnect' in item:
+            LOGGER.error(u'%s: disconnecting because %s', self.account,
+                         item['disconnect'].get('reason'))
+
+            statsd.incr('api.twitter.messages.disconnect')
+            return True
+
+        elif 'code' in item:
+            LOGGER.error(u'%s: disconnecting because %s', self.account,
+                         item.get('message'))
+
+            if item['code'] == 88:
+                statsd.incr('api.twitter.messages.rate_exceeded')
+
+            return True
+
+        else:
+            LOGGER.warning(u'%s: unhandled item: %s', self.account, item)
+
+            statsd.incr('api.twitter.items.unhandled')
+
+        return False
+
+    def flush(self):
+        """ Create the buffered tweets, then update the feeds once.
+
+        A tweet matched by many feeds is created once, with all of them.
+        Return the number of tweets handled.
+        """
+
+        if not self.buffer:
+            return 0
+
+        latest_ids = {}
+
+        for tweet_id, (item, feeds_ids) in self.buffer.items():
+            try:
+                Tweet.create_tweet(item, [self.feeds[feed_id]
+                                          for feed_id in feeds_ids])
+
+            except:
+                LOGGER.exception(u'%s: could not create tweet #%s.',
+                                 self.account, tweet_id)
+                continue
+
+            for feed_id in feeds_ids:
+                if tweet_id > latest_ids.get(feed_id, 0):
+                    latest_ids[feed_id] = tweet_id
+
+        count = len(self.buffer)
+        self.buffer.clear()
+
+        for feed_id, tweet_id in latest_ids.items():
+            feed = self.feeds[feed_id]
+            latest_id = feed.latest_id
+
+            if latest_id is None or tweet_id > latest_id:
+                feed.set_latest_id(tweet_id)
+
+            feed.update_last_fetch()
+            feed.save()
+
+        return count
+
+    def consume(self, must_reload=None, lock=None):
+        """ Stream until disconnection or until :param:`must_reload`.
+
+        :param must_reload: a function called every
+            ``TWITTER_STREAM_RELOAD_INTERVAL`` seconds. If it returns
+            ``True``, the stream is flushed and closed, to be rebuilt
+            by the caller.
+        :param lock: an optional :class:`RedisExpiringLock`, refreshed
+            while streaming. If it was lost and someone else took it,
+            the stream stops.
+
+        Return the number of tweets handled.
+        """
+
+        if not self.feeds:
+            return 0
+
+        batch_size   = config.TWITTER_STREAM_BATCH_SIZE
+        batch_delay  = config.TWITTER_STREAM_BATCH_DELAY
+        reload_delay = config.TWITTER_STREAM_RELOAD_INTERVAL
+
+        last_flush  = last_reload = last_lock = time.time()
+        handled     = 0
+
+        if lock is not None:
+            # Refresh it well before it expires.
+            lock_delay = lock.expire_time / 3.0
+
+        LOGGER.info(u'%s: streaming for %s feed(s) with %s.', self.account,
+                    len(self.feeds), u', '.join(
+                        u'{0}: {1}'.format(k, v)
+                        for k, v in self.parameters.items()))
+
+        try:
+            for item in self.transport.stream('statuses/filter',
+                                              self.parameters):
+
+                if self.handle_item(item):
+                    break
+
+                mynow = time.time()
+
+                if len(self.buffer) >= batch_size \
+                        or mynow - last_flush >= batch_delay:
+                    handled += self.flush()
+                    last_flush = mynow
+
+                if lock is not None and mynow - last_lock >= lock_delay:
+                    last_lock = mynow
+
+                    if not lock.refresh() and not lock.acquire():
+                        LOGGER.warning(u'%s: stream lock taken by another '
+                                       u'worker, exiting.', self.account)
+                        break
+
+                if mynow - last_reload >= reload_delay:
+                    last_reload = mynow
+
+                    if config.FEED_FETCH_TWITTER_DISABLED:
+                        LOGGER.warning(u'%s: exiting because config.'
+                                       u'FEED_FETCH_TWITTER_DISABLED is '
+                                       u'now true.', self.account)
+                        break
+
+                    if must_reload is not None and must_reload():
+                        break
+
+        finally:
+            handled += self.flush()
+
+        return handled
+
+
+# ———————————————————————————————————————————————————————————————— Celery tasks
+
+
+def twitteraccount_stream_lock(account, lock_value=None):
+    """ Return the lock of the multiplexed stream of an account.
+
+    Its expiry is short; the running stream refreshes it. This way,
+    a dead worker doesn't block the account stream for long.
+
+    :param lock_value: unique to the stream task holding the lock,
+        for :meth:`~RedisExpiringLock.refresh` to notice when another
+        task took it over after an expiry.
+    """
+
+    return RedisExpiringLock(account, lock_name='stream',
+                             lock_value=lock_value,
+                             expire_time=config.TWITTER_STREAM_LOCK_EXPIRY)
+
+
+def stream_feeds_of_account(account):
+    """ Return the active filter feeds streamed through an account. """
+
+    return [feed for feed in TwitterFeed.objects.filter(
+            is_active=True, is_internal=False, is_timeline=False,
+            uri=None, user_id=account.user_id).prefetch_related('account')
+            if feed.is_filter_stream
+            and feed.stream_account_id() == account.id]
+
+
+@task(queue='permanent')
+def twitteraccount_stream_task(account_id, transport=None):
+    """ Consume the filter stream of all the feeds of a Twitter account.
+
+    Launched by :meth:`TwitterFeed.refresh_feed_internal`; only one
+    runs per account, others exit right away. The running consumer
+    picks new or changed feeds at its next reload. Feeds that don't
+    fit in the stream limits are consumed on their own.
+
+    :param transport: only for direct calls (eg. tests), it
+        cannot go through the celery serializer.
+    """
+
+    account = TwitterAccount.objects.get(id=account_id)
+
+    lock = twitteraccount_stream_lock(account, lock_value=uuid.uuid4().hex)
+
+    if not lock.acquire():
+        LOGGER.info(u'%s: stream already consumed, exiting.', account)
+        return
+
+    relaunch = False
+    overflow = set()
+    feeds    = stream_feeds_of_account(account)
+
+    statsd.incr('api.twitter.actions.consume')
+
+    try:
+        while feeds and not config.FEED_FETCH_TWITTER_DISABLED:
+
+            multiplexer = TwitterStreamMultiplexer(account, feeds,
+                                                   transport=transport)
+
+            for feed in multiplexer.overflow:
+                if feed.id in overflow:
+                    continue
+
+                overflow.add(feed.id)
+
+                LOGGER.warning(u'%s: %s does not fit in the stream '
+                               u'limits, consuming it on its own.',
+                               account, feed)
+                twitterfeed_consume_task.delay(feed.id)
+
+            signature = TwitterStreamMultiplexer.signature(feeds)
+            reloaded  = []
+
+            def must_reload():
+                current = stream_feeds_of_account(account)
+
+                if TwitterStreamMultiplexer.signature(current) != signature:
+                    reloaded.append(current)
+                    return True
+
+                return False
+
+            multiplexer.consume(must_reload=must_reload, lock=lock)
+
+            if not reloaded:
+                # Disconnected by Twitter, a network error or the
+                # configuration. The global refresher will relaunch
+                # us via the feeds refresh, which gives some slack.
+                break
+
+            feeds = reloaded[0]
+
+    except SoftTimeLimitExceeded:
+        LOGGER.info(u'%s: time limit reached, terminating '
+                    u'to let things flow.', account)
+        relaunch = True
+
+    finally:
+        lock.release()
+
+        # Let the global refresher relaunch them if we don't.
+        # Overflowing feeds are still consumed on their own.
+        for feed in stream_feeds_of_account(account):
+            if feed.id not in overflow:
+                feed.refresh_lock.release()
+
+    if relaunch and not config.FEED_FETCH_TWITTER_DISABLED:
+        twitteraccount_stream_task.apply_async(args=(account_id, ),
+                                               countdown=5)
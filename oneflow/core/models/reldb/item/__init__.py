@@ -23,6 +23,8 @@ from common import *  # NOQA
 
 from base import *  # NOQA
 
+from rendered import *  # NOQA
+
 from abstract import *  # NOQA
 
 # from document import (  # NOQA
@@ -22,8 +22,9 @@
 import logging
 
 import re
+import difflib
+import hashlib
 import mistune
-import requests
 import html2text
 
 from statsd import statsd
@@ -59,6 +60,9 @@ from ...common import (
 )
 from ...website import WebSite
 from ..base import BaseItemQuerySet  # BaseItem,
+from ..rendered import ItemHTML
+
+from url import fetch_url_response
 
 
 LOGGER = logging.getLogger(__name__)
@@ -66,6 +70,9 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'ContentItem',
+    'item_html',
+    'item_html_key',
+    'render_item_html',
 
     # tasks will be added by register_task_method()
 ]
@@ -504,8 +511,8 @@ class ContentItem(models.Model):
             if ghost is None:
                 LOGGER.warning(u'Ghost module is not available, content of '
                                u'article %s will be incomplete.', self)
-                return requests.get(fetch_url,
-                                    headers=REQUEST_BASE_HEADERS).content
+                return fetch_url_response(
+                    fetch_url, headers=REQUEST_BASE_HEADERS).content
 
                 # The lock will raise an exception if it is already acquired.
                 with global_ghost_lock:
@@ -517,7 +524,8 @@ class ContentItem(models.Model):
                     #
                     return page
 
-        response = requests.get(fetch_url, headers=REQUEST_BASE_HEADERS)
+        response = fetch_url_response(fetch_url,
+                                      headers=REQUEST_BASE_HEADERS)
 
         content_type = response.headers.get('content-type', u'unspecified')
 
@@ -594,6 +602,9 @@ class ContentItem(models.Model):
         if commit:
             self.save()
 
+        # The hash-based key makes this safe even if not committed.
+        self.cache_html()
+
         with statsd.pipeline() as spipe:
             spipe.gauge('articles.counts.html', -1, delta=True)
             spipe.gauge('articles.counts.markdown', 1, delta=True)
@@ -681,4 +692,128 @@ class ContentItem(models.Model):
             if commit:
                 self.save()
 
+                # Else, our caller will do it after other changes.
+                self.cache_html()
+
+    def cache_html(self):
+        """ Render our HTML now, for readers not to wait for it. """
+
+        try:
+            item_html(self, force=True)
+
+        except:
+            LOGGER.exception(u'Could not cache HTML of %s #%s.',
+                             self._meta.verbose_name, self.id)
+
+
+# ——————————————————————————————————————————————————————————— HTML rendering
+
+# Bump this when render_item_html() output changes,
+# for the already cached HTML not to be served anymore.
+HTML_RENDERER_VERSION = 1
+
+
+def render_item_html(item):
+    """ Return the HTML of an item Markdown content, or ``None``.
+
+    This is the slow part; use :func:`item_html` to benefit from
+    the cache.
+    """
+
+    if item.content_type != CONTENT_TYPES.MARKDOWN \
+            or len(item.content) <= config.READ_ARTICLE_MIN_LENGTH:
+        return None
+
+    transient_content = item.content
+
+    if isinstance(item, ContentItem):
+        # START temporary measure.
+        # TODO: please get rid of this…
+
+        title_len = len(item.name)
+
+        if title_len > 10:
+            search_len = title_len * 2
+
+            diff = difflib.SequenceMatcher(None,
+                                           item.content[:search_len],
+                                           item.name)
+
+            if diff.ratio() > 0.51:
+                for blk in reversed(diff.matching_blocks):
+                    # Sometimes, last match is the empty string… Skip.
+                    if blk[-1] != 0:
+                        transient_content = item.content[
+                            blk[0] + blk[2]:
+                        ]
+                        break
+
+        # END temporary measure.
+
+    try:
+        # On large screens, make the article start a little far from
+        # the top of the screen, it makes a better reading experience.
+        return (u'<div class="spacer50 visible-lg"></div>'
+                + mistune.markdown(transient_content))
+
+    except:
+        LOGGER.exception(u'Live Markdown to HTML conversion '
+                         u'failed for item %s, trying '
+                         u'alternate parser.', item)
+
+        try:
+            return (u'<div class="spacer50 visible-lg"></div>'
+                    + mk2_markdown(transient_content))
+
+        except:
+            LOGGER.exception(u'Alternate live Markdown to HTML '
+                             u'conversion failed for item %s', item)
+            return None
+
+
+def item_html_key(item):
+    """ Return what the HTML of an item depends on, in 64 characters.
+
+    This includes its name (used to strip the title from the content),
+    its content and :data:`HTML_RENDERER_VERSION`.
+    """
+
+    content_hash = hashlib.md5(item.name.encode('utf-8'))
+    content_hash.update(b'\0')
+    content_hash.update(item.content.encode('utf-8'))
+
+    return u'{0}:{1}'.format(content_hash.hexdigest(), HTML_RENDERER_VERSION)
+
+
+def item_html(item, force=False):
+    """ Return the HTML of an item content, stored if possible.
+
+    It is stored in the database, one :class:`ItemHTML` per item,
+    under the key given by :func:`item_html_key`. A change of name,
+    content or renderer thus never serves stale HTML, and replaces
+    the previous one.
+
+    :param force: render and store again, even if already stored.
+    """
+
+    if item.content_type != CONTENT_TYPES.MARKDOWN \
+            or len(item.content) <= config.READ_ARTICLE_MIN_LENGTH:
+        return None
+
+    key = item_html_key(item)
+
+    if not force:
+        html = ItemHTML.get_html(item.id, key)
+
+        if html is not None:
+            return html
+
+    html = render_item_html(item)
+
+    if html is not None:
+        ItemHTML.set_html(item.id, key, html)
+
+    return html
+
+
 # ———————————————————————————————————————————————————————————————— Celery Tasks
@@ -18,10 +18,14 @@
     License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 """
+import json
+import hashlib
 import logging
 
 import requests
 
+from requests.structures import CaseInsensitiveDict
+
 from statsd import statsd
 from constance import config
 
@@ -40,6 +44,7 @@ from oneflow.base.utils.http import clean_url
 # from oneflow.base.utils.dateutils import now
 
 # from ...common import REQUEST_BASE_HEADERS
+from ...common import REDIS
 from ...website import WebSite
 
 from ..base import BaseItem, BaseItemQuerySet
@@ -49,6 +54,10 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'UrlItem',
+    'DuplicateUrl',
+    'HandedOffResponse',
+    'resolve_redirect',
+    'fetch_url_response',
 
     # tasks will be added by register_task_method()
 ]
@@ -80,11 +89,8 @@ class DuplicateUrl(models.Model):
         if clean:
             url = clean_url(url)
 
-        try:
-            return cls.objects.get(url=url).values('real_url')
-
-        except:
-            return None
+        return cls.objects.filter(url=url).values_list(
+            'real_url', flat=True).first()
 
     @classmethod
     def record_duplicate(cls, dupe, real):
@@ -94,6 +100,150 @@ class DuplicateUrl(models.Model):
         url.save()
 
 
+# ——————————————————————————————————————————————————— Redirects & page hand-off
+
+# Shared by all workers: {clean URL: final clean URL}, and the
+# final page downloaded by the absolutization, for the processors.
+REDIRECT_CACHE_KEY = 'rdr:{0}'
+HANDOFF_KEY = 'ho:{0}'
+
+
+def url_hash(url):
+    """ Return a fixed-length key part for :param:`url`. """
+
+    if isinstance(url, unicode):
+        url = url.encode('utf-8')
+
+    return hashlib.md5(url).hexdigest()
+
+
+def resolve_redirect(url):
+    """ Return the known final URL of :param:`url`, without network call.
+
+    Return ``None`` if the final URL is unknown.
+    """
+
+    url = clean_url(url)
+
+    final_url = REDIS.get(REDIRECT_CACHE_KEY.format(url_hash(url)))
+
+    if final_url is None:
+        return DuplicateUrl.resolve(url)
+
+    return final_url.decode('utf-8')
+
+
+def record_redirects(response, final_url):
+    """ Remember where each redirect hop of :param:`response` leads. """
+
+    if not response.history:
+        return
+
+    ttl = config.ARTICLE_REDIRECT_CACHE_TTL
+
+    with REDIS.pipeline() as pipe:
+        for hop in response.history:
+            hop_url = clean_url(hop.url)
+
+            if hop_url != final_url:
+                pipe.setex(REDIRECT_CACHE_KEY.format(url_hash(hop_url)),
+                           ttl, final_url.encode('utf-8'))
+
+        pipe.execute()
+
+
+class HandedOffResponse(object):
+
+    """ The part of a :mod:`requests` response the processors use.
+
+    It is rebuilt from the page stored by :func:`hand_off_response`.
+    """
+
+    def __init__(self, url, status_code, headers, content, encoding=None):
+        """ Hello, response. """
+
+        self.url         = url
+        self.status_code = status_code
+        self.headers     = CaseInsensitiveDict(headers)
+        self.content     = content
+        self.encoding    = encoding
+        self.history     = []
+
+    @property
+    def ok(self):
+        """ Same as requests'. """
+
+        return self.status_code < 400
+
+
+def hand_off_response(response, final_url):
+    """ Keep the HTML page of :param:`response` for the processing chain.
+
+    Other contents (images, videos…) are not even downloaded. Pages
+    bigger than ``config.ARTICLE_HANDOFF_MAX_SIZE`` are not kept.
+    """
+
+    max_size = config.ARTICLE_HANDOFF_MAX_SIZE
+
+    if not max_size or not response.headers.get(
+            'content-type', u'').startswith(u'text/html'):
+        return
+
+    try:
+        if int(response.headers.get('content-length', 0)) > max_size:
+            return
+
+    except ValueError:
+        pass
+
+    content = response.content
+
+    if len(content) > max_size:
+        return
+
+    key = HANDOFF_KEY.format(url_hash(final_url))
+
+    with REDIS.pipeline() as pipe:
+        pipe.hmset(key, {
+            'url': response.url.encode('utf-8'),
+            'status_code': response.status_code,
+            'headers': json.dumps(dict(response.headers)),
+            'encoding': response.encoding or '',
+            'content': content,
+        })
+        pipe.expire(key, config.ARTICLE_HANDOFF_TTL)
+        pipe.execute()
+
+
+def fetch_url_response(url, headers=None):
+    """ Return the page of :param:`url`, preferably without downloading it.
+
+    If the absolutization of the article just downloaded it, return
+    it as a :class:`HandedOffResponse`, and forget it. Else, download
+    it with ``requests.get()``. Processors should use this function
+    instead of downloading article pages themselves.
+    """
+
+    key = HANDOFF_KEY.format(url_hash(url))
+
+    # The page is handed off once: don't keep it for nothing.
+    with REDIS.pipeline() as pipe:
+        pipe.hgetall(key)
+        pipe.delete(key)
+        stored, _ = pipe.execute()
+
+    if stored:
+        return HandedOffResponse(
+            url=stored['url'].decode('utf-8'),
+            status_code=int(stored['status_code']),
+            headers=json.loads(stored['headers']),
+            content=stored['content'],
+            encoding=stored['encoding'] or None,
+        )
+
+    return requests.get(url, headers=headers)
+
+
 # ——————————————————————————————————————————————————————————— QuerySet patching
 
 
@@ -313,51 +463,13 @@ class UrlItem(models.Model):
 
         return False
 
-    def absolutize_url(self, requests_response=None, force=False, commit=True):
-        """ Make the current article URL absolute.
-
-        Eg. transform:
-
-        http://feedproxy.google.com/~r/francaistechcrunch/~3/hEIhLwVyEEI/
-
-        into:
+    def absolutize_url_check_response(self, requests_response):
+        """ Return the final URL of a response, or ``None`` on HTTP error.
 
-        http://techcrunch.com/2013/05/18/hell-no-tumblr-users-wont-go-to-yahoo/ # NOQA
-            ?utm_source=feeurner&utm_medium=feed&utm_campaign=Feed%3A+francaistechcrunch+%28TechCrunch+en+Francais%29 # NOQA
-
-        and then remove all these F*G utm_* parameters to get a clean
-        final URL for the current article.
-
-        Returns ``True`` if the operation succeeded, ``False`` if the
-        absolutization pointed out that the current article is a
-        duplicate of another. In this case the caller should stop its
-        processing because the current article will be marked for deletion.
-
-        Can also return ``None`` if absolutizing is disabled globally
-        in ``constance`` configuration.
+        Redirect hops are remembered for :func:`resolve_redirect`, and
+        the final page is handed off to the processing chain.
         """
 
-        # Another example: http://rss.lefigaro.fr/~r/lefigaro/laune/~3/7jgyrQ-PmBA/story01.htm # NOQA
-
-        if self.absolutize_url_must_abort(force=force, commit=commit):
-            return
-
-        if requests_response is None:
-            try:
-                requests_response = requests.get(self.url)
-
-            except requests.ConnectionError as e:
-                statsd.gauge('articles.counts.url_errors', 1, delta=True)
-                message = u'Connection error while absolutizing “%s”: %s'
-                args = (self.url, str(e), )
-
-                self.url_error = message % args
-                # Don't waste a version just for that.
-                self.save_without_historical_record()
-
-                LOGGER.error(message, *args)
-                return
-
         if not requests_response.ok or requests_response.status_code != 200:
 
             message = u'HTTP Error %s while absolutizing “%s”: %s'
@@ -383,7 +495,7 @@ class UrlItem(models.Model):
             self.save_without_historical_record()
 
             LOGGER.error(message, *args)
-            return
+            return None
 
         #
         # NOTE: we could also get it eventually from r.headers['link'],
@@ -400,6 +512,78 @@ class UrlItem(models.Model):
 
         final_url = clean_url(requests_response.url)
 
+        record_redirects(requests_response, final_url)
+        hand_off_response(requests_response, final_url)
+
+        return final_url
+
+    def absolutize_url(self, requests_response=None, force=False, commit=True):
+        """ Make the current article URL absolute.
+
+        Eg. transform:
+
+        http://feedproxy.google.com/~r/francaistechcrunch/~3/hEIhLwVyEEI/
+
+        into:
+
+        http://techcrunch.com/2013/05/18/hell-no-tumblr-users-wont-go-to-yahoo/ # NOQA
+            ?utm_source=feeurner&utm_medium=feed&utm_campaign=Feed%3A+francaistechcrunch+%28TechCrunch+en+Francais%29 # NOQA
+
+        and then remove all these F*G utm_* parameters to get a clean
+        final URL for the current article.
+
+        Returns ``True`` if the operation succeeded, ``False`` if the
+        absolutization pointed out that the current article is a
+        duplicate of another. In this case the caller should stop its
+        processing because the current article will be marked for deletion.
+
+        Can also return ``None`` if absolutizing is disabled globally
+        in ``constance`` configuration.
+        """
+
+        # Another example: http://rss.lefigaro.fr/~r/lefigaro/laune/~3/7jgyrQ-PmBA/story01.htm # NOQA
+
+        if self.absolutize_url_must_abort(force=force, commit=commit):
+            return
+
+        final_url = None
+
+        if requests_response is None:
+            final_url = resolve_redirect(self.url)
+
+        if final_url is None:
+            if requests_response is None:
+                try:
+                    # Streamed: non-HTML bodies are never downloaded.
+                    requests_response = requests.get(self.url, stream=True)
+
+                except requests.ConnectionError as e:
+                    statsd.gauge('articles.counts.url_errors', 1, delta=True)
+                    message = u'Connection error while absolutizing “%s”: %s'
+                    args = (self.url, str(e), )
+
+                    self.url_error = message % args
+                    # Don't waste a version just for that.
+                    self.save_without_historical_record()
+
+                    LOGGER.error(message, *args)
+                    return
+
+            try:
+                final_url = self.absolutize_url_check_response(
+                    requests_response)
+
+            finally:
+                requests_response.close()
+
+            if final_url is None:
+                return
+
+        else:
+            LOGGER.info(u'%s #%s: final URL of %s already known, '
+                        u'no network call.', self._meta.model.__name__,
+                        self.id, self.url)
+
         # LOGGER.info(u'\n\nFINAL: %s vs. ORIG: %s\n\n', final_url, self.url)
 
         if final_url != self.url:
@@ -74,12 +74,30 @@ MIGRATION_DATETIME = datetime(2014, 11, 1)
 
 __all__ = [
     'Article',
+    'ArticlesBatchException',
     'create_article_from_url',
 
     # Tasks will be added below.
 ]
 
 
+class ArticlesBatchException(Exception):
+
+    """ Raised when :meth:`Article.create_articles` fails midway.
+
+    :attr:`created` is a ``{entry index: article ID}`` dict of the
+    articles created before the failure. They are already linked to
+    their feed and tags, and their processing has been started.
+    """
+
+    def __init__(self, message, created):
+        """ Keep the created articles for the caller. """
+
+        super(ArticlesBatchException, self).__init__(message)
+
+        self.created = created
+
+
 def create_article_from_url(url, feeds, origin):
     """ Create an article from a web url, in feeds, with an origin. """
 
@@ -447,6 +465,316 @@ class Article(BaseItem, UrlItem, ContentItem):
 
         return article, created_retval
 
+    @classmethod
+    def create_articles(cls, entries, feed):
+        """ Create many articles of one feed at once, in a few queries.
+
+        This is the batch version of :meth:`create_article`, used when
+        a whole feed fetch is ingested. :param:`entries` is a list of
+        dicts with the same keys as the :meth:`create_article` arguments
+        (``title``, ``url``, ``tags`` and the other keyword arguments).
+
+        Return a list of ``(article, created)`` tuples, in the same
+        order as :param:`entries`. ``created`` has the same meaning
+        as in :meth:`create_article`. If an entry could not be created,
+        its tuple is ``(None, False)``.
+
+        Existing URLs are resolved in one query, feed membership in
+        another, and feeds/tags links of all articles are inserted
+        at once. New articles are still created one by one, because
+        Django cannot ``bulk_create()`` multi-table inherited models.
+
+        The processing of new articles (absolutization, reads…) is
+        started only once they are linked to their feed, else reads
+        could be created before the feed link exists.
+
+        If anything fails after articles were created, raise an
+        :class:`ArticlesBatchException`.
+        """
+
+        feeds = [feed]
+        prepared = []
+
+        for entry in entries:
+            kwargs = entry.copy()
+            title = kwargs.pop('title')
+            url = kwargs.pop('url')
+            tags = kwargs.pop('tags', [])
+
+            if url is None:
+                # See create_article() for why orphaned
+                # articles get a reproducible URL.
+                url = ARTICLE_ORPHANED_BASE + generate_orphaned_hash(
+                    title, feeds)
+
+                defaults = {
+                    'name': title,
+                    'is_orphaned': True,
+                    'url_absolute': True
+                }
+
+            else:
+                url = clean_url(url)
+                defaults = {'name': title}
+
+            defaults.update(kwargs)
+            prepared.append((url, defaults, tags))
+
+        # ——————————————————————————————————————— Resolve what already exists
+
+        existing = dict(
+            (url, duplicate_of_id or article_id)
+            for url, article_id, duplicate_of_id in cls.objects.filter(
+                url__in=[p[0] for p in prepared]).values_list(
+                    'url', 'id', 'duplicate_of_id')
+        )
+
+        feed_items_through = feed.items.through
+
+        already_in_feed = set(feed_items_through.objects.filter(
+            basefeed_id=feed.id,
+            baseitem_id__in=existing.values()).values_list(
+                'baseitem_id', flat=True))
+
+        results = []
+        seen_urls = {}
+
+        # {entry index: article ID}
+        created = {}
+
+        for index, (url, defaults, tags) in enumerate(prepared):
+
+            if url in seen_urls:
+                # The feed holds the same entry twice.
+                results.append((seen_urls[url], False))
+                continue
+
+            if url in existing:
+                article_id = existing[url]
+                created_retval = (False if article_id in already_in_feed
+                                  else None)
+
+            else:
+                article = cls(url=url, **defaults)
+
+                # Started below, see dispatch_post_create().
+                article.defer_post_create = True
+
+                try:
+                    with transaction.atomic():
+                        article.save(force_insert=True)
+
+                except IntegrityError:
+                    # Another worker was faster than us.
+                    try:
+                        article = cls.objects.get(url=url)
+
+                    except:
+                        LOGGER.exception(u'Article creation failed in '
+                                         u'feed %s.', feed)
+                        results.append((None, False))
+                        continue
+
+                    article_id = article.duplicate_of_id or article.id
+                    created_retval = None
+
+                except:
+                    LOGGER.exception(u'Article creation failed in feed %s.',
+                                     feed)
+                    results.append((None, False))
+                    continue
+
+                else:
+                    article_id = article.id
+                    created_retval = True
+                    created[index] = article_id
+
+                    LOGGER.info(u'Created %sarticle %s in feed %s.',
+                                u'orphaned ' if article.is_orphaned
+                                else u'', article_id, _format_feeds(feeds))
+
+            seen_urls[url] = article_id
+            results.append((article_id, created_retval))
+
+        try:
+            return cls.create_articles_finish(feed, prepared,
+                                              results, created)
+
+        except:
+            LOGGER.exception(u'Batch articles creation failed in feed %s '
+                             u'after %s articles were created.',
+                             feed, len(created))
+
+            articles = cls.objects.in_bulk(created.values())
+
+            for index, article_id in created.items():
+                article = articles.get(article_id)
+
+                if article is None:
+                    continue
+
+                tags = prepared[index][2]
+
+                try:
+                    with transaction.atomic():
+                        article.feeds.add(feed)
+
+                        if tags:
+                            article.tags.add(*tags)
+
+                except:
+                    LOGGER.exception(u'Could not add feed/tags to article '
+                                     u'%s', article.id)
+
+                dispatch_post_create(article)
+
+            raise ArticlesBatchException(
+                u'Batch creation failed in feed {0}'.format(feed), created)
+
+    @classmethod
+    def create_articles_finish(cls, feed, prepared, results, created):
+        """ Link, count and start the articles of :meth:`create_articles`.
+
+        Internal method; do not use directly.
+        """
+
+        feeds = [feed]
+
+        # ——————————————————————————— Hydrate, and catch on-the-fly duplicates
+
+        articles = dict(
+            (article.id, article) for article in cls.objects.filter(
+                id__in=set(r[0] for r in results if r[0] is not None)))
+
+        masters_ids = set(a.duplicate_of_id for a in articles.values()
+                          if a.duplicate_of_id)
+
+        if masters_ids:
+            articles.update((article.id, article)
+                            for article in cls.objects.filter(
+                                id__in=masters_ids))
+
+        final_results = []
+        links = {}
+
+        for (article_id, created_retval), (url, defaults, tags) in zip(
+                results, prepared):
+
+            if article_id is None:
+                final_results.append((None, False))
+                continue
+
+            article = articles[article_id]
+
+            if article.duplicate_of_id:
+                LOGGER.info(u'Swaping duplicate %s %s for master %s on '
+                            u'the fly.', article._meta.verbose_name,
+                            article.id, article.duplicate_of_id)
+
+                article = articles[article.duplicate_of_id]
+                created_retval = False
+
+            if created_retval is None:
+                LOGGER.info(u'Mutualized article %s in feed(s) %s.',
+                            article.id, _format_feeds(feeds))
+
+            elif created_retval is False:
+                LOGGER.info(u'Duplicate article %s in feed(s) %s.',
+                            article.id, _format_feeds(feeds))
+
+            if created_retval is not True and article.date_published is None:
+                # See create_article() for this special case.
+                date_published = defaults.get('date_published', None)
+
+                if date_published is not None:
+                    article.date_published = date_published
+                    article.save()
+
+            links.setdefault(article.id, set()).update(
+                tag.id for tag in tags)
+
+            final_results.append((article, created_retval))
+
+        # ——————————————————————————————————————————— Feeds & tags, in bulk
+
+        cls.bulk_link_feed_and_tags(feed, links)
+
+        # Now that the feed links exist, new articles can be processed.
+        for article_id in created.values():
+            dispatch_post_create(articles[article_id])
+
+        # Reads of mutualized articles, once their feed link exists.
+        for article, created_retval in final_results:
+            if created_retval is None:
+                article.create_reads(feeds=feeds)
+
+        return final_results
+
+    @classmethod
+    def bulk_link_feed_and_tags(cls, feed, links):
+        """ Insert all missing feed and tags relations at once.
+
+        :param links: a dict of ``{article_id: set(tags_ids)}``.
+
+        In case of a concurrent insertion, we fall back to the
+        standard ``add()`` which already handles existing rows.
+        """
+
+        if not links:
+            return
+
+        articles_ids = links.keys()
+
+        feed_items_through = feed.items.through
+        tags_through = cls.tags.through
+
+        existing_feed_links = set(feed_items_through.objects.filter(
+            basefeed_id=feed.id, baseitem_id__in=articles_ids).values_list(
+                'baseitem_id', flat=True))
+
+        tags_ids = set()
+
+        for article_tags_ids in links.values():
+            tags_ids |= article_tags_ids
+
+        existing_tags_links = set(tags_through.objects.filter(
+            baseitem_id__in=articles_ids,
+            simpletag_id__in=tags_ids).values_list(
+                'baseitem_id', 'simpletag_id')) if tags_ids else set()
+
+        try:
+            with transaction.atomic():
+                feed_items_through.objects.bulk_create([
+                    feed_items_through(basefeed_id=feed.id,
+                                       baseitem_id=article_id)
+                    for article_id in articles_ids
+                    if article_id not in existing_feed_links
+                ])
+
+                tags_through.objects.bulk_create([
+                    tags_through(baseitem_id=article_id,
+                                 simpletag_id=tag_id)
+                    for article_id, article_tags_ids in links.items()
+                    for tag_id in article_tags_ids
+                    if (article_id, tag_id) not in existing_tags_links
+                ])
+
+        except IntegrityError:
+            LOGGER.warning(u'Concurrent feed/tags links insertion for feed '
+                           u'%s, falling back to one-by-one.', feed)
+
+            for article in cls.objects.filter(id__in=articles_ids):
+                try:
+                    with transaction.atomic():
+                        article.feeds.add(feed)
+
+                        if links[article.id]:
+                            article.tags.add(*links[article.id])
+
+                except:
+                    LOGGER.exception(u'Could not add feed/tags to article %s',
+                                     article.id)
+
     def post_create_task(self, apply_now=False):
         """ Method meant to be run from a celery task. """
 
@@ -598,17 +926,24 @@ def article_post_save(instance, **kwargs):
             if article.content_error:
                 spipe.gauge('articles.counts.content_error', 1, delta=True)
 
-        # Some articles are created "already orphaned" or duplicates.
-        # In the archive database this is more immediate than looking
-        # up the database name.
-        if not (article.is_orphaned or article.duplicate_of):
+        if not getattr(article, 'defer_post_create', False):
+            dispatch_post_create(article)
+
+
+def dispatch_post_create(article):
+    """ Start the processing chain of a new article. """
+
+    # Some articles are created "already orphaned" or duplicates.
+    # In the archive database this is more immediate than looking
+    # up the database name.
+    if not (article.is_orphaned or article.duplicate_of_id):
 
-            # MIGRATION: remove this "if".
-            if article.date_created >= MIGRATION_DATETIME:
+        # MIGRATION: remove this "if".
+        if article.date_created >= MIGRATION_DATETIME:
 
-                # HEADS UP: this task name will be registered later
-                # by the register_task_method() call.
-                article_post_create_task.delay(article.id)  # NOQA
+            # HEADS UP: this task name will be registered later
+            # by the register_task_method() call.
+            article_post_create_task.delay(article.id)  # NOQA
 
 
 def article_pre_delete(instance, **kwargs):
@@ -21,14 +21,17 @@
 
 import logging
 
+from collections import defaultdict
+
+from celery import task
 # from statsd import statsd
-# from constance import config
+from constance import config
 
 from humanize.time import naturaldelta
 from humanize.i18n import django_language
 
 # from django.conf import settings
-from django.db import models, IntegrityError
+from django.db import models, IntegrityError, transaction, connection
 from django.utils.translation import ugettext_lazy as _
 # from django.utils.text import slugify
 from django.contrib.contenttypes import generic
@@ -45,6 +48,7 @@ from oneflow.base.utils import register_task_method
 from ..common import (
     DjangoUser as User,
     ORIGINS,
+    DUPLICATE_STATUS,
 )
 
 from ..language import AbstractLanguageAwareModel
@@ -65,12 +69,110 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'BaseItem',
+    'parse_search_query',
+    'search_items_sql',
+    'search_index_items_batch',
+    'baseitem_search_index',
 
     # 'baseitem_pre_save',
     # Task methods will be added by register_task_method()
 ]
 
 
+# The PostgreSQL text search configuration of the items search vector,
+# maintained by triggers (see migration 0122). Queries must use the same.
+SEARCH_CONFIG = u'simple'
+
+
+# ————————————————————————————————————————————————————————————————————— Search
+
+
+def parse_search_query(search):
+    """ Split a search query into ``(included, excluded)`` terms lists.
+
+    ``+term`` and plain terms must all be present, ``-term`` must not.
+    """
+
+    included = []
+    excluded = []
+
+    for term in search.split():
+        if term.startswith(u'-'):
+            if term[1:]:
+                excluded.append(term[1:])
+
+        elif term.startswith(u'+'):
+            if term[1:]:
+                included.append(term[1:])
+
+        else:
+            included.append(term)
+
+    return included, excluded
+
+
+def search_items_sql(search):
+    """ Return ``(sql, params)`` selecting the IDs of items matching a search.
+
+    The included terms are tested in one GIN-indexed ``@@`` operation.
+    Excluded terms only filter its result. A search without any included
+    term matches nothing: excluded terms alone would scan all items.
+    """
+
+    included, excluded = parse_search_query(search)
+
+    table = BaseItem._meta.db_table
+
+    if not included:
+        return u'SELECT id FROM {0} WHERE false'.format(table), []
+
+    where = [u'search_vector @@ plainto_tsquery(%s, %s)']
+    params = [SEARCH_CONFIG, u' '.join(included)]
+
+    for term in excluded:
+        where.append(u'NOT coalesce(search_vector @@ '
+                     u'plainto_tsquery(%s, %s), false)')
+        params.extend([SEARCH_CONFIG, term])
+
+    return u'SELECT id FROM {0} WHERE {1}'.format(
+        table, u' AND '.join(where)), params
+
+
+def search_index_items_batch(last_id=0, batch_size=None):
+    """ Index the next ``batch_size`` items after ``last_id`` for search.
+
+    New and modified items are indexed by the database triggers (see
+    migration 0122); this is for the ones which existed before. Each
+    batch is committed on its own.
+
+    :returns: the ID of the last item indexed, or ``None`` if there
+        was no item left.
+    """
+
+    if batch_size is None:
+        batch_size = config.SEARCH_INDEX_BATCH_SIZE
+
+    table = BaseItem._meta.db_table
+
+    with transaction.atomic():
+        cursor = connection.cursor()
+
+        cursor.execute(u'SELECT max(id) FROM (SELECT id FROM {0} '
+                       u'WHERE id > %s ORDER BY id LIMIT %s) AS batch'.format(
+                           table), [last_id, batch_size])
+
+        batch_last_id = cursor.fetchone()[0]
+
+        if batch_last_id is None:
+            return None
+
+        cursor.execute(u'SELECT core_baseitem_search_vector_update(id) '
+                       u'FROM {0} WHERE id > %s AND id <= %s'.format(table),
+                       [last_id, batch_last_id])
+
+    return batch_last_id
+
+
 # ———————————————————————————————————————————————————————————————————— Managers
 
 
@@ -96,6 +198,15 @@ class BaseItemQuerySet(PolymorphicQuerySet):
     def duplicate(self):
         return self.exclude(duplicate_of_id=None)
 
+    def search(self, search):
+        """ Full-text search, see :func:`parse_search_query`. """
+
+        sql, params = search_items_sql(search)
+
+        return self.extra(where=[u'{0}.{1} IN ({2})'.format(
+            self.model._meta.db_table, self.model._meta.pk.column, sql)],
+            params=params)
+
     def created_previous_hour(self):
         """ Return items created between 61 and 120 minutes inclusive. """
 
@@ -526,6 +637,105 @@ class BaseItem(PolymorphicModel,
 
         return all_went_ok
 
+    @classmethod
+    def replace_duplicates(cls, duplicates):
+        """ Set-based version of :meth:`replace_duplicate`, for many items.
+
+        :param duplicates: a dict of ``{duplicate_id: master_id}``.
+
+        Feeds and tweets links are copied to the masters with bulk
+        inserts, and reads are moved with one ``UPDATE`` per master.
+        Like in :meth:`replace_duplicate`, reads whose owner already
+        has one on the master are deleted. Everything is done in one
+        transaction; the duplicates are marked ``FINISHED`` at the end.
+
+        Returns the number of reads moved or deleted.
+        """
+
+        from ..read import Read
+
+        if not duplicates:
+            return 0
+
+        dupes_ids = duplicates.keys()
+        masters_ids = set(duplicates.values())
+
+        with transaction.atomic():
+
+            # ————————————————————————————————————————————————— Feeds & tweets
+
+            for through, other_name, clear in (
+                (cls.feeds.through, 'basefeed_id', False),
+                (cls.tweets.through, 'tweet_id', True),
+            ):
+                existing_links = set(through.objects.filter(
+                    baseitem_id__in=masters_ids).values_list(
+                        other_name, 'baseitem_id'))
+
+                new_links = set(
+                    (other_id, duplicates[dupe_id])
+                    for other_id, dupe_id in through.objects.filter(
+                        baseitem_id__in=dupes_ids).values_list(
+                            other_name, 'baseitem_id')
+                ) - existing_links
+
+                through.objects.bulk_create([
+                    through(**{other_name: other_id,
+                               'baseitem_id': master_id})
+                    for other_id, master_id in new_links
+                ])
+
+                if clear:
+                    through.objects.filter(
+                        baseitem_id__in=dupes_ids).delete()
+
+            # —————————————————————————————————————————————————————————— Reads
+
+            owned = set(Read.objects.filter(
+                item_id__in=masters_ids).values_list('user_id', 'item_id'))
+
+            to_delete = []
+            to_move   = defaultdict(list)
+
+            for read_id, user_id, dupe_id in Read.objects.filter(
+                    item_id__in=dupes_ids).values_list(
+                        'id', 'user_id', 'item_id'):
+
+                master_id = duplicates[dupe_id]
+
+                if (user_id, master_id) in owned:
+                    # The user has already a Read with the master item.
+                    to_delete.append(read_id)
+
+                else:
+                    owned.add((user_id, master_id))
+                    to_move[master_id].append(read_id)
+
+            for master_id, reads_ids in to_move.items():
+                Read.objects.filter(id__in=reads_ids).update(item=master_id)
+
+            if to_move:
+                # read_pre_save() does this in replace_duplicate().
+                Read.objects.filter(
+                    item_id__in=to_move.keys(), is_good=False,
+                    item__is_good=True).update(is_good=True)
+
+            cls.objects.filter(id__in=dupes_ids).update(
+                duplicate_status=DUPLICATE_STATUS.FINISHED)
+
+            # Last, because pre_delete() updates the counters in REDIS,
+            # which our transaction cannot roll back.
+            if to_delete:
+                Read.objects.filter(id__in=to_delete).delete()
+
+        LOGGER.info(u'%s duplicate items replaced by %s masters, %s reads '
+                    u'moved and %s deleted.', len(dupes_ids),
+                    len(masters_ids),
+                    sum(len(ids) for ids in to_move.values()),
+                    len(to_delete))
+
+        return sum(len(ids) for ids in to_move.values()) + len(to_delete)
+
     def create_reads(self, feeds=None):
         """ Create an article reads for all of its feeds.
 
@@ -589,6 +799,27 @@ class BaseItem(PolymorphicModel,
 
 # ——————————————————————————————————————————————————————————————————————— Tasks
 
+
+@task(queue='background')
+def baseitem_search_index(last_id=0, batch_size=None):
+    """ Index existing items for search, see :func:`search_index_items_batch`.
+
+    The task re-launches itself for the next batch, until none is
+    left. It can thus be stopped and launched again at any time.
+    """
+
+    batch_last_id = search_index_items_batch(last_id, batch_size)
+
+    if batch_last_id is None:
+        LOGGER.info(u'Items search indexing finished.')
+        return
+
+    LOGGER.info(u'Indexed items #%s to #%s for search.',
+                last_id + 1, batch_last_id)
+
+    baseitem_search_index.delay(batch_last_id, batch_size)
+
+
 register_task_method(BaseItem, BaseItem.process,
                      globals(), queue=u'fetch', default_retry_delay=3600)
 
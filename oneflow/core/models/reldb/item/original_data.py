@@ -24,12 +24,15 @@ import ast
 import json
 import logging
 
+from celery import task
 from statsd import statsd
+from constance import config
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 
 from oneflow.base.utils import register_task_method
+from oneflow.base.utils.packed import pack_mapping, PackedMapping
 from oneflow.base.utils.dateutils import (
     twitter_datestring_to_datetime_utc,
     datetime_from_feedparser_entry,
@@ -49,11 +52,54 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'OriginalData',
+    'original_data_pack_legacy',
+    'original_data_pack_legacy_batch',
 
     # Tasks will be added from below.
 ]
 
 
+LEGACY_STRUCT_TIME_RE = re.compile(r'time\.struct_time\(([^)]+)\)')
+LEGACY_STRUCT_TIME_FIELD_RE = re.compile(r'^\s*tm_\w+=(-?\d+)\s*$')
+
+
+def legacy_struct_time(match):
+    """ Return the ``repr()`` of a struct_time as a literal list.
+
+    This is what :func:`~oneflow.base.utils.packed.packable` stores
+    for them. Raise ``ValueError`` if it doesn't look like one.
+    """
+
+    values = []
+
+    for field in match.group(1).split(','):
+        field_match = LEGACY_STRUCT_TIME_FIELD_RE.match(field)
+
+        if field_match is None:
+            raise ValueError(u'Unparsable struct_time: {0}'.format(
+                             match.group(0)))
+
+        values.append(field_match.group(1))
+
+    if len(values) != 9:
+        raise ValueError(u'Unparsable struct_time: {0}'.format(
+                         match.group(0)))
+
+    return u'[{0}]'.format(u', '.join(values))
+
+
+def hydrate_legacy_feedparser(legacy):
+    """ Hydrate the ``repr()`` of a feedparser entry, the old way.
+
+    Slow and memory hungry, only for data not yet packed.
+    ``time.struct_time`` values (eg. ``published_parsed``) become
+    lists, as in packed data.
+    """
+
+    return ast.literal_eval(LEGACY_STRUCT_TIME_RE.sub(legacy_struct_time,
+                                                      legacy))
+
+
 class OriginalDataReprocessException(Exception):
 
     """ raised when an origin has been found on an item that hadn't one. """
@@ -102,6 +148,10 @@ class OriginalData(models.Model):
     google_reader = models.TextField(null=True, blank=True)
     feedparser    = models.TextField(null=True, blank=True)
     raw_email     = models.TextField(null=True, blank=True)
+
+    # The feedparser entry, packed by oneflow.base.utils.packed.
+    # The `feedparser` text above is the legacy repr() format.
+    feedparser_packed = models.BinaryField(null=True, blank=True)
     twitter       = models.TextField(null=True, blank=True)
     # webimport     = models.TextField(null=True, blank=True)
 
@@ -131,6 +181,9 @@ class OriginalData(models.Model):
                     and not getattr(self, attr_name + '_processed'):
                 return False
 
+        if self.feedparser_packed and not self.feedparser_processed:
+            return False
+
         return True
 
     @property
@@ -144,11 +197,17 @@ class OriginalData(models.Model):
 
     @property
     def feedparser_hydrated(self):
-        """ XXX: should disappear when feedparser_data is useless. """
+        """ Return the feedparser entry as a read-only mapping.
+
+        Packed data is decoded lazily, key by key. Values of ``*_parsed``
+        keys are lists (eg. ``[2014, 12, 31, 23, 59, 0, 2, 365, 0]``).
+        """
+
+        if self.feedparser_packed:
+            return PackedMapping(self.feedparser_packed)
 
         if self.feedparser:
-            return ast.literal_eval(re.sub(r'time.struct_time\([^)]+\)',
-                                    '""', self.feedparser))
+            return hydrate_legacy_feedparser(self.feedparser)
 
         return None
 
@@ -307,7 +366,7 @@ def BaseItem_postprocess_guess_original_data_method(self, force=False,
         original_data.save()
         return
 
-    if self.original_data.feedparser:
+    if self.original_data.feedparser_packed or self.original_data.feedparser:
         self.origin = ORIGINS.FEEDPARSER
         need_save   = True
 
@@ -546,3 +605,74 @@ BaseItem.postprocess_twitter_data  = \
 #           cannot .objects.get() an Article in register_task_method().
 register_task_method(BaseItem, BaseItem.postprocess_original_data,
                      globals(), queue=u'background')
+
+
+# ——————————————————————————————————————————————————————————————————— Tasks
+
+
+def original_data_pack_legacy_batch(last_id=0, batch_size=None):
+    """ Convert the next batch of legacy feedparser original data.
+
+    Rows are taken by ``config.ORIGINAL_DATA_PACK_BATCH_SIZE``, in
+    ``item_id`` order after :param:`last_id`. The batch is committed
+    on its own. Rows which cannot be converted keep their legacy data.
+
+    :returns: the ``item_id`` of the last row of the batch, or ``None``
+        if there was no row left.
+    """
+
+    if batch_size is None:
+        batch_size = config.ORIGINAL_DATA_PACK_BATCH_SIZE
+
+    rows = list(OriginalData.objects.filter(
+        item_id__gt=last_id, feedparser_packed__isnull=True).exclude(
+        feedparser__isnull=True).exclude(feedparser=u'').order_by(
+        'item_id').values_list('item_id', 'feedparser')[:batch_size])
+
+    if not rows:
+        return None
+
+    packed_count = 0
+
+    with transaction.atomic():
+        for item_id, legacy in rows:
+            try:
+                hydrated = hydrate_legacy_feedparser(legacy)
+                packed   = pack_mapping(hydrated)
+
+                # pack_mapping() skips the values it cannot encode;
+                # the legacy text is the only copy, keep it then.
+                if set(PackedMapping(packed)) != set(hydrated):
+                    raise ValueError(u'some keys could not be packed')
+
+            except:
+                LOGGER.exception(u'Could not pack original data of item '
+                                 u'#%s, left untouched.', item_id)
+                continue
+
+            OriginalData.objects.filter(item_id=item_id).update(
+                feedparser_packed=packed, feedparser=None)
+            packed_count += 1
+
+    LOGGER.info(u'Packed %s/%s legacy original data (items #%s to #%s).',
+                packed_count, len(rows), rows[0][0], rows[-1][0])
+
+    return rows[-1][0]
+
+
+@task(queue='background')
+def original_data_pack_legacy(last_id=0, batch_size=None):
+    """ Convert legacy feedparser original data to the packed format.
+
+    See :func:`original_data_pack_legacy_batch`. The task re-launches
+    itself for the next batch, until none is left. It can thus be
+    stopped and launched again at any time.
+    """
+
+    batch_last_id = original_data_pack_legacy_batch(last_id, batch_size)
+
+    if batch_last_id is None:
+        LOGGER.info(u'Legacy original data packing finished.')
+        return
+
+    original_data_pack_legacy.delay(batch_last_id, batch_size)
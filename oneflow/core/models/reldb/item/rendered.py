@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright 2013-2015 Olivier Cortès <oc@1flow.io>.
+
+This file is part of the 1flow project.
+
+1flow is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+1flow is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import logging
+
+from django.db import models, IntegrityError, transaction
+from django.utils.translation import ugettext_lazy as _
+
+from base import BaseItem
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+__all__ = [
+    'ItemHTML',
+]
+
+
+class ItemHTML(models.Model):
+
+    """ The rendered HTML of an item content, for readers not to wait.
+
+    There is at most one per item, replaced when the item name, its
+    content or the renderer change (all of them make the :attr:`key`),
+    and deleted with the item. Its size thus follows the number of
+    items, not the number of their renderings.
+    """
+
+    class Meta:
+        app_label = 'core'
+        verbose_name = _(u'Item HTML')
+        verbose_name_plural = _(u'Items HTML')
+
+    item = models.OneToOneField(BaseItem, primary_key=True,
+                                related_name='rendered_html')
+
+    key  = models.CharField(max_length=64)
+    html = models.TextField()
+
+    @classmethod
+    def get_html(cls, item_id, key):
+        """ Return the HTML stored for an item, if still up-to-date. """
+
+        html = cls.objects.filter(item_id=item_id, key=key).values_list(
+            'html', flat=True)[:1]
+
+        return html[0] if html else None
+
+    @classmethod
+    def set_html(cls, item_id, key, html):
+        """ Store (or replace) the HTML of an item. """
+
+        if cls.objects.filter(item_id=item_id).update(key=key, html=html):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(item_id=item_id, key=key, html=html)
+
+        except IntegrityError:
+            # Rendered concurrently by another worker, for the
+            # same content or an older one. Ours is current.
+            cls.objects.filter(item_id=item_id).update(key=key, html=html)
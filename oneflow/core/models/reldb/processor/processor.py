@@ -20,20 +20,19 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 import re
 import six
-import copy
+import hashlib
 # import uuid
 import logging
 
 from statsd import statsd
 from constance import config
 from transmeta import TransMeta
-from collections import OrderedDict
 # from json_field import JSONField
 from yamlfield.fields import YAMLField
 
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import pre_save  # , post_save, pre_delete
+from django.db.models.signals import pre_save, post_save  # , pre_delete
 from django.utils.translation import ugettext_lazy as _
 from django.utils.text import slugify
 from django.contrib.contenttypes import generic
@@ -63,6 +62,17 @@ __all__ = [
 ]
 
 
+# Arguments of the processors functions, available to their code.
+EXEC_SCOPE_NAMES = (
+    'instance', 'data', 'models', 'LOGGER', 'statsd',
+    'get_processor_by_slug', 'settings', 'config',
+    'parameters', 'verbose', 'force', 'commit',
+)
+
+# {(processor_id, code_hash): compiled function}, process-wide.
+COMPILED_CODE = {}
+
+
 # ————————————————————————————————————————————————————————————— Class & related
 
 
@@ -257,56 +267,78 @@ class Processor(six.with_metaclass(ProcessorMeta, MPTTModel,
             LOGGER.info(u'%s: updated code for changed slug %s → %s.',
                         self, old_slug, new_slug)
 
+    def _compiled_function(self, code_to_run):
+        """ Return the processor function for :param:`code_to_run`.
+
+        Functions are compiled once and kept in :data:`COMPILED_CODE`,
+        keyed on the processor ID and a hash of the code. A change of
+        the code in another process thus never hits a stale function.
+        """
+
+        code_key = (self.id, hashlib.md5(
+            code_to_run.encode('utf-8')).hexdigest())
+
+        try:
+            return COMPILED_CODE[code_key]
+
+        except KeyError:
+            pass
+
+        function_string = u"""
+def processor_function({0}):
+    {1}
+""".format(
+            u', '.join(EXEC_SCOPE_NAMES),
+            code_to_run.replace(u'\n', u'\n    '),
+        )
+
+        local_scope = {}
+
+        exec compile(function_string, '<processor %s>' % self.id,
+                     'exec') in {}, local_scope
+
+        COMPILED_CODE[code_key] = local_scope['processor_function']
+
+        return COMPILED_CODE[code_key]
+
     def _internal_exec(self, code_to_run, instance, **kwargs):
-        """ Create a local scope dict for pseudo-restricted exec calls. """
+        """ Run the processor code in a pseudo-restricted local scope. """
 
         from oneflow.core.models import reldb as core_models
 
-        local_scope = OrderedDict({
-            'instance': instance,
+        processor_function = self._compiled_function(code_to_run)
+
+        # LOGGER.info(u'Running: %s', len(code_to_run))
+
+        result = processor_function(
+            instance=instance,
 
             # The communication tunnel between exec() and the processor.
-            'data': SimpleObject(),
+            data=SimpleObject(),
 
             # This will ship all exceptions, including ours.
-            'models': core_models,
+            models=core_models,
 
             # TODO: enhance the logger to match the documentation.
-            'LOGGER': LOGGER,
-
-            'statsd': statsd,
+            LOGGER=LOGGER,
 
-            'get_processor_by_slug': lambda x: Processor.objects.get(slug=x),
+            statsd=statsd,
 
-            # TODO: does copy really copy the LazySettingsObject?
-            'settings': copy.copy(settings),
-            'config': copy.copy(config),
+            get_processor_by_slug=get_processor_by_slug,
 
-            'parameters': kwargs.get('parameters', {}),
-            'verbose': kwargs.get('verbose', True),
-            'force': kwargs.get('force', False),
-            'commit': kwargs.get('commit', True),
-        })
+            settings=settings,
+            config=config,
 
-        function_string = u"""
-def processor_function({0}):
-    {1}
-
-data.result = processor_function({2})
-""".format(
-            u', '.join(local_scope.keys()),
-            code_to_run.replace(u'\n', u'\n    '),
-            u', '.join(u'%s=%s' % (k, k) for k in local_scope.keys()),
+            parameters=kwargs.get('parameters', {}),
+            verbose=kwargs.get('verbose', True),
+            force=kwargs.get('force', False),
+            commit=kwargs.get('commit', True),
         )
 
-        # LOGGER.info(u'Running: %s', len(function_string))
-
-        exec function_string in {}, local_scope
-
-        # LOGGER.info(u'Executed %s! Returning: %s', len(function_string),
-        #             local_scope['data'].result)
+        # LOGGER.info(u'Executed %s! Returning: %s', len(code_to_run),
+        #             result)
 
-        return local_scope['data'].result
+        return result
 
     def security_check(self, only=None):
         """ Raise an exception if :param:`code` tries to do bad things.
@@ -420,6 +452,13 @@ data.result = processor_function({2})
 
         raise InstanceNotAcceptedException
 
+
+def get_processor_by_slug(slug):
+    """ Helper for processors code, to run other processors. """
+
+    return Processor.objects.get(slug=slug)
+
+
 # ————————————————————————————————————————————————————————————————————— Signals
 
 
@@ -445,12 +484,13 @@ def processor_pre_save(instance, **kwargs):
             processor.update_changed_slug(old_slug, new_slug)
 
 
-# def processor_post_save(instance, **kwargs):
-#   """ Do post_save work. """
-#
-#     if kwargs.get('created', False):
-#         return
+def processor_post_save(instance, **kwargs):
+    """ Forget the compiled functions of the saved processor. """
+
+    for code_key in COMPILED_CODE.keys():
+        if code_key[0] == instance.id:
+            del COMPILED_CODE[code_key]
 
 
 pre_save.connect(processor_pre_save, sender=Processor)
-# post_save.connect(processor_post_save, sender=Processor)
+post_save.connect(processor_post_save, sender=Processor)
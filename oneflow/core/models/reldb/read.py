@@ -22,7 +22,6 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 import sys
 import logging
-import operator
 
 from statsd import statsd
 
@@ -32,6 +31,7 @@ from django.db.models.query import QuerySet
 # from django.conf import settings
 from django.utils.translation import ugettext_lazy as _, pgettext_lazy
 
+from oneflow.base.fields import incr_redis_descriptors
 from oneflow.base.utils.dateutils import timedelta, naturaldelta, datetime
 
 from sparks.django.utils import NamedTupleChoices
@@ -48,7 +48,7 @@ from folder import Folder
 # from subscription import Subscription, generic_check_subscriptions_method
 
 from tag import AbstractTaggedModel, SimpleTag as Tag
-from item.base import BaseItem
+from item.base import BaseItem, search_items_sql
 
 LOGGER = logging.getLogger(__name__)
 
@@ -107,6 +107,20 @@ class ReadQuerySet(QuerySet):
     def starred(self):
         return self.filter(is_starred=True)
 
+    def search(self, search):
+        """ Return the reads whose items match a full-text search.
+
+        See :func:`~oneflow.core.models.reldb.item.base.parse_search_query`
+        for the syntax. The items part is a sub-query on the search
+        vector GIN index; scoping (user, subscription, folder…) is done
+        by the other filters of the query set, as usual.
+        """
+
+        sql, params = search_items_sql(search)
+
+        return self.extra(where=[u'{0}.item_id IN ({1})'.format(
+            self.model._meta.db_table, sql)], params=params)
+
 
 class ReadManager(models.Manager):
 
@@ -146,6 +160,9 @@ class ReadManager(models.Manager):
     def starred(self):
         return self.get_queryset().starred()
 
+    def search(self, search):
+        return self.get_queryset().search(search)
+
 
 # ——————————————————————————————————————————————————————————————————————— Model
 
@@ -535,16 +552,20 @@ class Read(AbstractTaggedModel):
     # ————————————————————————————————————————————— Update subscriptions caches
 
     def update_cached_descriptors(self, operation=None, update_only=None):
+        """ Update the counters of subscriptions, folders and user.
+
+        All deltas are applied atomically server-side and sent to REDIS
+        in one pipeline, cf. :func:`incr_redis_descriptors`. This avoids
+        lost updates when many reads of the same subscriptions are
+        created concurrently.
+        """
 
         if operation is None:
             operation = '+'
 
         assert operation in ('+', '-')
 
-        if operation == '+':
-            op = operator.add
-        else:
-            op = operator.sub
+        delta = 1 if operation == '+' else -1
 
         if update_only is None:
 
@@ -572,43 +593,26 @@ class Read(AbstractTaggedModel):
 
             to_change = [only + '_items_count' for only in update_only]
 
-            for attr_name in to_change:
-
-                updated_folders = []
-
-                try:
-                    for subscription in self.subscriptions.all():
-                        setattr(subscription, attr_name,
-                                op(getattr(subscription, attr_name), 1))
+            # HEADS UP: full updates (update_only=None) don't touch the
+            #           counters, which already include bad reads since
+            #           their creation, cf. Subscription.create_read().
 
-                except AttributeError, e:
-                    LOGGER.warning(u'Skipped subscriptions cache descriptor '
-                                   u'update for %s from %s: %s',
-                                   attr_name, self, e)
+            subscriptions = list(self.subscriptions.all())
 
-                try:
-                    for folder in subscription.folders.all():
-                        if folder in updated_folders:
-                            continue
+            if subscriptions:
+                folders = list(Folder.objects.filter(
+                    subscriptions__in=subscriptions).distinct())
 
-                        setattr(folder, attr_name,
-                                op(getattr(folder, attr_name), 1))
-
-                        updated_folders.append(folder)
-
-                except AttributeError, e:
-                    LOGGER.warning(u'Skipped folder cache descriptor '
-                                   u'update for %s from %s: %s',
-                                   attr_name, self, e)
+            else:
+                folders = []
 
-                try:
-                    setattr(self.user.user_counters, attr_name,
-                            op(getattr(self.user.user_counters, attr_name), 1))
+            targets = subscriptions + folders + [self.user.user_counters]
 
-                except AttributeError, e:
-                    LOGGER.warning(u'Skipped user cache descriptor '
-                                   u'update for %s from %s: %s',
-                                   attr_name, self, e)
+            incr_redis_descriptors(
+                (target, attr_name, delta)
+                for attr_name in to_change
+                for target in targets
+            )
 
     # ——————————————————————————————————————————————— Boolean attributes change
 
@@ -27,7 +27,7 @@ from constance import config
 from statsd import statsd
 
 # from django.conf import settings
-from django.db import models
+from django.db import models, IntegrityError, transaction
 from django.db.models import Q
 from django.db.models.signals import pre_save, post_save, pre_delete
 from django.utils.translation import ugettext_lazy as _
@@ -35,8 +35,8 @@ from django.utils.translation import ugettext_lazy as _
 from sparks.foundations.classes import SimpleObject
 from sparks.django.models.mixins import ModelDiffMixin
 
-from oneflow.base.fields import IntRedisDescriptor
-from oneflow.base.utils import register_task_method
+from oneflow.base.fields import IntRedisDescriptor, incr_redis_descriptors
+from oneflow.base.utils import register_task_method, list_chunks
 from oneflow.base.utils.dateutils import (timedelta, today, combine,
                                           now, time)  # , make_aware, utc)
 
@@ -50,6 +50,9 @@ from item import BaseItem, Article
 
 LOGGER = logging.getLogger(__name__)
 
+# How many reads create_reads() inserts at once.
+BULK_READS_CHUNK_SIZE = 500
+
 __all__ = [
     'Subscription',
     'subscribe_user_to_feed',
@@ -77,6 +80,11 @@ def CheckReadsCounter():
     counters.missing = 0
     counters.rechecked = 0
 
+    # Existing reads newly connected to the subscription, in bulk mode.
+    counters.linked = 0
+    counters.linked_unreads = 0
+    counters.rechecked_ids = []
+
     return counters
 
 # ————————————————————————————————————————————————————————————— Redis / Helpers
@@ -383,9 +391,180 @@ class Subscription(ModelDiffMixin, AbstractTaggedModel):
 
         return read, created
 
+    def create_reads(self, items, counters=None, **kwargs):
+        """ Bulk version of :meth:`create_read`, for many items at once.
+
+        Missing reads are found with one anti-join and inserted with
+        ``bulk_create()``, along with their subscription and tags M2M
+        rows. Existing reads are connected to the current subscription
+        and activated if their item is good.
+
+        :param items: a ``QuerySet`` of items.
+        :param counters: a :func:`CheckReadsCounter` to update. A new
+            one is created if ``None``.
+        :param kwargs: attributes set on all created reads.
+        :returns: the counters. ``rechecked_ids`` lists the IDs of the
+            items which already had a read.
+
+        .. warning:: this method doesn't update the cached descriptors,
+            the caller must do it once at the end from the counters.
+            Read signals are not sent either; their work is done here,
+            except connecting the reads to other subscriptions of the
+            user, which their own :meth:`check_reads` will do.
+        """
+
+        if counters is None:
+            counters = CheckReadsCounter()
+
+        user_reads    = Read.objects.filter(user_id=self.user_id)
+        reads_through = Subscription.reads.through
+        tags_through  = Read.tags.through
+        is_read       = kwargs.get('is_read', False)
+
+        # Fetch existing reads before creating, to not count them twice.
+        existing_reads = list(user_reads.filter(
+            item_id__in=items.values('id')).values_list(
+                'id', 'item_id', 'is_read', 'is_good', 'item__is_good'))
+
+        missing_items = list(items.exclude(
+            id__in=user_reads.values('item_id')).values_list(
+                'id', 'is_good', 'default_rating'))
+
+        for chunk in list_chunks(missing_items, BULK_READS_CHUNK_SIZE):
+
+            items_ids = [item_id for item_id, _, _ in chunk]
+
+            try:
+                with transaction.atomic():
+                    Read.objects.bulk_create([
+                        Read(item_id=item_id, user_id=self.user_id,
+                             is_good=is_good, rating=default_rating,
+                             **kwargs)
+                        for item_id, is_good, default_rating in chunk
+                    ])
+
+            except IntegrityError:
+                LOGGER.warning(u'Subscription %s: concurrent reads '
+                               u'creation, falling back to one-by-one.',
+                               self.id)
+
+                for item_id in items_ids:
+                    read, created = Read.objects.get_or_create(
+                        item_id=item_id, user_id=self.user_id,
+                        defaults=kwargs)
+
+                    read.subscriptions.add(self)
+
+                    if created:
+                        read.tags.add(*read.item.tags.all())
+                        counters.missing += 1
+
+                        if is_read:
+                            counters.reads += 1
+
+                        else:
+                            counters.unreads += 1
+
+                    else:
+                        counters.rechecked += 1
+                        counters.rechecked_ids.append(item_id)
+
+                continue
+
+            good_count = sum(1 for _, is_good, _ in chunk if is_good)
+
+            with statsd.pipeline() as spipe:
+                spipe.gauge('reads.counts.total', len(chunk), delta=True)
+                spipe.gauge('reads.counts.good', good_count, delta=True)
+                spipe.gauge('reads.counts.bad', len(chunk) - good_count,
+                            delta=True)
+
+            reads_ids = dict((item_id, read_id) for read_id, item_id
+                             in user_reads.filter(
+                                 item_id__in=items_ids).values_list(
+                                     'id', 'item_id'))
+
+            reads_through.objects.bulk_create([
+                reads_through(subscription_id=self.id, read_id=read_id)
+                for read_id in reads_ids.values()
+            ])
+
+            tags_through.objects.bulk_create([
+                tags_through(read_id=reads_ids[item_id], simpletag_id=tag_id)
+                for item_id, tag_id in BaseItem.tags.through.objects.filter(
+                    baseitem_id__in=items_ids).values_list(
+                        'baseitem_id', 'simpletag_id')
+                if item_id in reads_ids
+            ])
+
+            counters.missing += len(chunk)
+
+            if is_read:
+                counters.reads += len(chunk)
+
+            else:
+                counters.unreads += len(chunk)
+
+        if not existing_reads:
+            return counters
+
+        counters.rechecked += len(existing_reads)
+        counters.rechecked_ids.extend(
+            item_id for _, item_id, _, _, _ in existing_reads)
+
+        # If the item was already there and fetched (mutualized from
+        # another feed, for example), activate the read immediately,
+        # like create_read() does.
+        to_activate = [read_id for read_id, _, _, is_good, item_is_good
+                       in existing_reads if item_is_good and not is_good]
+
+        if to_activate:
+            user_reads.filter(id__in=to_activate).update(is_good=True)
+
+            with statsd.pipeline() as spipe:
+                spipe.gauge('reads.counts.good', len(to_activate),
+                            delta=True)
+                spipe.gauge('reads.counts.bad', -len(to_activate),
+                            delta=True)
+
+        # If another feed has already created the reads, be sure
+        # the current subscription is registered in them.
+        already_linked = set(reads_through.objects.filter(
+            subscription_id=self.id,
+            read_id__in=[read_id for read_id, _, _, _, _
+                         in existing_reads]).values_list(
+                'read_id', flat=True))
+
+        to_link = [(read_id, read_is_read)
+                   for read_id, _, read_is_read, _, _ in existing_reads
+                   if read_id not in already_linked]
+
+        try:
+            with transaction.atomic():
+                reads_through.objects.bulk_create([
+                    reads_through(subscription_id=self.id, read_id=read_id)
+                    for read_id, _ in to_link
+                ])
+
+        except IntegrityError:
+            # Some links were created concurrently. add() ignores
+            # the existing ones, but we lose the exact count.
+            self.reads.add(*[read_id for read_id, _ in to_link])
+
+        counters.linked += len(to_link)
+        counters.linked_unreads += sum(1 for _, read_is_read in to_link
+                                       if not read_is_read)
+
+        return counters
+
     def check_reads(self, items=None, extended_check=False,
-                    force=False, commit=True):
-        """ Also available as a task for background execution. """
+                    force=False, commit=True, bulk=True):
+        """ Also available as a task for background execution.
+
+        With :param:`bulk` (the default), reads are created by
+        :meth:`create_reads` and the cached descriptors are updated
+        once at the end. Else, they are created one by one.
+        """
 
         in_the_past = combine(today() - timedelta(
             days=config.SUBSCRIPTIONS_ITEMS_UNREAD_DAYS), time(0, 0, 0))
@@ -423,6 +602,15 @@ class Subscription(ModelDiffMixin, AbstractTaggedModel):
             else:
                 counters.failed += 1
 
+        def create_reads_for_items(on_items, params):
+
+            if bulk:
+                self.create_reads(on_items, counters, **params)
+
+            else:
+                for item in on_items:
+                    create_read_for_item(item, params)
+
         # ——————————————————————————————————————————————— First, check articles
         # We can order them by date and connect reads in the same order.
 
@@ -433,22 +621,20 @@ class Subscription(ModelDiffMixin, AbstractTaggedModel):
         else:
             on_items = items.article().order_by('Article___date_published')
 
-        for item in on_items.filter(Article___date_published__lt=in_the_past):
-
-            # We reconnect the user to the whole feed history, but marking
-            # old articles auto read, else there could be too much to read.
-            create_read_for_item(item, {
+        # We reconnect the user to the whole feed history, but marking
+        # old articles auto read, else there could be too much to read.
+        create_reads_for_items(
+            on_items.filter(Article___date_published__lt=in_the_past), {
                 'is_read':        True,
                 'is_auto_read':   True,
                 'date_read':      my_now,
                 'date_auto_read': my_now,
             })
 
-        for item in on_items.filter(Q(Article___date_published__gte=in_the_past)
-                                    | Q(Article___date_published=None)):
-
-            # default parameters, reads will be unread.
-            create_read_for_item(item, {})
+        # default parameters, reads will be unread.
+        create_reads_for_items(
+            on_items.filter(Q(Article___date_published__gte=in_the_past)
+                            | Q(Article___date_published=None)), {})
 
         # ——————————————————————————————————————————————————— Then, other items
         # Do the same, but based on the date_created
@@ -459,28 +645,30 @@ class Subscription(ModelDiffMixin, AbstractTaggedModel):
         else:
             on_items = items.not_instance_of(Article)
 
-        for item in on_items.filter(date_updated__lt=in_the_past):
-
-            # We reconnect the user to the whole feed history, but marking
-            # old items auto read, else there could be too much to read.
-            create_read_for_item(item, {
+        # We reconnect the user to the whole feed history, but marking
+        # old items auto read, else there could be too much to read.
+        create_reads_for_items(
+            on_items.filter(date_updated__lt=in_the_past), {
                 'is_read':        True,
                 'is_auto_read':   True,
                 'date_read':      my_now,
                 'date_auto_read': my_now,
             })
 
-        for item in on_items.filter(date_updated__gte=in_the_past):
-
-            # default parameters, reads will be unread.
-            create_read_for_item(item, {})
+        # default parameters, reads will be unread.
+        create_reads_for_items(
+            on_items.filter(date_updated__gte=in_the_past), {})
 
-        for item in on_items:
-            create_read_for_item(item, {})
+        if not bulk:
+            for item in on_items:
+                create_read_for_item(item, {})
 
         # —————————————————————————————————————————————————— Update descriptors
 
-        if counters.missing or counters.rechecked:
+        if bulk:
+            self.check_reads_bulk_finish(counters, extended_check)
+
+        elif counters.missing or counters.rechecked:
             #
             # TODO: don't recompute everything, just
             #    add or subscribe the changed counts.
@@ -498,6 +686,52 @@ class Subscription(ModelDiffMixin, AbstractTaggedModel):
 
         return counters
 
+    def check_reads_bulk_finish(self, counters, extended_check=False):
+        """ Activate reads and update descriptors after bulk creation. """
+
+        if extended_check:
+            for item in BaseItem.objects.filter(
+                    id__in=set(counters.rechecked_ids)):
+                try:
+                    item.activate_reads()
+
+                except:
+                    LOGGER.exception(u'Problem while activating reads '
+                                     u'of item #%s in Subscription '
+                                     u'#%s.check_reads(), continuing '
+                                     u'check.', item.id, self.id)
+
+        deltas = []
+
+        if counters.missing or counters.linked:
+            deltas.append((self, 'all_items_count',
+                           counters.missing + counters.linked))
+
+        if counters.unreads or counters.linked_unreads:
+            deltas.append((self, 'unread_items_count',
+                           counters.unreads + counters.linked_unreads))
+
+        if counters.linked:
+            # Reads coming from another subscription of the
+            # user can already be counted in the folders.
+            for folder in self.folders.all():
+                folder.compute_cached_descriptors(all=True, unread=True)
+
+            others = [self.user.user_counters]
+
+        else:
+            others = list(self.folders.all()) + [self.user.user_counters]
+
+        for other in others:
+            if counters.missing:
+                deltas.append((other, 'all_items_count', counters.missing))
+
+            if counters.unreads:
+                deltas.append((other, 'unread_items_count',
+                               counters.unreads))
+
+        incr_redis_descriptors(deltas)
+
 # ———————————————————————————————————————————————————————————————— Celery tasks
 
 
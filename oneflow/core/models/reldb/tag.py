@@ -21,12 +21,13 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 import logging
 
 from statsd import statsd
+from constance import config
 
 from celery import task
 
 # from django.conf import settings
 from django.db import models, transaction
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
@@ -34,6 +35,8 @@ from django.contrib.contenttypes import generic
 
 from mptt.models import MPTTModel, TreeForeignKey
 
+from oneflow.base.utils.lru import LRUCache
+
 from ..common import DUPLICATE_STATUS
 
 from duplicate import AbstractDuplicateAwareModel
@@ -50,6 +53,11 @@ __all__ = [
 ]
 
 
+# {lowercased name: master tag ID}, in each process. Shared by all
+# the entries of all the feeds a worker refreshes.
+TAGS_CACHE = LRUCache(maxsize=16384)
+
+
 class SimpleTag(MPTTModel,
                 AbstractDuplicateAwareModel,
                 AbstractLanguageAwareModel):
@@ -99,33 +107,116 @@ class SimpleTag(MPTTModel,
         )
 
     @classmethod
-    def get_tags_set(cls, tags_names, origin=None):
-        """ Given a list of strings, return a set of tags. """
+    def get_tags_set(cls, tags_names, origin=None, known=None):
+        """ Given a list of strings, return a set of tags.
+
+        Duplicate tags are replaced by their master.
+
+        :param known: an optional ``{id: tag}`` dict of already loaded
+            tags, which is completed with the ones loaded here. Share
+            it between calls to avoid loading the same tags again.
+        """
 
-        tags = set()
+        if known is None:
+            known = {}
 
-        for tag_name in tags_names:
-            tag_name = tag_name.lower()
+        names_ids = cls.get_tags_ids(tags_names, origin=origin)
 
-            try:
-                tag, created = cls.objects.get_or_create(name=tag_name)
+        to_load = set(names_ids.values()) - set(known)
 
-            except cls.MultipleObjectsReturned:
-                # This a rare case, but happens, and
-                # prevent items from beiing created…
-                tag = cls.objects.filter(name=tag_name).first()
+        if to_load:
+            known.update(cls.objects.in_bulk(to_load))
 
-                created = False
+            # Tags deleted by another process (eg. merged duplicates)
+            # are still in our cache. Forget them, and resolve again.
+            stale = [name for name, tag_id in names_ids.items()
+                     if tag_id not in known]
 
-                tag_merge_duplicates_on_name_task.delay(tag_name)
+            if stale:
+                for name in stale:
+                    TAGS_CACHE.delete(name)
+
+                names_ids.update(cls.get_tags_ids(stale, origin=origin))
+
+                known.update(cls.objects.in_bulk(
+                    set(names_ids.values()) - set(known)))
+
+        return set(known[tag_id] for tag_id in names_ids.values()
+                   if tag_id in known)
+
+    @classmethod
+    def get_tags_ids(cls, tags_names, origin=None):
+        """ Return a ``{lowercased name: master tag ID}`` dict.
 
-            if created and origin:
-                tag.origin = origin
-                tag.save()
+        Names are looked up in :data:`TAGS_CACHE` first. The missing
+        ones are fetched in one query, and only the tags which don't
+        exist yet are created one by one.
 
-            tags.add(tag.duplicate_of or tag)
+        .. note:: tags cannot be ``bulk_create()``d: they are MPTT
+            nodes, whose tree fields are computed by ``save()``.
+        """
 
-        return tags
+        names_ids = {}
+        missing = set()
+
+        for tag_name in set(tag_name.lower() for tag_name in tags_names):
+            tag_id = TAGS_CACHE.get(tag_name)
+
+            if tag_id is None:
+                missing.add(tag_name)
+
+            else:
+                names_ids[tag_name] = tag_id
+
+        if not missing:
+            return names_ids
+
+        existing = {}
+
+        for tag in cls.objects.filter(name__in=missing).order_by('id'):
+            existing.setdefault(tag.name, []).append(tag)
+
+        for tag_name in missing:
+            tags = existing.get(tag_name)
+
+            if tags is None:
+                tag = cls.create_tag(tag_name, origin=origin)
+
+            else:
+                tag = tags[0]
+
+                if len(tags) > 1:
+                    # This a rare case, but happens. The
+                    # lowest ID wins, as in the merge task.
+                    tag_merge_duplicates_on_name_task.delay(tag_name)
+
+            tag_id = names_ids[tag_name] = tag.duplicate_of_id or tag.id
+
+            TAGS_CACHE.set(tag_name, tag_id, ttl=config.TAG_CACHE_TTL)
+
+        return names_ids
+
+    @classmethod
+    def create_tag(cls, tag_name, origin=None):
+        """ Create a tag, tolerating other processes creating it too. """
+
+        try:
+            tag, created = cls.objects.get_or_create(name=tag_name)
+
+        except cls.MultipleObjectsReturned:
+            # This a rare case, but happens, and
+            # prevent items from beiing created…
+            tag = cls.objects.filter(name=tag_name).first()
+
+            created = False
+
+            tag_merge_duplicates_on_name_task.delay(tag_name)
+
+        if created and origin:
+            tag.origin = origin
+            tag.save()
+
+        return tag
 
 
 class AbstractTaggedModel(models.Model):
@@ -212,6 +303,17 @@ def simpletag_post_save(instance, **kwargs):
     if kwargs.get('created', False):
         statsd.gauge('tags.counts.total', 1, delta=True)
 
+    elif instance.duplicate_of_id:
+        # Only this process is notified; others rely on the cache
+        # expiry, and on get_tags_set() for deleted duplicates.
+        TAGS_CACHE.delete(instance.name.lower())
+
+
+def simpletag_post_delete(instance, **kwargs):
+
+    TAGS_CACHE.delete(instance.name.lower())
+
 
 pre_save.connect(simpletag_pre_save, sender=SimpleTag)
 post_save.connect(simpletag_post_save, sender=SimpleTag)
+post_delete.connect(simpletag_post_delete, sender=SimpleTag)
@@ -20,14 +20,17 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 
 import json
 import logging
+import threading
 
 # from statsd import statsd
 from random import randrange
 from json_field import JSONField
 from dateutil import parser as date_parser
+from constance import config
 
 # from django.conf import settings
 from django.core.validators import URLValidator
+from django import db
 from django.db import models
 from django.db.models.signals import post_save
 # from django.utils.text import slugify
@@ -38,15 +41,17 @@ from async_messages import message_user
 
 from sparks.django.utils import NamedTupleChoices
 
+from oneflow.base.fields import IntRedisDescriptor, incr_redis_descriptors
 from oneflow.base.utils import register_task_method
 from oneflow.base.utils.dateutils import now, timedelta, naturaldelta
+from oneflow.base.utils.fetchpool import run_per_host
 
 from history import HistoryEntry
 
 from ..common import ORIGINS, CONTENT_TYPES
 
 from . import (
-    Article, Read,
+    Article, Read, RssAtomFeed,
     create_item_from_url,
     create_feeds_from_url,
     subscribe_user_to_feed,
@@ -99,6 +104,11 @@ class UserImport(HistoryEntry):
     lines = models.IntegerField(verbose_name=_(u'lines'), default=0)
     results = JSONField(default=dict, blank=True)
 
+    # —————————————————————————————————————————————————————————— Redis counters
+
+    progress_total = IntRedisDescriptor(attr_name='ui.p_t', default=0)
+    progress_done = IntRedisDescriptor(attr_name='ui.p_d', default=0)
+
     def __unicode__(self):
         """ Unicode, pep257. """
 
@@ -212,21 +222,21 @@ class UserImport(HistoryEntry):
                      _(u'Readability JSON export format detected.'),
                      constants.INFO)
 
-        for readability_object in readability_json:
+        readability_json = [
+            readability_object for readability_object in readability_json
+            if self.validate_url(readability_object['article__url'])
+        ]
 
-            url = readability_object['article__url']
+        articles = self.import_urls([
+            readability_object['article__url']
+            for readability_object in readability_json
+        ], origin=ORIGINS.READABILITY)
 
-            if self.validate_url(url):
-                article = self.import_from_one_url(
-                    url,
-                    origin=ORIGINS.READABILITY
-                )
+        for readability_object in readability_json:
 
-                if article is None:
-                    # article was not created, we
-                    # already have it in the database.
-                    article = Article.objects.get(url=url)
+            article = articles.get(readability_object['article__url'])
 
+            if article is not None:
                 #
                 # Now comes the readability-specific part of the import,
                 # eg. get back user meta-data as much as possible in 1flow.
@@ -317,21 +327,20 @@ class UserImport(HistoryEntry):
                      _(u'Wallabag JSON export format detected.'),
                      constants.INFO)
 
-        for wallabag_object in wallabag_json:
+        wallabag_json = [
+            wallabag_object for wallabag_object in wallabag_json
+            if self.validate_url(wallabag_object['url'])
+        ]
 
-            url = wallabag_object['url']
+        articles = self.import_urls([
+            wallabag_object['url'] for wallabag_object in wallabag_json
+        ], origin=ORIGINS.WALLABAG)
 
-            if self.validate_url(url):
-                article = self.import_from_one_url(
-                    url,
-                    origin=ORIGINS.WALLABAG
-                )
+        for wallabag_object in wallabag_json:
 
-                if article is None:
-                    # article was not created, we
-                    # already have it in the database.
-                    article = Article.objects.get(url=url)
+            article = articles.get(wallabag_object['url'])
 
+            if article is not None:
                 # Now comes the wallabag-specific part of the import,
                 # eg. get back user meta-data as much as possible in 1flow.
 
@@ -388,15 +397,24 @@ class UserImport(HistoryEntry):
 
     # ———————————————————————————————————————————————— 1flow internal importers
 
-    def import_from_one_url(self, url, origin=None):
-        """ Guess if an URL is a feed or an article and import it. """
+    def import_from_one_url(self, url, origin=None, is_article=False):
+        """ Guess if an URL is a feed or an article and import it.
+
+        :param is_article: if ``True``, the URL is already known as an
+            article and we don't try to create a feed from it, which
+            would need a network request.
+
+        .. note:: this method runs in the threads of :meth:`import_urls`;
+            all writes to the import results must hold the import lock.
+        """
 
         # —————————————————————————————————————— Try to create an RSS/Atom Feed
 
         feeds = None
 
         try:
-            feeds = create_feeds_from_url(url)
+            if not is_article:
+                feeds = create_feeds_from_url(url)
 
         except FeedIsHtmlPageException:
             # This is expected if we are importing web pages URLs.
@@ -415,7 +433,8 @@ class UserImport(HistoryEntry):
                     break
 
             if imported_item_was_a_feed_url:
-                self._import_created_['feeds'].append(url)
+                with self._import_lock_:
+                    self._import_created_['feeds'].append(url)
 
                 # Subscribe the user to the feed, and don't
                 # try to import an article from the URL.
@@ -440,9 +459,10 @@ class UserImport(HistoryEntry):
                 return None
 
             else:
-                self._import_created_['discovered'] = [
-                    feed.url for feed, created in feeds if created
-                ]
+                with self._import_lock_:
+                    self._import_created_.setdefault(
+                        'discovered', []).extend(
+                            feed.url for feed, created in feeds if created)
 
         # ———————————————————————————————————————————— Try to create an article
 
@@ -462,10 +482,13 @@ class UserImport(HistoryEntry):
 
         except Exception as e:
             LOGGER.exception(u'Could not create article from URL %s', url)
-            self._import_failed_.append((url, unicode(e)))
+
+            with self._import_lock_:
+                self._import_failed_.append((url, unicode(e)))
 
         else:
-            self._import_created_['articles'].append(url)
+            with self._import_lock_:
+                self._import_created_['articles'].append(url)
 
             message_user(self.user,
                          _(u'Successfully imported article '
@@ -474,6 +497,115 @@ class UserImport(HistoryEntry):
 
         return article
 
+    # ————————————————————————————————————————————————— Parallel import engine
+
+    def import_one_url_job(self, key, url, origin):
+        """ Run :meth:`import_from_one_url` in a pool thread.
+
+        Return a tuple ``(url, article)``; ``article`` is ``None``
+        if the URL was a feed, or if anything went wrong.
+        """
+
+        try:
+            return url, self.import_from_one_url(url, origin=origin)
+
+        except Exception as e:
+            LOGGER.exception(u'User import #%s: importing %s failed.',
+                             self.id, url)
+
+            with self._import_lock_:
+                self._import_failed_.append((url, unicode(e)))
+
+            return url, None
+
+        finally:
+            # Each thread got its own database connection.
+            db.connection.close()
+
+    def checkpoint(self):
+        """ Save the results so far, for retries to resume from them. """
+
+        with self._import_lock_:
+            self.results = {
+                'created': self._import_created_,
+                'failed': self._import_failed_,
+            }
+
+            # Serialized now, while no thread can append.
+            self.save(update_fields=['results'])
+
+    def import_urls(self, urls, origin=None):
+        """ Import many URLs, concurrently. Return ``{url: article}``.
+
+        URLs already imported by a previous run of the current import
+        are skipped. URLs already known in the database as articles or
+        RSS/Atom feeds are imported first and without any network
+        request. The remaining ones are imported in a thread pool
+        (see :func:`~oneflow.base.utils.fetchpool.run_per_host`) which
+        bounds the concurrency on each remote host. Results are saved
+        every ``config.USER_IMPORT_CHECKPOINT_INTERVAL`` URLs.
+
+        Articles which were already imported by a previous run are
+        returned too, to let format-specific importers update them.
+        """
+
+        articles = {}
+        to_import = []
+        skipped = []
+
+        for url in urls:
+            if url in self._import_done_:
+                skipped.append(url)
+
+            else:
+                to_import.append(url)
+
+        if skipped:
+            articles.update((article.url, article) for article
+                            in Article.objects.filter(url__in=skipped))
+
+        known_articles = set(Article.objects.filter(
+            url__in=to_import).values_list('url', flat=True))
+        known_feeds = set(RssAtomFeed.objects.filter(
+            url__in=to_import).values_list('url', flat=True))
+
+        self.progress_total = len(to_import)
+        self.progress_done = 0
+
+        checkpoint_interval = config.USER_IMPORT_CHECKPOINT_INTERVAL
+        imported = 0
+
+        def record(url, article):
+
+            if article is not None:
+                articles[url] = article
+
+            incr_redis_descriptors([(self, 'progress_done', 1)])
+
+            if checkpoint_interval and imported % checkpoint_interval == 0:
+                self.checkpoint()
+
+        for url in to_import:
+            if url in known_articles or url in known_feeds:
+                imported += 1
+                record(url, self.import_from_one_url(
+                    url, origin=origin, is_article=url in known_articles))
+
+        for url, article in run_per_host(
+                ((url, url, origin) for url in to_import
+                 if url not in known_articles and url not in known_feeds),
+                self.import_one_url_job,
+                max_workers=config.USER_IMPORT_POOL_SIZE,
+                max_per_host=config.USER_IMPORT_POOL_PER_HOST):
+            imported += 1
+            record(url, article)
+
+        LOGGER.info(u'User import #%s: %s URLs imported (%s already known, '
+                    u'%s done in a previous run).', self.id, imported,
+                    len(known_articles | known_feeds), len(skipped))
+
+        return articles
+
     # ———————————————————————————————————————————————— All-in-one import runner
 
     def run(self):
@@ -526,13 +658,23 @@ class UserImport(HistoryEntry):
     def run_internal(self):
         """ Import dirty work. """
 
+        # Resume from the results of a previous run, if any. Failures
+        # are forgotten: their URLs will be retried.
+        previous = (self.results or {}).get('created', {})
+
         self._import_validator_ = URLValidator()
+        self._import_lock_      = threading.Lock()
         self._import_to_create_ = set()
         self._import_created_   = {
-            'feeds': [],
-            'articles': []
+            'feeds': previous.get('feeds', []),
+            'articles': previous.get('articles', []),
         }
         self._import_failed_ = []
+        self._import_done_   = set(self._import_created_['feeds']
+                                   + self._import_created_['articles'])
+
+        if 'discovered' in previous:
+            self._import_created_['discovered'] = previous['discovered']
 
         all_in_one = False
 
@@ -547,8 +689,7 @@ class UserImport(HistoryEntry):
             for url in urls:
                 self.validate_url(url)
 
-            for url in self._import_to_create_:
-                self.import_from_one_url(url)
+            self.import_urls(self._import_to_create_)
 
         self.results = {
             'created': self._import_created_,
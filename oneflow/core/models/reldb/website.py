@@ -26,7 +26,6 @@ from constance import config
 from transmeta import TransMeta
 from json_field import JSONField
 from yamlfield.fields import YAMLField
-from cacheops import cached_as
 
 from django.db import models  # , ProgrammingError
 from django.db.models.signals import post_save, pre_save, pre_delete
@@ -38,6 +37,7 @@ from sparks.django.models.mixins import DiffMixin
 
 from duplicate import AbstractDuplicateAwareModel
 from oneflow.base.utils.http import split_url
+from oneflow.base.utils.lru import LRUCache
 
 # from ..common import ORIGINS
 
@@ -48,9 +48,52 @@ LOGGER = logging.getLogger(__name__)
 
 __all__ = [
     'WebSite',
+    'website_base_url',
+    'invalidate_websites',
 ]
 
 
+# ———————————————————————————————————————————————————————————— Resolver cache
+
+# {base_url: WebSite ID}, in each process. Hits cost no query at all
+# for callers which only need the ID (see WebSite.get_ids_from_urls()).
+# We keep IDs, not instances, for callers never to share a model instance.
+# Entries expire after config.WEBSITE_CACHE_TTL to bound how long a
+# process serves a website merged by another one.
+#
+# URLs which cannot be split are cached too, as themselves, with a
+# None value and config.WEBSITE_CACHE_NEGATIVE_TTL.
+WEBSITES_CACHE = LRUCache(maxsize=4096)
+
+MISSING = object()
+
+
+def website_base_url(url):
+    """ Return the normalized ``proto://host:port`` of an URL, or ``None``.
+
+    ``http://test.com/my-article`` gives ``http://test.com``, without
+    the trailing slash.
+    """
+
+    try:
+        proto, host_and_port, remaining = split_url(url)
+
+    except:
+        LOGGER.exception(u'Unable to split url “%s”', url)
+        return None
+
+    return u'%s://%s' % (proto, host_and_port)
+
+
+def invalidate_websites(*websites_ids):
+    """ Forget the cached hosts which resolve to any of these websites. """
+
+    websites_ids = set(websites_ids)
+
+    WEBSITES_CACHE.delete_values(
+        lambda website_id: website_id in websites_ids)
+
+
 # ————————————————————————————————————————————————————————————— Class & related
 
 
@@ -203,35 +246,125 @@ class WebSite(six.with_metaclass(WebSiteMeta, MPTTModel,
             you back the same result. This is intended, to avoid
             duplication.
 
+        .. note:: if the website was merged as a duplicate, its master
+            is returned. Results are cached per process, see
+            :data:`WEBSITES_CACHE`.
+        """
+
+        return cls.get_from_urls([url])[url]
+
+    @classmethod
+    def get_from_urls(cls, urls):
+        """ Bulk version of :meth:`get_from_url`.
+
+        Return a dict ``{url: website or None}``. Websites are loaded
+        in one query, see :meth:`get_ids_from_urls` for the rest.
+        """
+
+        urls_ids = cls.get_ids_from_urls(urls)
+        websites = cls.objects.in_bulk(set(urls_ids.values()) - set([None]))
+
+        # Websites deleted by another process are still
+        # in our cache. Forget them, and resolve again.
+        stale = [url for url, website_id in urls_ids.items()
+                 if website_id is not None and website_id not in websites]
+
+        if stale:
+            for url in stale:
+                WEBSITES_CACHE.delete(website_base_url(url))
+
+            urls_ids.update(cls.get_ids_from_urls(stale))
+
+            websites.update(cls.objects.in_bulk(
+                set(urls_ids.values()) - set(websites) - set([None])))
+
+        return dict((url, websites.get(website_id))
+                    for url, website_id in urls_ids.items())
+
+    @classmethod
+    def get_id_from_url(cls, url):
+        """ Like :meth:`get_from_url`, but return the website ID.
+
+        A cache hit costs no query at all: use this method when
+        the ID is enough, eg. to set a ``website_id`` field.
         """
 
-        try:
-            proto, host_and_port, remaining = split_url(url)
+        return cls.get_ids_from_urls([url])[url]
 
-        except:
-            LOGGER.exception(u'Unable to split url “%s”', url)
-            return None
+    @classmethod
+    def get_ids_from_urls(cls, urls):
+        """ Return a dict ``{url: website ID or None}``.
+
+        Hosts missing from :data:`WEBSITES_CACHE` are looked up in one
+        query; only the ones which don't exist yet are created one by
+        one. ``None`` is for URLs which cannot be split, or whose
+        website could not be created.
+        """
 
-        base_url = '%s://%s' % (proto, host_and_port)
+        results = {}
 
-        @cached_as(WebSite, timeout=3600, extra=base_url)
-        def _get_website_from_url(base_url):
+        # {base_url: [urls]}
+        missing = {}
 
+        for url in urls:
+            if WEBSITES_CACHE.get(url, MISSING) is None:
+                # Already known as unsplittable.
+                results[url] = None
+                continue
+
+            base_url = website_base_url(url)
+
+            if base_url is None:
+                WEBSITES_CACHE.set(url, None,
+                                   ttl=config.WEBSITE_CACHE_NEGATIVE_TTL)
+                results[url] = None
+                continue
+
+            website_id = WEBSITES_CACHE.get(base_url, MISSING)
+
+            if website_id is MISSING:
+                missing.setdefault(base_url, []).append(url)
+
+            else:
+                results[url] = website_id
+
+        if missing:
+            websites = cls.objects.filter(url__in=missing.keys())
+
+            existing = dict((website.url, website) for website in websites)
+
+            for base_url, base_url_urls in missing.items():
+                website_id = cls.resolve_base_url(base_url, base_url_urls[0],
+                                                  existing.get(base_url))
+
+                for url in base_url_urls:
+                    results[url] = website_id
+
+        return results
+
+    @classmethod
+    def resolve_base_url(cls, base_url, url, website=None):
+        """ Get or create the website of :param:`base_url`, cache its ID.
+
+        Return the website ID, the master one if it was merged as a
+        duplicate, or ``None`` on error. Errors are not cached: the
+        next call will try again.
+        """
+
+        if website is None:
             try:
-                website, _ = WebSite.objects.get_or_create(url=base_url)
+                website, created = cls.objects.get_or_create(url=base_url)
 
             except:
                 LOGGER.exception('Could not get or create website from url '
                                  u'“%s” (via original “%s”)', base_url, url)
                 return None
 
-            return website
+        website_id = website.duplicate_of_id or website.id
 
-        try:
-            return _get_website_from_url(base_url)
+        WEBSITES_CACHE.set(base_url, website_id, ttl=config.WEBSITE_CACHE_TTL)
 
-        except TypeError:
-            return None
+        return website_id
 
 
 # ————————————————————————————————————————————————————————————————————— Signals
@@ -258,12 +391,20 @@ def website_pre_save(instance, **kwargs):
 
 def website_post_save(instance, **kwargs):
 
+    # Only this process is notified; others rely on the cache expiry.
+    # This also covers register_duplicate(), which saves the duplicate.
+    WEBSITES_CACHE.delete(instance.url)
+    invalidate_websites(instance.id)
+
     if kwargs.get('created', False):
         statsd.gauge('websites.counts.total', 1, delta=True)
 
 
 def website_pre_delete(instance, **kwargs):
 
+    WEBSITES_CACHE.delete(instance.url)
+    invalidate_websites(instance.id)
+
     statsd.gauge('websites.counts.total', -1, delta=True)
 
 
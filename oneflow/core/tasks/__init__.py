@@ -28,7 +28,11 @@ from celery.signals import beat_init
 
 from django.utils.translation import ugettext_lazy as _
 
-from ..models.reldb import BaseFeed
+from ..models.reldb import (
+    BaseFeed,
+    TwitterAccount,
+    twitteraccount_stream_lock,
+)
 
 from oneflow.base.utils import RedisExpiringLock
 from oneflow.base.utils.dateutils import (today, timedelta,
@@ -159,3 +163,19 @@ def clear_all_locks(conf=None, **kwargs):
 
     else:
         LOGGER.info(u'No feed refresh lock released.')
+
+    # Stream locks hold the unique value of their task: delete
+    # them, a release() without this value would not match.
+    stream_locks = [twitteraccount_stream_lock(account).lock_id
+                    for account in TwitterAccount.objects.all()]
+
+    locked_count = RedisExpiringLock.REDIS.delete(
+        *stream_locks) if stream_locks else 0
+
+    if locked_count:
+        LOGGER.info(u'Released %s Twitter accounts stream locks.',
+                    locked_count)
+
+    # Released locks and expired leases are now out of sync:
+    # start again from what the database knows.
+    BaseFeed.rebuild_refresh_schedule()
@@ -21,6 +21,7 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 import logging
 import time as pytime
 
+from statsd import statsd
 from constance import config
 
 from celery import task, chain as tasks_chain
@@ -49,8 +50,16 @@ from ..models import (
     UserCounters,
 )
 
+from common import REDIS
+
 LOGGER = logging.getLogger(__name__)
 
+# Last read ID examined by an unfinished global_reads_checker() run.
+READS_CHECKER_CHECKPOINT_KEY = 'grc:checkpoint'
+
+# A checkpoint older than this is obsolete, better start over.
+READS_CHECKER_CHECKPOINT_EXPIRE = 3600 * 24 * 7
+
 from archive import archive_documents
 
 
@@ -314,7 +323,11 @@ def global_subscriptions_checker(force=False, limit=None, from_feeds=True,
 def global_duplicates_checker(limit=None, force=False):
     """ Check that duplicate articles have no more Reads anywhere.
 
-    Fix it if not, and update all counters accordingly.
+    Fix it if not, and update all counters accordingly. Duplicates are
+    examined by chunks of ``config.CHECK_DUPLICATES_CHUNK_SIZE``: those
+    which need it are replaced with set-based queries (cf.
+    :meth:`BaseItem.replace_duplicates`), and expired ``FINISHED`` ones
+    are purged with one ``DELETE`` per chunk.
 
     :param limit: integer, the maximum number of duplicates to check.
         Default: none.
@@ -349,12 +362,14 @@ def global_duplicates_checker(limit=None, force=False):
 
     start_time = pytime.time()
     duplicates = BaseItem.objects.duplicate()
+    chunk_size = config.CHECK_DUPLICATES_CHUNK_SIZE
 
     total_dupes_count  = duplicates.count()
     total_reads_count  = 0
     processed_dupes    = 0
     done_dupes_count   = 0
     purged_dupes_count = 0
+    last_id            = 0
 
     purge_after_weeks_count = max(1, config.CHECK_DUPLICATES_PURGE_AFTER_WEEKS)
     purge_after_weeks_count = min(52, purge_after_weeks_count)
@@ -368,63 +383,92 @@ def global_duplicates_checker(limit=None, force=False):
                    total_dupes_count)):
 
         try:
-            for duplicate in duplicates.iterator():
-                reads = duplicate.reads.all()
-
-                processed_dupes += 1
-
-                if reads.exists():
-                    done_dupes_count  += 1
-                    reads_count        = reads.count()
-                    total_reads_count += reads_count
-
-                    LOGGER.info(u'Duplicate %s #%s still has %s reads, fixing…',
-                                duplicate._meta.model.__name__,
-                                duplicate.id, reads_count)
-
-                    duplicate.duplicate_of.register_duplicate(
-                        duplicate, force=duplicate.duplicate_status
-                        == DUPLICATE_STATUS.FINISHED)
-
-                if duplicate.duplicate_status == DUPLICATE_STATUS.FINISHED:
-                    #
-                    # TODO: check we didn't get some race-conditions new
-                    #       dependancies between the moment the duplicate
-                    #       was marked duplicate and now.
-
-                    if duplicate.date_created < purge_before_date:
-                        try:
-                            with transaction.atomic():
-                                duplicate.delete()
-                        except:
-                            LOGGER.exception(u'Exception while deleting '
-                                             u'duplicate %s #%s',
-                                             duplicate._meta.model.__name__,
-                                             duplicate.id)
-
-                        purged_dupes_count += 1
-                        LOGGER.info(u'Purged duplicate %s #%s from database.',
-                                    duplicate._meta.model.__name__,
-                                    duplicate.id)
-
-                elif duplicate.duplicate_status in (
-                    DUPLICATE_STATUS.NOT_REPLACED,
-                        DUPLICATE_STATUS.FAILED):
-                    # Something went wrong, perhaps the
-                    # task was purged before beiing run.
-                    duplicate.duplicate_of.register_duplicate(duplicate)
-                    done_dupes_count += 1
-
-                elif duplicate.duplicate_status is None:
-                    # Something went very wrong. If the article is a known
-                    # duplicate, its status field should have been set to
-                    # at least NOT_REPLACED.
-                    duplicate.duplicate_of.register_duplicate(duplicate)
-                    done_dupes_count += 1
-
-                    LOGGER.error(u'Corrected duplicate %s #%s found with no '
-                                 u'status.', duplicate._meta.model.__name__,
-                                 duplicate.id)
+            while True:
+                chunk = list(duplicates.filter(id__gt=last_id).order_by(
+                    'id').values_list('id', 'duplicate_of_id',
+                                      'duplicate_status', 'date_created')[
+                        :min(chunk_size, limit - processed_dupes)
+                        if limit else chunk_size])
+
+                if not chunk:
+                    break
+
+                last_id = chunk[-1][0]
+                processed_dupes += len(chunk)
+
+                finished_ids = set(dupe_id for dupe_id, _, status, _
+                                   in chunk
+                                   if status == DUPLICATE_STATUS.FINISHED)
+
+                # FINISHED duplicates should have no read left.
+                # If they still have, something went wrong.
+                with_reads_ids = set(Read.objects.filter(
+                    item_id__in=finished_ids).values_list(
+                        'item_id', flat=True).distinct())
+
+                # Any other status means something went wrong, perhaps
+                # the task was purged before beiing run, or the status
+                # was not even set (None).
+                to_replace = dict(
+                    (dupe_id, master_id)
+                    for dupe_id, master_id, status, _ in chunk
+                    if dupe_id not in finished_ids
+                    or dupe_id in with_reads_ids)
+
+                failed_ids = set()
+
+                if to_replace:
+                    try:
+                        total_reads_count += BaseItem.replace_duplicates(
+                            to_replace)
+
+                    except:
+                        LOGGER.exception(u'Bulk replacement of %s '
+                                         u'duplicates failed, falling '
+                                         u'back to one-by-one.',
+                                         len(to_replace))
+
+                        failed_ids = set(to_replace.keys())
+
+                        for duplicate in BaseItem.objects.filter(
+                                id__in=failed_ids):
+                            duplicate.duplicate_of.register_duplicate(
+                                duplicate, force=True)
+
+                    done_dupes_count += len(to_replace)
+
+                    statsd.incr('checks.duplicates.replaced',
+                                len(to_replace))
+
+                # TODO: check we didn't get some race-conditions new
+                #       dependancies between the moment the duplicate
+                #       was marked duplicate and now.
+                to_purge = [dupe_id for dupe_id, _, _, date_created in chunk
+                            if dupe_id in finished_ids
+                            and dupe_id not in failed_ids
+                            and date_created < purge_before_date]
+
+                if to_purge:
+                    try:
+                        with transaction.atomic():
+                            BaseItem.objects.non_polymorphic().filter(
+                                id__in=to_purge).delete()
+
+                    except:
+                        LOGGER.exception(u'Exception while purging %s '
+                                         u'duplicates after #%s.',
+                                         len(to_purge), to_purge[0])
+
+                    else:
+                        purged_dupes_count += len(to_purge)
+                        statsd.incr('checks.duplicates.purged',
+                                    len(to_purge))
+
+                statsd.incr('checks.duplicates.processed', len(chunk))
+
+                LOGGER.info(u'global_duplicates_checker(): %s/%s '
+                            u'duplicates processed so far.',
+                            processed_dupes, total_dupes_count)
 
                 if limit and processed_dupes >= limit:
                     break
@@ -454,24 +498,29 @@ def global_duplicates_checker(limit=None, force=False):
 
 @task(name="oneflow.core.tasks.global_reads_checker", queue='check')
 def global_reads_checker(limit=None, extended_check=False, force=False,
-                         verbose=False, break_on_exception=False):
+                         verbose=False, break_on_exception=False,
+                         restart=False):
     """ Check all reads and their dependants.
 
     Will activate reads that are currently bad, but whose article is OK
     to display.
 
-    This task is one of the most expensive thing in 1flow.
-    It can run for hours because it scans all the bad reads and their
-    articles, but will not kill the database with massive updates, it
-    does them one by one.
+    This task is one of the most expensive thing in 1flow. It walks all
+    the bad reads by chunks of ``config.CHECK_READS_CHUNK_SIZE``, in ID
+    order. Each chunk is joined to its items in one query, and the bad
+    reads whose item is now good are activated with one bulk update.
+
+    After each chunk, the last read ID is stored in REDIS. If the run is
+    interrupted (worker restart, lock expiration…), the next one resumes
+    from there instead of starting over.
 
     Can be disabled by ``config.CHECK_READS_DISABLED`` directive.
 
-    :param limit: integer, the maximum number of duplicates to check.
+    :param limit: integer, the maximum number of reads to activate.
         Default: none.
     :param extended_check: boolean, default ``False``.
         Runs :meth:`Read.set_subscriptions` if ``True`` and checked read
-        has no subscription.
+        has no subscription. This part is done one read at a time.
     :param force: boolean, default ``False``, allows to by bypass and
         reacquire the lock.
     :param verbose: boolean, default ``False``, display (more)
@@ -479,6 +528,8 @@ def global_reads_checker(limit=None, extended_check=False, force=False,
     :param break_on_exception: boolean, default ``False``, stop processing
         at the first encountered exception. Whatever it is, the exception
         will be logged to sentry.
+    :param restart: boolean, default ``False``, ignore the checkpoint of
+        a previous interrupted run and start from the first bad read.
     """
 
     if config.CHECK_READS_DISABLED:
@@ -507,92 +558,144 @@ def global_reads_checker(limit=None, extended_check=False, force=False,
     if limit is None:
         limit = 0
 
-    bad_reads = Read.objects.bad()
+    if restart:
+        REDIS.delete(READS_CHECKER_CHECKPOINT_KEY)
+
+    last_id = int(REDIS.get(READS_CHECKER_CHECKPOINT_KEY) or 0)
+
+    if last_id:
+        LOGGER.info(u'global_reads_checker(): resuming after read #%s.',
+                    last_id)
 
-    total_reads_count   = bad_reads.count()
+    bad_reads  = Read.objects.bad()
+    chunk_size = config.CHECK_READS_CHUNK_SIZE
+
+    total_reads_count   = bad_reads.filter(id__gt=last_id).count()
     processed_reads     = 0
-    wiped_reads_count   = 0
     changed_reads_count = 0
     skipped_count       = 0
+    finished            = False
 
     with benchmark(u"Check {0}/{1} reads".format(limit or u'all',
                    total_reads_count)):
         try:
-            for read in bad_reads.iterator():
-
-                processed_reads += 1
-
-                if limit and changed_reads_count >= limit:
+            while True:
+                # Keyset pagination: never OFFSET, and reads
+                # activated meanwhile are simply not seen.
+                chunk = list(bad_reads.filter(id__gt=last_id).order_by(
+                    'id').values_list('id', 'item_id', 'item__is_good')[
+                        :chunk_size])
+
+                if not chunk:
+                    finished = True
                     break
 
-                if read.is_good:
-                    # This read has been activated via another
-                    # checked one, attached to the same article.
-                    changed_reads_count += 1
-                    continue
-
-                try:
-                    article = read.item
-
-                except:
-                    LOGGER.critical(u'Could not get read.item for %s', read)
-                    continue
+                processed_reads += len(chunk)
 
                 if extended_check:
-                    try:
-                        if read.subscriptions.all().exists():
+                    skipped_ids = check_reads_subscriptions(
+                        [read_id for read_id, _, _ in chunk])
+                    skipped_count += len(skipped_ids)
 
-                            # TODO: remove this
-                            #       check_set_subscriptions_131004_done
-                            #       transient check.
-                            if read.check_set_subscriptions_131004_done:
-                                read.check_subscriptions()
+                else:
+                    skipped_ids = ()
 
-                            else:
-                                read.check_set_subscriptions_131004()
+                good_ids = [read_id for read_id, _, item_is_good in chunk
+                            if item_is_good and read_id not in skipped_ids]
 
-                        else:
-                            read.set_subscriptions()
+                if limit:
+                    good_ids = good_ids[:limit - changed_reads_count]
 
-                    except:
-                        skipped_count += 1
-                        LOGGER.exception(u'Could not set subscriptions on '
-                                         u'read #%s, from article #%s, for '
-                                         u'user #%s. Skipping.', read.id,
-                                         article.id, read.user.id)
-                        continue
+                if good_ids:
+                    try:
+                        changed = Read.objects.filter(
+                            id__in=good_ids, is_good=False).update(
+                                is_good=True)
 
-                try:
-                    if article.is_good:
-                        changed_reads_count += 1
+                    except:
+                        LOGGER.exception(u'Could not activate %s reads '
+                                         u'after read #%s.',
+                                         len(good_ids), last_id)
+                        if break_on_exception:
+                            break
+
+                    else:
+                        changed_reads_count += changed
+
+                        # Cached descriptors already count bad reads
+                        # (cf. Subscription.create_read()), only the
+                        # global stats need to be adjusted.
+                        with statsd.pipeline() as spipe:
+                            spipe.gauge('reads.counts.good',
+                                        changed, delta=True)
+                            spipe.gauge('reads.counts.bad',
+                                        -changed, delta=True)
 
                         if verbose:
-                            LOGGER.info(u'Bad read %s has a good article, '
-                                        u'fixing…', read)
+                            LOGGER.info(u'Activated %s bad reads with a '
+                                        u'good item, up to read #%s.',
+                                        changed, good_ids[-1])
 
-                        article.activate_reads(extended_check=extended_check)
+                last_id = chunk[-1][0]
 
-                except:
-                    LOGGER.exception(u'Could not activate reads from '
-                                     u'article %s of read %s.',
-                                     article, read)
-                    if break_on_exception:
-                        break
+                REDIS.setex(READS_CHECKER_CHECKPOINT_KEY,
+                            READS_CHECKER_CHECKPOINT_EXPIRE, last_id)
+
+                if limit and changed_reads_count >= limit:
+                    break
 
         finally:
             my_lock.release()
 
+    if finished:
+        REDIS.delete(READS_CHECKER_CHECKPOINT_KEY)
+
     LOGGER.info(u'global_reads_checker(): %s/%s reads processed '
-                u'(%.2f%%), %s corrected (%.2f%%), %s deleted (%.2f%%), '
-                u'%s skipped (%.2f%%).',
+                u'(%.2f%%), %s corrected (%.2f%%), %s skipped (%.2f%%)%s.',
                 processed_reads, total_reads_count,
-                processed_reads * 100.0 / total_reads_count,
+                processed_reads * 100.0 / (total_reads_count or 1),
                 changed_reads_count,
-                changed_reads_count * 100.0 / processed_reads,
-                wiped_reads_count,
-                wiped_reads_count * 100.0 / processed_reads,
+                changed_reads_count * 100.0 / (processed_reads or 1),
                 skipped_count,
-                skipped_count * 100.0 / processed_reads)
+                skipped_count * 100.0 / (processed_reads or 1),
+                u'' if finished else
+                u', will resume after read #%s' % last_id)
+
+
+def check_reads_subscriptions(reads_ids):
+    """ Check the subscriptions of some reads, one by one.
+
+    This is the ``extended_check`` part of :func:`global_reads_checker`.
+
+    :returns: the set of the IDs of reads that failed, which must not
+        be activated.
+    """
+
+    skipped_ids = set()
+
+    for read in Read.objects.filter(id__in=reads_ids):
+        try:
+            if read.subscriptions.all().exists():
+
+                # TODO: remove this
+                #       check_set_subscriptions_131004_done
+                #       transient check.
+                if read.check_set_subscriptions_131004_done:
+                    read.check_subscriptions()
+
+                else:
+                    read.check_set_subscriptions_131004()
+
+            else:
+                read.set_subscriptions()
+
+        except:
+            skipped_ids.add(read.id)
+            LOGGER.exception(u'Could not set subscriptions on read #%s, '
+                             u'from item #%s, for user #%s. Skipping.',
+                             read.id, read.item_id, read.user_id)
+
+    return skipped_ids
 
 
 def check_one_user(user, extended_check=False, force=False, verbose=False):
@@ -25,15 +25,17 @@ from constance import config
 from celery import task
 
 from django.utils.translation import ugettext_lazy as _
+from django.contrib.contenttypes.models import ContentType
 
 from ..models.reldb import (
     MailAccount,
-    BaseFeed, basefeed_refresh_task
+    BaseFeed, basefeed_refresh_task,
+    RssAtomFeed, refresh_rssatom_feeds_pool,
+    MailFeed, refresh_mailfeeds_pool,
 )
 
-from oneflow.base.utils import RedisExpiringLock
-from oneflow.base.utils.dateutils import (now, timedelta,
-                                          naturaldelta, benchmark)
+from oneflow.base.utils import RedisExpiringLock, list_chunks
+from oneflow.base.utils.dateutils import benchmark
 
 LOGGER = logging.getLogger(__name__)
 
@@ -81,86 +83,95 @@ def refresh_all_feeds(limit=None, force=False):
             LOGGER.warning(u'refresh_all_feeds() is already locked, aborting.')
             return
 
-    # This should bring us a Polymorphic Query to refresh all feeds types.
-    feeds = BaseFeed.objects.filter(is_active=True,
-                                    is_internal=False).order_by(
-                                        'date_last_fetch')
-
-    if limit:
-        feeds = feeds[:limit]
-
     with benchmark('refresh_all_feeds()'):
 
-        try:
-            count = 0
-            mynow = now()
-
-            for feed in feeds:
-
-                if feed.refresh_lock.is_locked():
-                    # The refresh task lauched before its expiration, and is
-                    # still [long] running while we want to launch another.
-                    # Avoid, because the new would exit immediately on
-                    # date_last_fetch too recent.
-                    LOGGER.debug(u'Feed %s already locked, skipped.', feed)
-                    continue
-
-                if feed.date_last_fetch is None:
-
-                    basefeed_refresh_task.apply_async(
-                        args=(feed.id, ),
-
-                        # in `this_round_expire_time`, we will relaunch it
-                        expire=this_round_expire_time,
-                    )
-
-                    LOGGER.info(u'Launched immediate refresh of feed %s which '
-                                u'has never been refreshed.', feed)
-                    count += 1
-                    continue
-
-                if feed.fetch_interval > 86399:
-                    interval_days = feed.fetch_interval / 86400
-                    interval_seconds = feed.fetch_interval - (
-                        interval_days * 86400)
-
-                    interval = timedelta(days=interval_days,
-                                         seconds=interval_seconds)
-
-                else:
-                    interval = timedelta(seconds=feed.fetch_interval)
-
-                if force or feed.date_last_fetch + interval < mynow:
-
-                    how_late = feed.date_last_fetch + interval - mynow
-                    how_late = how_late.days * 86400 + how_late.seconds
-
-                    late = feed.date_last_fetch + interval < mynow
-
-                    basefeed_refresh_task.apply_async(
-                        args=(feed.id, ),
-                        kwargs={'force': force},
-                        expire=this_round_expire_time,
-                    )
-
-                    LOGGER.info(u'Launched refresh of feed %s (%s %s).',
-                                feed, naturaldelta(how_late),
-                                u'late' if late else u'earlier')
-                    count += 1
+        if force:
+            # Everything, regardless of the schedule.
+            feeds = BaseFeed.objects.filter(is_active=True,
+                                            is_internal=False).order_by(
+                                                'date_last_fetch')
+            if limit:
+                feeds = feeds[:limit]
 
-        finally:
-            # HEADS UP: in case the system is overloaded and feeds refresh()
-            #           tasks don't complete fast enough, the current task
-            #           will overload it even more. Thus, we intentionaly
-            #           don't release the lock to avoid over-re-launched
-            #           global tasks to feed the refresh queue with useless
-            #           double-triple-Nble individual tasks.
-            #
-            # my_lock.release()
-            pass
-
-        LOGGER.info(u'Launched %s refreshes out of %s feed(s) checked.',
-                    count, feeds.count())
+        else:
+            # Only the due feeds, popped from the schedule. We don't
+            # even need to check their locks: popped feeds are leased
+            # and won't be popped again while their refresh runs.
+            feeds_ids = BaseFeed.pop_refresh_due_ids(limit=limit)
+
+            if not feeds_ids:
+                LOGGER.info(u'No feed due for refresh.')
+                return
+
+            feeds = BaseFeed.objects.filter(id__in=feeds_ids,
+                                            is_active=True,
+                                            is_internal=False)
+
+        # We only need the feeds types to dispatch them, not to
+        # hydrate every feed model of every polymorphic table.
+        feeds = list(feeds.values_list('id', 'polymorphic_ctype_id'))
+
+        if not force:
+            # Closed or deleted since they were scheduled.
+            stale_ids = set(feeds_ids) - set(f[0] for f in feeds)
+
+            if stale_ids:
+                BaseFeed.unschedule_refresh_ids(list(stale_ids))
+
+        rssatom_ctype_id = ContentType.objects.get_for_model(RssAtomFeed).id
+        mail_ctype_id = ContentType.objects.get_for_model(MailFeed).id
+
+        # RSS/Atom feeds are refreshed in pooled batches when possible.
+        pool_batch_size = config.FEED_FETCH_POOL_BATCH_SIZE
+        pool_batch = []
+
+        # Mail feeds are always pooled, in order for
+        # each mail account to be scanned only once.
+        mail_batch = []
+
+        for feed_id, ctype_id in feeds:
+
+            if pool_batch_size and ctype_id == rssatom_ctype_id:
+                pool_batch.append(feed_id)
+                continue
+
+            if ctype_id == mail_ctype_id:
+                mail_batch.append(feed_id)
+                continue
+
+            basefeed_refresh_task.apply_async(
+                args=(feed_id, ),
+                kwargs={'force': force},
+
+                # in `this_round_expire_time`, we will relaunch it
+                expire=this_round_expire_time,
+            )
+
+        for chunk in list_chunks(pool_batch, pool_batch_size or 1):
+            refresh_rssatom_feeds_pool.apply_async(
+                args=(chunk, ),
+                kwargs={'force': force},
+                expire=this_round_expire_time,
+            )
+
+        if mail_batch:
+            refresh_mailfeeds_pool.apply_async(
+                args=(mail_batch, ),
+                kwargs={'force': force},
+                expire=this_round_expire_time,
+            )
+
+        # HEADS UP: in case the system is overloaded and feeds refresh()
+        #           tasks don't complete fast enough, the current task
+        #           will overload it even more. Thus, we intentionaly
+        #           don't release the lock to avoid over-re-launched
+        #           global tasks to feed the refresh queue with useless
+        #           double-triple-Nble individual tasks.
+        #
+        # my_lock.release()
+
+        LOGGER.info(u'Launched %s feed(s) refresh (%s pooled, %s mail).',
+                    len(feeds), len(pool_batch), len(mail_batch))
 
 # Allow to release the lock manually for testing purposes.
 refresh_all_feeds.lock = RedisExpiringLock(REFRESH_ALL_FEEDS_LOCK_NAME)
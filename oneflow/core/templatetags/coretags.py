@@ -20,11 +20,9 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 """
 
 import logging
-import difflib
 import mistune
 
 from constance import config
-from markdown_deux import markdown as mk2_markdown
 
 from django import template
 from django.db.models import Q
@@ -479,62 +477,10 @@ def read_action_toggle_url(read):
     return u'data-url-action-toggle={0}'.format(url_base)
 
 
-# @cached(CACHE_ONE_WEEK)
 def article_full_content_display(article):
+    """ Return the article HTML, rendered once for all readers. """
 
-    if article.content_type == models.CONTENT_TYPES.MARKDOWN:
-
-        if len(article.content) > config.READ_ARTICLE_MIN_LENGTH:
-
-            if isinstance(article, models.Tweet):
-                transient_content = article.content
-
-            else:
-                # START temporary measure.
-                # TODO: please get rid of this…
-
-                title_len = len(article.name)
-
-                transient_content = article.content
-
-                if title_len > 10:
-                    search_len = title_len * 2
-
-                    diff = difflib.SequenceMatcher(None,
-                                                   article.content[:search_len],
-                                                   article.name)
-
-                    if diff.ratio() > 0.51:
-                        for blk in reversed(diff.matching_blocks):
-                            # Sometimes, last match is the empty string… Skip.
-                            if blk[-1] != 0:
-                                transient_content = article.content[
-                                    blk[0] + blk[2]:
-                                ]
-                                break
-
-            # END temporary measure.
-
-            try:
-                # On large screens, make the article start a little far from
-                # the top of the screen, it makes a better reading experience.
-                return (u'<div class="spacer50 visible-lg"></div>'
-                        + mistune.markdown(transient_content))
-
-            except:
-                LOGGER.exception(u'Live Markdown to HTML conversion '
-                                 u'failed for article %s, trying '
-                                 u'alternate parser.', article)
-
-                try:
-                    return (u'<div class="spacer50 visible-lg"></div>'
-                            + mk2_markdown(transient_content))
-
-                except:
-                    LOGGER.exception(u'Alternate live Markdown to HTML '
-                                     u'conversion failed for article %s',
-                                     article)
-                    return None
+    return models.item_html(article)
 
 
 @register.simple_tag
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=E1103,C0103
+"""
+    Copyright 2013-2014 Olivier Cortès <oc@1flow.io>
+
+    This file is part of the 1flow project.
+
+    1flow is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of
+    the License, or (at your option) any later version.
+
+    1flow is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public
+    License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import re
+import logging
+import operator
+
+from django.test import TestCase
+
+from oneflow.core.models.reldb.feed.common import (
+    RULES_OPERATIONS,
+    MAIL_HEADER_FIELDS,
+    MAIL_MATCH_TYPES,
+)
+from oneflow.core.models.reldb.feed.rules import (
+    MAIL_HEADERS_NAMES,
+    CompiledRules,
+    mail_message_values,
+)
+
+LOGGER = logging.getLogger(__file__)
+
+
+# ——————————————————————————————————— The per-rule matching, before CompiledRules
+#
+# As in MailFeedRule.match_message*(), with the two bugs the compiled
+# rules fixed: header fields are looked up by their value, and regular
+# expressions are matched against the header, not the other way around.
+
+LEGACY_OPERATIONS = {
+    MAIL_MATCH_TYPES.CONTAINS: operator.contains,
+    MAIL_MATCH_TYPES.NCONTAINS: lambda a, b: not operator.contains(a, b),
+    MAIL_MATCH_TYPES.STARTS: lambda a, b: a.startswith(b),
+    MAIL_MATCH_TYPES.NSTARTS: lambda a, b: not a.startswith(b),
+    MAIL_MATCH_TYPES.ENDS: lambda a, b: a.endswith(b),
+    MAIL_MATCH_TYPES.NENDS: lambda a, b: not a.endswith(b),
+    MAIL_MATCH_TYPES.EQUALS: operator.eq,
+    MAIL_MATCH_TYPES.NEQUALS: operator.ne,
+}
+
+
+def legacy_match_individual(rule, message):
+
+    if rule.match_case:
+        value = rule.match_value
+
+    else:
+        value = rule.match_value.lower()
+
+    if rule.match_type in (MAIL_MATCH_TYPES.RE_MATCH,
+                           MAIL_MATCH_TYPES.NRE_MATCH):
+        compiled_re = re.compile(value)
+
+        def operation(a, b):
+            matched = bool(compiled_re.match(a))
+
+            if rule.match_type == MAIL_MATCH_TYPES.NRE_MATCH:
+                return not matched
+
+            return matched
+
+    else:
+        operation = LEGACY_OPERATIONS[rule.match_type]
+
+    def match_header(header):
+        if not rule.match_case:
+            header = header.lower()
+
+        return operation(header, value)
+
+    if rule.header_field == MAIL_HEADER_FIELDS.OTHER:
+        headers_names = (rule.other_header, )
+
+    else:
+        headers_names = MAIL_HEADERS_NAMES[rule.header_field]
+
+    for header_name in headers_names:
+        header = message.get(header_name, u'')
+
+        if isinstance(header, (list, tuple)):
+            if header[1].startswith(u'<'):
+                if match_header(u'{0} {1}'.format(*header)):
+                    return True
+
+            else:
+                for header_part in header:
+                    if match_header(header_part):
+                        return True
+
+        elif match_header(header):
+            return True
+
+    return False
+
+
+def legacy_match(rules, message):
+
+    if not rules[0].group:
+        return legacy_match_individual(rules[0], message)
+
+    operation_any = rules[0].group_operation == RULES_OPERATIONS.ANY
+
+    group = [rule for rule in rules if rule.group == rules[0].group]
+
+    for rule in group:
+        if legacy_match_individual(rule, message):
+            if operation_any:
+                return True
+
+        elif not operation_any:
+            return False
+
+    return not operation_any
+
+
+def legacy_feed_match(rules, operation_any, message):
+    """ Return the matched rules, as MailFeed.get_new_entries() did. """
+
+    matched = False
+    seen_groups = []
+
+    for index, rule in enumerate(rules):
+
+        if rule.group:
+            if rule.group in seen_groups:
+                continue
+
+            seen_groups.append(rule.group)
+
+        if legacy_match(rules[index:], message):
+            if operation_any:
+                return [rule]
+
+            matched = True
+
+        elif not operation_any:
+            return []
+
+    return list(rules) if matched else []
+
+
+# ————————————————————————————————————————————————————————————————————— Tests
+
+
+class FakeRule(object):
+
+    """ Only what the rules engine reads. """
+
+    counter = 0
+
+    def __init__(self, match_type, match_value, match_case=False,
+                 header_field=MAIL_HEADER_FIELDS.SUBJECT, other_header=None,
+                 group=None, group_operation=RULES_OPERATIONS.ANY):
+
+        FakeRule.counter += 1
+
+        self.id              = FakeRule.counter
+        self.match_type      = match_type
+        self.match_value     = match_value
+        self.match_case      = match_case
+        self.header_field    = header_field
+        self.other_header    = other_header
+        self.group           = group
+        self.group_operation = group_operation
+
+    def __repr__(self):
+
+        return u'<FakeRule #{0}: {1} {2!r}{3}>'.format(
+            self.id, self.match_type, self.match_value,
+            u' (case)' if self.match_case else u'')
+
+
+MESSAGES = [
+    {
+        'Subject': u'Release of C++ (beta)? 2.0 [final]',
+        'From': (u'Olivier Cortès', u'<oc@1flow.io>'),
+        'To': u'Team <team@1flow.io>',
+        'List-ID': u'<dev.lists.1flow.io>',
+    },
+    {
+        'Subject': u're: c++ beta.* news',
+        'From': (u'Toto <n@t.com>', u'Tutu <m@t.com>'),
+        'X-Spam-Flag': u'YES',
+    },
+    {
+        'Subject': u'Nothing special',
+    },
+    {},
+]
+
+# Regular expression special characters, and case differences.
+TEXT_VALUES = [
+    u'C++ (beta)?',
+    u'c++',
+    u'beta.*',
+    u'[final]',
+    u'2.0',
+    u'.',
+    u'\\d',
+    u'Re:',
+    u'nothing special',
+    u'Nothing special',
+    u'<oc@1flow.io>',
+    u'',
+]
+
+RE_VALUES = [
+    u're:',
+    u'Re:',
+    u'.*c\\+\\+',
+    u'[a-z]+ special$',
+    u'release',
+]
+
+TEXT_MATCH_TYPES = [
+    MAIL_MATCH_TYPES.CONTAINS,
+    MAIL_MATCH_TYPES.NCONTAINS,
+    MAIL_MATCH_TYPES.STARTS,
+
+    # HEADS UP: NSTARTS has the same value as ENDS,
+    #           both the old and new code do ENDS.
+    MAIL_MATCH_TYPES.ENDS,
+    MAIL_MATCH_TYPES.NENDS,
+    MAIL_MATCH_TYPES.EQUALS,
+    MAIL_MATCH_TYPES.NEQUALS,
+]
+
+
+class CompiledRulesEquivalenceTest(TestCase):
+
+    """ Compiled rules must match like the former per-rule matching. """
+
+    def assertSameMatch(self, rules, operation_any=True):
+
+        compiled = CompiledRules(rules, operation_any, mail_message_values)
+
+        for message in MESSAGES:
+            self.assertEquals(
+                compiled.match(message)[:1] if operation_any
+                else compiled.match(message),
+                legacy_feed_match(rules, operation_any, message),
+                u'{0} on {1}'.format(rules, message))
+
+    def test_text_operations(self):
+
+        for match_type in TEXT_MATCH_TYPES:
+            for value in TEXT_VALUES:
+                for match_case in (False, True):
+                    self.assertSameMatch([FakeRule(match_type, value,
+                                                   match_case)])
+
+    def test_regex_operations(self):
+
+        for match_type in (MAIL_MATCH_TYPES.RE_MATCH,
+                           MAIL_MATCH_TYPES.NRE_MATCH):
+            for value in RE_VALUES:
+                for match_case in (False, True):
+                    self.assertSameMatch([FakeRule(match_type, value,
+                                                   match_case)])
+
+    def test_header_fields(self):
+
+        for header_field in (MAIL_HEADER_FIELDS.SUBJECT,
+                             MAIL_HEADER_FIELDS.FROM,
+                             MAIL_HEADER_FIELDS.TO,
+                             MAIL_HEADER_FIELDS.COMMON,
+                             MAIL_HEADER_FIELDS.LIST):
+            for value in (u'cortès', u'tutu <m@t.com>', u'1flow', u'c++'):
+                self.assertSameMatch([FakeRule(MAIL_MATCH_TYPES.CONTAINS,
+                                               value,
+                                               header_field=header_field)])
+
+        self.assertSameMatch([FakeRule(
+            MAIL_MATCH_TYPES.EQUALS, u'yes',
+            header_field=MAIL_HEADER_FIELDS.OTHER,
+            other_header=u'X-Spam-Flag')])
+
+    def test_merged_contains(self):
+
+        # Many CONTAINS on the same values make a merged prefilter;
+        # its special characters must be escaped.
+        for match_case in (False, True):
+            for operation_any in (True, False):
+                self.assertSameMatch([
+                    FakeRule(MAIL_MATCH_TYPES.CONTAINS, value, match_case)
+                    for value in TEXT_VALUES
+                ], operation_any)
+
+                self.assertSameMatch([
+                    FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'\\d', match_case),
+                    FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'.*', match_case),
+                    FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'(beta)?',
+                             match_case),
+                ], operation_any)
+
+    def test_merged_contains_mixed_case(self):
+
+        for operation_any in (True, False):
+            self.assertSameMatch([
+                FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'C++', True),
+                FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'c++', True),
+                FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'C++', False),
+                FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'NEWS', False),
+            ], operation_any)
+
+    def test_groups(self):
+
+        for group_operation in (RULES_OPERATIONS.ANY, RULES_OPERATIONS.ALL):
+            for operation_any in (True, False):
+                self.assertSameMatch([
+                    FakeRule(MAIL_MATCH_TYPES.CONTAINS, u'c++',
+                             group=1, group_operation=group_operation),
+                    FakeRule(MAIL_MATCH_TYPES.STARTS, u're:',
+                             group=1, group_operation=group_operation),
+                    FakeRule(MAIL_MATCH_TYPES.RE_MATCH, u'.*special',
+                             group=2, group_operation=group_operation),
+                    FakeRule(MAIL_MATCH_TYPES.NCONTAINS, u'beta',
+                             group=2, group_operation=group_operation),
+                    FakeRule(MAIL_MATCH_TYPES.ENDS, u'[final]'),
+                ], operation_any)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=E1103,C0103
+"""
+    Copyright 2013-2014 Olivier Cortès <oc@1flow.io>
+
+    This file is part of the 1flow project.
+
+    1flow is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of
+    the License, or (at your option) any later version.
+
+    1flow is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public
+    License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import logging
+
+from django.test import TestCase
+
+from oneflow.core.models.reldb import Read, Subscription
+from oneflow.core.models.reldb.item.base import (
+    SEARCH_CONFIG,
+    parse_search_query,
+    search_items_sql,
+)
+
+LOGGER = logging.getLogger(__file__)
+
+
+class SearchQueryTest(TestCase):
+
+    def test_parse_plain_terms(self):
+
+        self.assertEquals(parse_search_query(u'python  django'),
+                          ([u'python', u'django'], []))
+
+    def test_parse_signed_terms(self):
+
+        self.assertEquals(parse_search_query(u'+python -java django'),
+                          ([u'python', u'django'], [u'java']))
+
+    def test_parse_lone_signs(self):
+
+        self.assertEquals(parse_search_query(u'+ - python'),
+                          ([u'python'], []))
+
+    def test_parse_empty(self):
+
+        self.assertEquals(parse_search_query(u''), ([], []))
+        self.assertEquals(parse_search_query(u'   '), ([], []))
+
+    def test_sql_included_terms(self):
+
+        sql, params = search_items_sql(u'python +django')
+
+        # All included terms are tested in one indexed operation.
+        self.assertEquals(sql.count(u'@@'), 1)
+        self.assertEquals(params, [SEARCH_CONFIG, u'python django'])
+
+    def test_sql_excluded_terms(self):
+
+        sql, params = search_items_sql(u'python -java -ruby')
+
+        self.assertEquals(sql.count(u'NOT coalesce('), 2)
+        self.assertEquals(params, [SEARCH_CONFIG, u'python',
+                                   SEARCH_CONFIG, u'java',
+                                   SEARCH_CONFIG, u'ruby'])
+
+    def test_sql_only_excluded_terms(self):
+
+        # Would scan every item; matches nothing instead.
+        for search in (u'-java', u'-java -ruby', u'+', u''):
+            sql, params = search_items_sql(search)
+
+            self.assertTrue(sql.endswith(u'WHERE false'))
+            self.assertEquals(params, [])
+
+
+class ReadSearchScopeTest(TestCase):
+
+    """ The search sub-query must not replace the other filters. """
+
+    def where(self, queryset):
+
+        return unicode(queryset.query).split(u' WHERE ', 1)[1]
+
+    def test_search_keeps_user_and_subscription(self):
+
+        reads = Read.objects.filter(user_id=7, subscriptions=42)
+
+        where = self.where(reads.search(u'python -java'))
+
+        self.assertTrue(u'"core_read"."user_id" = 7' in where)
+        self.assertTrue(u'"{0}"."subscription_id" = 42'.format(
+            Subscription.reads.through._meta.db_table) in where)
+        self.assertTrue(u'core_read.item_id IN (SELECT id FROM' in where)
+
+    def test_search_keeps_folder(self):
+
+        reads = Read.objects.filter(
+            user_id=7, subscriptions__in=Subscription.objects.filter(
+                folders__in=[3, 4]))
+
+        where = self.where(reads.search(u'python'))
+
+        self.assertTrue(u'"core_read"."user_id" = 7' in where)
+        self.assertTrue(u'"{0}"."subscription_id" IN (SELECT'.format(
+            Subscription.reads.through._meta.db_table) in where)
+        self.assertTrue(u'core_read.item_id IN (SELECT id FROM' in where)
+
+    def test_search_only_excluded_terms(self):
+
+        where = self.where(Read.objects.filter(user_id=7).search(u'-java'))
+
+        self.assertTrue(u'"core_read"."user_id" = 7' in where)
+        self.assertTrue(u'WHERE false' in where)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=E1103,C0103
+"""
+    Copyright 2013-2014 Olivier Cortès <oc@1flow.io>
+
+    This file is part of the 1flow project.
+
+    1flow is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of
+    the License, or (at your option) any later version.
+
+    1flow is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public
+    License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import uuid
+import logging
+
+from django.test import TestCase
+
+from oneflow.core.models.reldb.feed import twitter as twitter_module
+from oneflow.core.models.reldb.feed.twitter import TwitterFeed
+
+from . import TEST_REDIS
+
+LOGGER = logging.getLogger(__file__)
+
+
+class TwitterFeedCoverageTest(TestCase):
+
+    """ Test the covered tweet IDs ranges, in the test Redis database. """
+
+    def setUp(self):
+
+        self.old_redis = twitter_module.REDIS
+        twitter_module.REDIS = TEST_REDIS
+
+        # Never saved, only its ID makes the Redis keys.
+        self.feed = TwitterFeed(id=uuid.uuid4().int % 10 ** 9)
+
+        TEST_REDIS.delete(self.feed.redis_coverage_key,
+                          self.feed.redis_good_periods_key)
+
+    def tearDown(self):
+
+        TEST_REDIS.delete(self.feed.redis_coverage_key,
+                          self.feed.redis_good_periods_key)
+
+        twitter_module.REDIS = self.old_redis
+
+    def ranges(self):
+
+        return list(self.feed.coverage_ranges())
+
+    def test_merge_overlapping(self):
+
+        self.feed.record_good_period(10, 20)
+
+        self.assertEquals(self.feed.record_good_period(15, 30), 1)
+        self.assertEquals(self.ranges(), [(10, 30)])
+
+        # Contained in an existing range.
+        self.assertEquals(self.feed.record_good_period(12, 18), 1)
+        self.assertEquals(self.ranges(), [(10, 30)])
+
+    def test_merge_adjacent(self):
+
+        self.feed.record_good_period(10, 20)
+
+        self.assertEquals(self.feed.record_good_period(21, 25), 1)
+        self.assertEquals(self.feed.record_good_period(5, 9), 1)
+        self.assertEquals(self.ranges(), [(5, 25)])
+
+        # One ID apart is not adjacent.
+        self.assertEquals(self.feed.record_good_period(27, 30), 2)
+        self.assertEquals(self.ranges(), [(5, 25), (27, 30)])
+
+    def test_merge_many(self):
+
+        self.feed.record_good_period(10, 20)
+        self.feed.record_good_period(30, 40)
+        self.feed.record_good_period(50, 60)
+
+        self.assertEquals(self.ranges(), [(10, 20), (30, 40), (50, 60)])
+
+        # Reversed bounds are accepted.
+        self.assertEquals(self.feed.record_good_period(45, 19), 2)
+        self.assertEquals(self.ranges(), [(10, 45), (50, 60)])
+
+        self.assertEquals(self.feed.record_good_period(1, 100), 1)
+        self.assertEquals(self.ranges(), [(1, 100)])
+
+    def test_big_ids(self):
+
+        # Above the 2**53 precision of Redis scores.
+        base = 600000000000000000
+
+        self.feed.record_good_period(base, base + 10)
+        self.feed.record_good_period(base + 11, base + 20)
+        self.feed.record_good_period(base - 100, base - 50)
+
+        self.assertEquals(self.ranges(), [(base - 100, base - 50),
+                                          (base, base + 20)])
+
+    def test_gaps(self):
+
+        self.feed.record_good_period(10, 20)
+        self.feed.record_good_period(30, 40)
+
+        self.assertEquals(self.feed.coverage_gaps(0, 100),
+                          [(0, 9), (21, 29), (41, 100)])
+
+        self.assertEquals(self.feed.coverage_gaps(12, 35), [(21, 29)])
+        self.assertEquals(self.feed.coverage_gaps(10, 20), [])
+        self.assertEquals(self.feed.coverage_gaps(22, 25), [(22, 25)])
+        self.assertEquals(self.feed.coverage_gaps(45, 50), [(45, 50)])
+
+    def test_gaps_without_coverage(self):
+
+        self.assertEquals(self.feed.coverage_gaps(1, 10), [(1, 10)])
+
+    def test_floor(self):
+
+        self.feed.record_good_period(10, 20)
+        self.feed.record_good_period(30, 40)
+
+        self.assertEquals(self.feed.coverage_floor(35), 29)
+        self.assertEquals(self.feed.coverage_floor(25), 25)
+        self.assertEquals(self.feed.coverage_floor(10), 9)
+
+    def test_migrate_good_periods(self):
+
+        TEST_REDIS.sadd(self.feed.redis_good_periods_key,
+                        u'(10, 20)', u'(21, 30)', u'(50, 40)', u'invalid')
+
+        self.feed.record_good_period(35, 39)
+
+        self.assertEquals(self.ranges(), [(10, 30), (35, 50)])
+        self.assertFalse(TEST_REDIS.exists(self.feed.redis_good_periods_key))
+
+        self.assertEquals(self.feed.good_periods_count, 2)
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=E1103,C0103
+"""
+    Copyright 2013-2014 Olivier Cortès <oc@1flow.io>
+
+    This file is part of the 1flow project.
+
+    1flow is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as
+    published by the Free Software Foundation, either version 3 of
+    the License, or (at your option) any later version.
+
+    1flow is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public
+    License along with 1flow.  If not, see http://www.gnu.org/licenses/
+
+"""
+
+import uuid
+import logging
+
+from constance import config
+
+from django.test import TestCase
+
+from oneflow.core.models.reldb.feed.twitterstream import (
+    STREAM_MAX_TRACK_TERMS,
+    TwitterStreamMultiplexer,
+    track_matcher,
+    locations_matcher,
+    tweet_track_words,
+    twitteraccount_stream_lock,
+)
+
+from . import TEST_REDIS
+
+LOGGER = logging.getLogger(__file__)
+
+
+class FakeFeed(object):
+
+    """ Only what the multiplexer needs to build its routes. """
+
+    def __init__(self, id, track_terms=None, track_locations=None):
+
+        self.id              = id
+        self.track_terms     = track_terms
+        self.track_locations = track_locations
+
+    def __repr__(self):
+
+        return u'<FakeFeed #{0}>'.format(self.id)
+
+
+class FakeTransport(object):
+
+    """ Yield local items instead of connecting to Twitter. """
+
+    def __init__(self, items):
+
+        self.items    = items
+        self.calls    = []
+        self.consumed = 0
+
+    def stream(self, api_path, parameters):
+
+        self.calls.append((api_path, parameters))
+
+        for item in self.items:
+            self.consumed += 1
+            yield item
+
+
+class FakeLock(object):
+
+    """ A stream lock that someone else took in the meantime. """
+
+    expire_time = 0
+
+    def __init__(self):
+
+        self.refreshed = 0
+
+    def refresh(self):
+
+        self.refreshed += 1
+        return False
+
+    def acquire(self):
+
+        return False
+
+
+class FakeAccount(object):
+
+    """ Only what the stream lock needs to build its key. """
+
+    def __init__(self, id):
+
+        self.id = id
+
+
+def tweet(id, text, **kwargs):
+
+    item = {'id': id, 'text': text, 'user': {'screen_name': u'someone'}}
+    item.update(kwargs)
+
+    return item
+
+
+class TwitterStreamMatchersTest(TestCase):
+
+    def test_track_matcher_phrases(self):
+
+        match = track_matcher(u'python django, celery')
+
+        self.assertTrue(match(tweet_track_words(
+            tweet(1, u'Django is written in Python'))))
+
+        # All words of a phrase are needed.
+        self.assertFalse(match(tweet_track_words(
+            tweet(2, u'Python is a language'))))
+
+        # Phrases are OR'ed.
+        self.assertTrue(match(tweet_track_words(
+            tweet(3, u'We use CELERY.'))))
+
+    def test_track_matcher_entities(self):
+
+        match = track_matcher(u'oneflow')
+
+        self.assertTrue(match(tweet_track_words(
+            tweet(1, u'Nice reader', entities={
+                'hashtags': [{'text': u'oneflow'}]}))))
+
+        self.assertTrue(match(tweet_track_words(
+            tweet(2, u'Nice reader', entities={
+                'urls': [{'expanded_url': u'http://oneflow.example/'}]}))))
+
+    def test_track_matcher_empty(self):
+
+        match = track_matcher(u' , ')
+
+        self.assertFalse(match(tweet_track_words(tweet(1, u'anything'))))
+
+    def test_locations_matcher_coordinates(self):
+
+        # Paris, roughly.
+        match = locations_matcher(u'2.2,48.8,2.5,48.9')
+
+        self.assertTrue(match(tweet(1, u'here', coordinates={
+            'coordinates': [2.35, 48.85]})))
+
+        self.assertFalse(match(tweet(2, u'there', coordinates={
+            'coordinates': [-0.12, 51.5]})))
+
+    def test_locations_matcher_place(self):
+
+        match = locations_matcher(u'2.2,48.8,2.5,48.9')
+
+        # The place bounding box intersects the box.
+        self.assertTrue(match(tweet(1, u'around', place={
+            'bounding_box': {'coordinates': [[
+                [2.0, 48.0], [2.0, 49.0], [3.0, 49.0], [3.0, 48.0]]]}})))
+
+        self.assertFalse(match(tweet(2, u'nowhere')))
+
+    def test_locations_matcher_invalid(self):
+
+        match = locations_matcher(u'not,a,box')
+
+        self.assertFalse(match(tweet(1, u'here', coordinates={
+            'coordinates': [2.35, 48.85]})))
+
+
+class TwitterStreamMultiplexerTest(TestCase):
+
+    def setUp(self):
+
+        self.feeds = [
+            FakeFeed(1, track_terms=u'python'),
+            FakeFeed(2, track_terms=u'Python, django'),
+            FakeFeed(3, track_locations=u'2.2,48.8,2.5,48.9'),
+        ]
+
+        self.old_reload_interval = config.TWITTER_STREAM_RELOAD_INTERVAL
+        self.old_batch_delay     = config.TWITTER_STREAM_BATCH_DELAY
+
+    def tearDown(self):
+
+        config.TWITTER_STREAM_RELOAD_INTERVAL = self.old_reload_interval
+        config.TWITTER_STREAM_BATCH_DELAY     = self.old_batch_delay
+
+    def test_parameters(self):
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=FakeTransport([]))
+
+        # Terms are merged case-insensitively.
+        self.assertEquals(multiplexer.parameters['track'], u'python,django')
+        self.assertEquals(multiplexer.parameters['locations'],
+                          u'2.2,48.8,2.5,48.9')
+        self.assertEquals(multiplexer.overflow, [])
+
+    def test_routing(self):
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=FakeTransport([]))
+
+        self.assertEquals(multiplexer.route(tweet(1, u'Python rocks')),
+                          set([1, 2]))
+
+        self.assertEquals(multiplexer.route(tweet(2, u'Django rocks')),
+                          set([2]))
+
+        self.assertEquals(multiplexer.route(tweet(
+            3, u'Django in Paris', coordinates={
+                'coordinates': [2.35, 48.85]})), set([2, 3]))
+
+        self.assertEquals(multiplexer.route(tweet(4, u'Ruby rocks')),
+                          set())
+
+    def test_handle_item_buffers_once(self):
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=FakeTransport([]))
+
+        self.assertFalse(multiplexer.handle_item(tweet(1, u'python')))
+        self.assertFalse(multiplexer.handle_item(tweet(1, u'python')))
+        self.assertFalse(multiplexer.handle_item(tweet(2, u'ruby')))
+
+        self.assertEquals(multiplexer.buffer.keys(), [1])
+        self.assertEquals(multiplexer.buffer[1][1], set([1, 2]))
+
+    def test_handle_item_control_messages(self):
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=FakeTransport([]))
+
+        self.assertTrue(multiplexer.handle_item(
+            {'disconnect': {'reason': u'test'}}))
+
+        self.assertTrue(multiplexer.handle_item(
+            {'warning': {'percent_full': 90}}))
+
+        self.assertFalse(multiplexer.handle_item(
+            {'warning': {'percent_full': 10}}))
+
+        self.assertFalse(multiplexer.handle_item({'limit': {'track': 12}}))
+
+    def test_overflow(self):
+
+        terms = u','.join(u'term{0}'.format(index)
+                          for index in range(STREAM_MAX_TRACK_TERMS))
+
+        feeds = [
+            FakeFeed(1, track_terms=terms),
+            FakeFeed(2, track_terms=u'one more'),
+
+            # Already in the stream, it doesn't need more room.
+            FakeFeed(3, track_terms=u'term0, term1'),
+        ]
+
+        multiplexer = TwitterStreamMultiplexer(None, feeds,
+                                               transport=FakeTransport([]))
+
+        self.assertEquals(multiplexer.overflow, [feeds[1]])
+        self.assertEquals(multiplexer.feeds.keys(), [1, 3])
+        self.assertEquals(multiplexer.route(tweet(1, u'one more')), set())
+
+    def test_consume_reload(self):
+
+        config.TWITTER_STREAM_RELOAD_INTERVAL = 0
+        config.TWITTER_STREAM_BATCH_DELAY     = 3600
+
+        # None of them match: nothing to create in the database.
+        transport = FakeTransport([tweet(index, u'ruby')
+                                   for index in range(1, 11)])
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=transport)
+
+        reloads = []
+
+        def must_reload():
+            reloads.append(True)
+            return len(reloads) >= 3
+
+        self.assertEquals(multiplexer.consume(must_reload=must_reload), 0)
+
+        self.assertEquals(transport.calls, [('statuses/filter',
+                                             multiplexer.parameters)])
+        self.assertEquals(len(reloads), 3)
+        self.assertEquals(transport.consumed, 3)
+
+    def test_consume_disconnect(self):
+
+        transport = FakeTransport([tweet(1, u'ruby'),
+                                   {'disconnect': {'reason': u'test'}},
+                                   tweet(2, u'ruby')])
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=transport)
+
+        self.assertEquals(multiplexer.consume(), 0)
+        self.assertEquals(transport.consumed, 2)
+
+    def test_consume_lock_lost(self):
+
+        transport = FakeTransport([tweet(index, u'ruby')
+                                   for index in range(1, 11)])
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=transport)
+        lock = FakeLock()
+
+        self.assertEquals(multiplexer.consume(lock=lock), 0)
+        self.assertEquals(lock.refreshed, 1)
+        self.assertEquals(transport.consumed, 1)
+
+    def test_consume_lock_taken_over(self):
+
+        transport = FakeTransport([tweet(index, u'ruby')
+                                   for index in range(1, 11)])
+
+        multiplexer = TwitterStreamMultiplexer(None, self.feeds,
+                                               transport=transport)
+
+        account = FakeAccount(uuid.uuid4().hex)
+        lock1   = twitteraccount_stream_lock(account, uuid.uuid4().hex)
+        lock2   = twitteraccount_stream_lock(account, uuid.uuid4().hex)
+
+        lock1.REDIS = lock2.REDIS = TEST_REDIS
+
+        self.assertTrue(lock1.acquire())
+
+        # Our lock expires, and another stream task takes it.
+        TEST_REDIS.delete(lock1.lock_id)
+
+        self.assertTrue(lock2.acquire())
+        self.assertFalse(lock1.refresh())
+
+        # Check it at every tweet.
+        lock1.expire_time = 0
+
+        self.assertEquals(multiplexer.consume(lock=lock1), 0)
+        self.assertEquals(transport.consumed, 1)
+
+        # The other task still holds it.
+        self.assertTrue(lock2.refresh())
+        self.assertTrue(lock2.release())
+
+    def test_consume_without_feeds(self):
+
+        transport = FakeTransport([tweet(1, u'python')])
+
+        multiplexer = TwitterStreamMultiplexer(None, [], transport=transport)
+
+        self.assertEquals(multiplexer.consume(), 0)
+        self.assertEquals(transport.calls, [])
@@ -42,6 +42,7 @@ from sparks.django.http import human_user_agent  # , JsonResponse
 from sparks.django.utils import HttpResponseTemporaryServerError
 from sparks.foundations.utils import lookahead
 
+from oneflow.base.fields import prefetch_redis_descriptors
 from oneflow.base.utils.dateutils import now
 from oneflow.base.utils.decorators import token_protected
 from oneflow.base.utils.http import clean_url
@@ -203,10 +204,24 @@ def source_selector(request, **kwargs):
     user     = request.user
     selector_prefs = user.preferences.selector
 
+    # Evaluate the querysets now, for the template to display the very
+    # same instances whose counters we get in a few REDIS round-trips.
+    # This includes the whole folders tree and their subscriptions.
+    top_folders, all_folders = Folder.get_tree_for(user)
+    open_subscriptions = list(user.nofolder_open_subscriptions)
+    closed_subscriptions = list(user.nofolder_closed_subscriptions)
+
+    prefetch_redis_descriptors(
+        all_folders + open_subscriptions + closed_subscriptions + [
+            subscription for folder in all_folders
+            for subscription in folder.subscriptions.all()
+        ])
+
     return render(request, template, {
         'subscriptions':               user.subscriptions,
-        'nofolder_open_subscriptions': user.nofolder_open_subscriptions,
-        'closed_subscriptions':        user.nofolder_closed_subscriptions,
+        'top_folders':                 top_folders,
+        'nofolder_open_subscriptions': open_subscriptions,
+        'closed_subscriptions':        closed_subscriptions,
         'show_closed_streams':         selector_prefs.show_closed_streams,
         'titles_show_unread_count':    selector_prefs.titles_show_unread_count,
         'folders_show_unread_count':   selector_prefs.folders_show_unread_count,
@@ -477,7 +492,12 @@ def admin_command(request, **kwargs):
 
 @token_protected
 def export_content(request, **kwargs):
-    """ Export recent feeds/articles as JSON. """
+    """ Export recent feeds/articles as JSON.
+
+    Articles are streamed batch by batch. If the export fails, the
+    response ends with a ``cursor``; pass it back in the ``cursor``
+    GET parameter to resume the export after the last batch sent.
+    """
 
     since = kwargs.get('since')
     until = kwargs.get('until', None)
@@ -511,42 +531,62 @@ def export_content(request, **kwargs):
             new_lines = u'\n' if pretty_print else u''
             indentation = u'  ' if pretty_print else u''
 
+            def dumps(obj):
+                # With JSON util, we overcome the now-traditional
+                # "datetime is not JSON serializable" error.
+                return json.dumps(
+                    obj,
+                    default=json_util.default,
+                    indent=2
+                    if pretty_print else None,
+
+                    separators=(',', ': ')
+                    if pretty_print else (',', ':'),
+                )
+
             yield u'{{{0}{1}"data":{0}{1}{1}[{0}'.format(new_lines,
                                                          indentation)
 
-            data_chunked = 0
+            # The cursor of the last batch completely sent. Given back
+            # on errors, for the client to resume the export from there.
+            cursor = request.GET.get('cursor', None)
+            in_feed = False
 
             try:
                 for chunk, last in lookahead(BaseFeed.export_content(
-                                             since, until, folder=folder)):
+                                             since, until, folder=folder,
+                                             cursor=cursor)):
 
-                    if last:
-                        format_string = u'{1}{1}{1}{2}{0}'
+                    batches = chunk.pop('articles')
 
-                    else:
-                        format_string = u'{1}{1}{1}{2},{0}'
+                    # Open the feed object and its articles list, then
+                    # stream the batches into it as they are loaded.
+                    yield u'{1}{1}{1}{2},{0}{1}{1}{1}"articles": ['.format(
+                        new_lines, indentation, dumps(chunk)[:-1].rstrip())
 
-                    # With JSON util, we overcome the now-traditional
-                    # "datetime is not JSON serializable" error.
-                    yield format_string.format(
-                        new_lines,
-                        indentation,
-                        json.dumps(
-                            chunk,
-                            default=json_util.default,
-                            indent=2
-                            if pretty_print else None,
+                    in_feed = True
+                    first = True
 
-                            separators=(',', ': ')
-                            if pretty_print else (',', ':'),
-                        )
-                    )
+                    for batch_cursor, exported_items in batches:
+                        items = u','.join(dumps(item)
+                                          for item in exported_items)
 
-                    data_chunked += 1
+                        yield items if first else u',' + items
+
+                        cursor = batch_cursor
+                        first = False
+
+                    in_feed = False
+
+                    yield u']}}{0}{1}'.format(u'' if last else u',',
+                                              new_lines)
 
             except Exception as e:
                 LOGGER.exception(u'Could not export content')
 
+                if in_feed:
+                    yield u']}}{0}'.format(new_lines)
+
                 # ID is unavailable if the exception
                 # happens in the low-level WSGI.
                 yield u'{1}{1}],{0}{1}{1}"sentry_id": "{2}",{0}'.format(
@@ -556,6 +596,10 @@ def export_content(request, **kwargs):
                 yield u'{1}{1}"exception": "{2}",{0}'.format(
                     new_lines, indentation, unicode(e))
 
+                if cursor:
+                    yield u'{1}{1}"cursor": {2},{0}'.format(
+                        new_lines, indentation, dumps(cursor))
+
                 yield u'{1}{1}"result": "ERR"{0}}}'.format(
                     new_lines, indentation)
 
@@ -22,7 +22,6 @@ License along with 1flow.  If not, see http://www.gnu.org/licenses/
 import logging
 
 from constance import config
-from mongoengine import Q
 
 from django.http import (
     HttpResponsePermanentRedirect,
@@ -48,8 +47,6 @@ from ..models import (
     Article,
     Read,
     Folder,
-    SimpleTag as Tag,
-    CONTENT_TYPES_FINAL
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -377,81 +374,15 @@ def read_with_endless_pagination(request, **kwargs):
         query_kwargs[u'subscriptions__in'] = Subscription.objects.filter(
             folders__in=folder.get_descendants(include_self=True))
 
-    # —————————————————————————————————————————————————————————————————— Search
-
-    if search:
-
-        raise NotImplementedError('rewrite search for reldb')
-
-        isearch = search.lower()
-
-        # Implement these loops for multi-words search.
-        for term in isearch.split():
-            if term.startswith(u'+'):
-                pass
-            elif term.startswith(u'-'):
-                pass
-
-        if subscription:
-            user_feeds = [subscription.feed]
-
-        elif folder:
-            user_feeds = [s.feed for s in Subscription.objects(folders=folder)]
-
-        else:
-            user_feeds = [s.feed for s in user.subscriptions]
-
-        # LOGGER.info(u'Matched user feeds for search “%s”: %s',
-        #            isearch, len(user_feeds))
-
-        matched_articles = Article.objects(
-            #
-            # NOTE: sync these filters with core.article.is_good
-            #       and core.feed.is_good
-            #
-            feeds__in=user_feeds,
-            orphaned__ne=True,
-            url_absolute=True,
-            duplicate_of__exists=False,
-            content_type__in=CONTENT_TYPES_FINAL).no_cache()
-
-        # LOGGER.info(u'First-pass filtered articles for search “%s”: %s',
-        #            isearch, matched_articles.count())
-
-        matched_articles = matched_articles.filter(
-            Q(title__icontains=isearch))
-
-        #  | Q(excerpt__icontains=isearch)
-        #  | Q(content__icontains=isearch))
-
-        # LOGGER.info(u'Matched articles for search “%s”: %s',
-        #            isearch, matched_articles.count())
-
-        tags = set()
-
-        for term in search.split():
-            try:
-                tag = Tag.objects.get(name=term)
-
-            except:
-                # Not a tag
-                pass
-            else:
-                tags.add(tag)
-
     # ————————————————————————————————————————————————————————————— Final query
 
-        if tags:
-            reads = user.reads(**query_kwargs).filter(
-                Q(tags=tag) | Q(article__in=matched_articles)).order_by(
-                *order_by)
-        else:
-            reads = user.reads(
-                article__in=matched_articles, **query_kwargs).order_by(
-                *order_by)
+    reads = user.reads.filter(**query_kwargs)
 
-    else:
-        reads = user.reads.filter(**query_kwargs).order_by(*order_by)
+    if search:
+        # Full-text, on the items search vector index.
+        reads = reads.search(search)
+
+    reads = reads.order_by(*order_by)
 
     header_text_left, header_text_right = _rwep_build_page_header_text(
         subscription, folder, user, primary_mode)
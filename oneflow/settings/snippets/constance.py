@@ -235,6 +235,20 @@ CONSTANCE_CONFIG.update({
                                            u'available but marked auto_read).')
                                            ),
 
+    'USER_IMPORT_POOL_SIZE': (8, ugettext(u'Maximum number of web addresses '
+                              u'imported simultaneously by one user import '
+                              u'task.')),
+
+    'USER_IMPORT_POOL_PER_HOST': (2, ugettext(u'Maximum number of web '
+                                  u'addresses of the same remote host '
+                                  u'imported simultaneously by one user '
+                                  u'import task.')),
+
+    'USER_IMPORT_CHECKPOINT_INTERVAL': (25, ugettext(u'User imports save '
+                                        u'their results every N imported '
+                                        u'web addresses, for retries to '
+                                        u'resume where they stopped.')),
+
 })
 
 # ————————————————————————————————————————————————————————— RSS feed refreshing
@@ -298,6 +312,22 @@ CONSTANCE_CONFIG.update({
                                   u'time. Workers should adjust the value '
                                   u'automatically as time passes.')),
 
+    'FEED_FETCH_POOL_BATCH_SIZE': (50, ugettext(u'How many RSS/Atom feeds '
+                                   u'are downloaded together by one pooled '
+                                   u'refresh task. Set to 0 to disable the '
+                                   u'pool and refresh each feed in its own '
+                                   u'task.')),
+
+    'FEED_FETCH_POOL_SIZE': (32, ugettext(u'Maximum number of simultaneous '
+                             u'downloads in one pooled refresh task.')),
+
+    'FEED_FETCH_POOL_PER_HOST': (2, ugettext(u'Maximum number of '
+                                 u'simultaneous downloads on the same remote '
+                                 u'host in one pooled refresh task.')),
+
+    'FEED_FETCH_POOL_TIMEOUT': (20, ugettext(u'Network timeout of pooled '
+                                u'feed downloads, in seconds.')),
+
     'FEED_ADMIN_LIST_PER_PAGE': (100, ugettext(u'How many feeds per page in '
                                  u'the Django admin. Increase only if '
                                  u'performance is acceptable; do NOT abuse!')),
@@ -311,6 +341,10 @@ CONSTANCE_CONFIG.update({
     'FEED_CLOSED_WARN_LIMIT': (5, ugettext(u'Number of days during which a '
                                u'just closed feed will be warned about to '
                                u'site managers via mail.')),
+
+    'FEED_EXPORT_BATCH_SIZE': (200, ugettext(u'How many items of a feed are '
+                               u'loaded together, with their authors, tags '
+                               u'and language, when exporting content.')),
 })
 
 # —————————————————————————————————————————————————— Article fetching & parsing
@@ -333,6 +367,23 @@ CONSTANCE_CONFIG.update({
                                       u'duplicate content that will need '
                                       u'post-processing).')),
 
+    'ARTICLE_REDIRECT_CACHE_TTL': (3600 * 24 * 7, ugettext(u'How long, in '
+                                   u'seconds, the final URL of a redirector '
+                                   u'link (FeedBurner, feedsportal…) is '
+                                   u'remembered, avoiding any network call '
+                                   u'to absolutize it again.')),
+
+    'ARTICLE_HANDOFF_TTL': (120, ugettext(u'How long, in seconds, the page '
+                            u'downloaded while absolutizing an article is '
+                            u'kept for the processing chain, which then '
+                            u'does not download it again. It is deleted '
+                            u'as soon as read.')),
+
+    'ARTICLE_HANDOFF_MAX_SIZE': (2097152, ugettext(u'Pages bigger than this '
+                                 u'size, in bytes, are not kept after '
+                                 u'absolutization. Set to 0 to disable the '
+                                 u'hand-off.')),
+
     'ARTICLE_FETCHING_DEBUG': (False, ugettext(u'Enable this to log '
                                u'intermediate article versions. Default: '
                                   u'not enabled in normal conditions. Kept '
@@ -360,6 +411,31 @@ CONSTANCE_CONFIG.update({
                                   u'to Markdown internal conversion. '
                                   u'Default: enabled in normal conditions.')),
 
+    'ORIGINAL_DATA_PACK_BATCH_SIZE': (500, ugettext(u'How many legacy '
+                                      u'original data are converted to the '
+                                      u'packed format in one transaction.')),
+
+    'SEARCH_INDEX_BATCH_SIZE': (5000, ugettext(u'How many existing items '
+                                u'are indexed for search in one '
+                                u'transaction.')),
+
+    'WEBSITE_CACHE_TTL': (600, ugettext(u'How long, in seconds, each worker '
+                          u'process remembers the web site of an URL host '
+                          u'before asking the database again.')),
+
+    'WEBSITE_CACHE_NEGATIVE_TTL': (60, ugettext(u'How long, in seconds, each '
+                                   u'worker process remembers that a web site '
+                                   u'could not be found nor created.')),
+
+    'TAG_CACHE_TTL': (3600, ugettext(u'How long, in seconds, each worker '
+                      u'process remembers the ID of a tag name before '
+                      u'asking the database again.')),
+
+    'AUTHOR_CACHE_TTL': (3600, ugettext(u'How long, in seconds, each '
+                         u'worker process remembers the ID of an author '
+                         u'of a web site before asking the database '
+                         u'again.')),
+
 
 
     'ARTICLE_ARCHIVE_BATCH_SIZE': (100 if DEBUG else 50000,
@@ -460,6 +536,30 @@ CONSTANCE_CONFIG.update({
         ugettext(u'Make cached lists expire after this amount of seconds. '
                  u'Set to 0 to use default cache expiry delay.')),
 
+    'TWITTER_STREAM_BATCH_SIZE': (
+        50,
+        ugettext(u'Number of tweets buffered by a multiplexed Twitter '
+                 u'stream before creating them in the database.')),
+
+    'TWITTER_STREAM_BATCH_DELAY': (
+        10,
+        ugettext(u'Maximum delay, in seconds, before buffered tweets of a '
+                 u'multiplexed Twitter stream are created in the database, '
+                 u'whatever their number.')),
+
+    'TWITTER_STREAM_RELOAD_INTERVAL': (
+        300,
+        ugettext(u'Interval, in seconds, at which a multiplexed Twitter '
+                 u'stream checks if its feeds changed, and reconnects '
+                 u'with new parameters if they did.')),
+
+    'TWITTER_STREAM_LOCK_EXPIRY': (
+        300,
+        ugettext(u'Expiry, in seconds, of the lock which ensures only one '
+                 u'multiplexed stream runs per Twitter account. The running '
+                 u'stream refreshes it regularly; if its worker dies, '
+                 u'another stream can start after this delay.')),
+
 
 })
 
@@ -543,6 +643,11 @@ CONSTANCE_CONFIG.update({
                      u'is a tradeoff to choose, depending on your duplicates '
                      u'number, and thus on what your server fetches.')),
 
+    'CHECK_DUPLICATES_CHUNK_SIZE': (500, ugettext(u'How many duplicates the '
+                                    u'night duplicates check replaces or '
+                                    u'purges at once, with set-based '
+                                    u'queries.')),
+
     'CHECK_ORPHANED_DISABLED': (False, ugettext(u'Disable or not the '
                                   u'night orphaned check that will '
                                   u'ensure all orphaned articles are '
@@ -554,6 +659,12 @@ CONSTANCE_CONFIG.update({
                              u'`is_good` attribute. Default: let it run '
                              u'(=enabled).')),
 
+    'CHECK_READS_CHUNK_SIZE': (1000, ugettext(u'How many bad reads the '
+                               u'night reads check examines at once. Each '
+                               u'chunk costs one query and one bulk update; '
+                               u'the check resumes after the last finished '
+                               u'chunk if interrupted.')),
+
     'CHECK_USERS_DISABLED': (False, ugettext(u'Disable or not the night '
                              u'users check. Default: let it run (=enabled).')),
 })